@@ -0,0 +1,35 @@
+"""
+CRM Service Configuration
+"""
+from pydantic_settings import BaseSettings
+
+
+class Settings(BaseSettings):
+    """Application settings"""
+
+    # Storage backend: "memory" keeps records in process (tests and single-
+    # process dev; every uvicorn worker gets its own copy), "postgres" shares
+    # them across workers and replicas
+    STORAGE_BACKEND: str = "memory"
+
+    # PostgreSQL (same variables as the postgresql service in docker-compose)
+    POSTGRES_HOST: str = "localhost"
+    POSTGRES_PORT: int = 5432
+    POSTGRES_USER: str = "admin"
+    POSTGRES_PASSWORD: str = ""
+    POSTGRES_DB: str = "pueblomente"
+
+    # Connection pool per worker process, and the per-query timeout
+    POSTGRES_POOL_MIN_SIZE: int = 2
+    POSTGRES_POOL_MAX_SIZE: int = 10
+    POSTGRES_COMMAND_TIMEOUT: float = 10.0  # seconds
+
+    # Apply migrations/*.sql (idempotent) on startup
+    POSTGRES_APPLY_MIGRATIONS: bool = True
+
+    class Config:
+        env_file = ".env"
+        case_sensitive = True
+
+
+settings = Settings()
@@ -3,23 +3,43 @@ CRM Service - Customer Relationship Management
 Comprehensive CRM with Customer 360° View, Sales Pipeline, and Marketing Automation
 """
 
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Depends, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, ValidationError
 from typing import List, Dict, Optional, Any
 from datetime import datetime, timedelta
 from enum import Enum
+from contextlib import asynccontextmanager
 import logging
 from prometheus_fastapi_instrumentator import Instrumentator
 import uuid
 
+from app.config import settings
+from app.storage import Collection, Repository, create_storage
+from app.store import decode_cursor, encode_cursor
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup and shutdown events
+    """
+    await storage.start()
+
+    yield
+
+    # Shutdown
+    await storage.stop()
+
+
 app = FastAPI(
     title="CRM Service - Pueblo Mente IA",
     description="Enterprise Customer Relationship Management System",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS
@@ -29,6 +49,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Prometheus
@@ -189,17 +210,47 @@ class LeadScoringResponse(BaseModel):
     conversion_probability: float
 
 # ============================================================================
-# IN-MEMORY DATABASE (Replace with real DB in production)
+# STORAGE (STORAGE_BACKEND: "memory" per process, "postgres" shared)
 # ============================================================================
 
-contacts_db: Dict[str, Contact] = {}
-deals_db: Dict[str, Deal] = {}
-activities_db: Dict[str, Activity] = {}
+# Fields the endpoints filter, sort or aggregate on; indexed in both backends
+CONTACTS = Collection("crm_contacts", Contact, ("contact_type", "lead_source", "lifetime_value"))
+DEALS = Collection("crm_deals", Deal, ("contact_id", "stage"))
+ACTIVITIES = Collection("crm_activities", Activity, ("contact_id", "deal_id", "activity_type", "completed"))
+
+storage = create_storage(settings)
+contacts_db: Repository[Contact] = storage.repository(CONTACTS)
+deals_db: Repository[Deal] = storage.repository(DEALS)
+activities_db: Repository[Activity] = storage.repository(ACTIVITIES)
 
 # ============================================================================
 # BUSINESS LOGIC
 # ============================================================================
 
+async def paginate(
+    repository: Repository,
+    response: Response,
+    limit: int,
+    cursor: Optional[str],
+    offset: int = 0,
+    **filters
+):
+    """One page of ``repository`` newest first
+
+    ``cursor`` continues from a previous page; the cursor for the page after
+    this one is returned in the X-Next-Cursor header, which is absent on the
+    last page.
+    """
+    try:
+        before = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    items, next_key = await repository.page(limit, before=before, offset=offset, **filters)
+    if next_key is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(next_key)
+    return items
+
 def calculate_lead_score(contact: Contact, activities: List[Activity]) -> LeadScoringResponse:
     """Calculate lead score based on multiple factors"""
     score = 0
@@ -314,8 +365,9 @@ async def health_check():
         "status": "healthy",
         "service": "crm-service",
         "version": "1.0.0",
-        "total_contacts": len(contacts_db),
-        "total_deals": len(deals_db),
+        "storage": storage.name,
+        "total_contacts": await contacts_db.count(),
+        "total_deals": await deals_db.count(),
         "timestamp": datetime.now().isoformat()
     }
 
@@ -334,7 +386,7 @@ async def create_contact(contact_data: ContactCreate):
         last_contacted=None
     )
 
-    contacts_db[contact_id] = contact
+    await contacts_db.save(contact)
     logger.info(f"Contact created: {contact_id}")
 
     return contact
@@ -342,56 +394,68 @@ async def create_contact(contact_data: ContactCreate):
 @app.get("/api/v1/crm/contacts/{contact_id}", response_model=Contact)
 async def get_contact(contact_id: str):
     """Get contact by ID"""
-    if contact_id not in contacts_db:
+    contact = await contacts_db.get(contact_id)
+    if contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
 
-    return contacts_db[contact_id]
+    return contact
 
 @app.get("/api/v1/crm/contacts", response_model=List[Contact])
 async def list_contacts(
+    response: Response,
     contact_type: Optional[ContactType] = None,
     lead_source: Optional[LeadSource] = None,
-    limit: int = Query(default=50, le=500),
-    offset: int = Query(default=0, ge=0)
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = None
 ):
-    """List all contacts with filtering"""
-    contacts = list(contacts_db.values())
-
-    if contact_type:
-        contacts = [c for c in contacts if c.contact_type == contact_type]
-
-    if lead_source:
-        contacts = [c for c in contacts if c.lead_source == lead_source]
-
-    # Sort by created_at descending
-    contacts.sort(key=lambda x: x.created_at, reverse=True)
-
-    return contacts[offset:offset + limit]
+    """List contacts with filtering, newest first
+
+    Follow the X-Next-Cursor header for further pages; unlike offset, a
+    cursor doesn't get slower on deep pages.
+    """
+    return await paginate(
+        contacts_db, response, limit, cursor, offset,
+        contact_type=contact_type,
+        lead_source=lead_source
+    )
 
 @app.put("/api/v1/crm/contacts/{contact_id}", response_model=Contact)
 async def update_contact(contact_id: str, updates: Dict[str, Any]):
     """Update contact"""
-    if contact_id not in contacts_db:
+    contact = await contacts_db.get(contact_id)
+    if contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
 
-    contact = contacts_db[contact_id]
-
-    for key, value in updates.items():
-        if hasattr(contact, key):
-            setattr(contact, key, value)
-
-    contact.updated_at = datetime.now()
-    contacts_db[contact_id] = contact
+    # Validated, so nothing the stored record can't be read back as gets persisted
+    data = contact.model_dump()
+    data.update({key: value for key, value in updates.items() if key in data and key != "id"})
+    data["updated_at"] = datetime.now()
+    try:
+        updated = Contact.model_validate(data)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+
+    # Only the changed fields are written, so a client echoing back the
+    # contact it read can't undo a concurrent change such as a won deal's
+    # lifetime_value increment
+    changed = {
+        field: getattr(updated, field)
+        for field in Contact.model_fields
+        if getattr(updated, field) != getattr(contact, field)
+    }
+    contact = await contacts_db.set_fields(contact_id, **changed)
+    if contact is None:
+        raise HTTPException(status_code=404, detail="Contact not found")
 
     return contact
 
 @app.delete("/api/v1/crm/contacts/{contact_id}", status_code=204)
 async def delete_contact(contact_id: str):
     """Delete contact"""
-    if contact_id not in contacts_db:
+    if not await contacts_db.delete(contact_id):
         raise HTTPException(status_code=404, detail="Contact not found")
 
-    del contacts_db[contact_id]
     logger.info(f"Contact deleted: {contact_id}")
 
 # ---------- DEALS ----------
@@ -399,7 +463,7 @@ async def delete_contact(contact_id: str):
 @app.post("/api/v1/crm/deals", response_model=Deal, status_code=201)
 async def create_deal(deal_data: DealCreate):
     """Create a new deal"""
-    if deal_data.contact_id not in contacts_db:
+    if await contacts_db.get(deal_data.contact_id) is None:
         raise HTTPException(status_code=404, detail="Contact not found")
 
     deal_id = str(uuid.uuid4())
@@ -413,7 +477,7 @@ async def create_deal(deal_data: DealCreate):
         owner_id=None
     )
 
-    deals_db[deal_id] = deal
+    await deals_db.save(deal)
     logger.info(f"Deal created: {deal_id}")
 
     return deal
@@ -421,51 +485,46 @@ async def create_deal(deal_data: DealCreate):
 @app.get("/api/v1/crm/deals/{deal_id}", response_model=Deal)
 async def get_deal(deal_id: str):
     """Get deal by ID"""
-    if deal_id not in deals_db:
+    deal = await deals_db.get(deal_id)
+    if deal is None:
         raise HTTPException(status_code=404, detail="Deal not found")
 
-    return deals_db[deal_id]
+    return deal
 
 @app.get("/api/v1/crm/deals", response_model=List[Deal])
 async def list_deals(
+    response: Response,
     stage: Optional[DealStage] = None,
     contact_id: Optional[str] = None,
-    limit: int = Query(default=50, le=500),
-    offset: int = Query(default=0, ge=0)
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = None
 ):
-    """List all deals with filtering"""
-    deals = list(deals_db.values())
-
-    if stage:
-        deals = [d for d in deals if d.stage == stage]
-
-    if contact_id:
-        deals = [d for d in deals if d.contact_id == contact_id]
-
-    deals.sort(key=lambda x: x.created_at, reverse=True)
-
-    return deals[offset:offset + limit]
+    """List deals with filtering, newest first; paginate with the X-Next-Cursor header"""
+    return await paginate(deals_db, response, limit, cursor, offset, stage=stage, contact_id=contact_id)
 
 @app.put("/api/v1/crm/deals/{deal_id}/stage")
 async def update_deal_stage(deal_id: str, stage: DealStage):
     """Update deal stage"""
-    if deal_id not in deals_db:
-        raise HTTPException(status_code=404, detail="Deal not found")
-
-    deal = deals_db[deal_id]
-    deal.stage = stage
-    deal.updated_at = datetime.now()
-
+    now = datetime.now()
+    fields = {"stage": stage, "updated_at": now}
     if stage in [DealStage.CLOSED_WON, DealStage.CLOSED_LOST]:
-        deal.closed_at = datetime.now()
-
-        # Update contact LTV if won
-        if stage == DealStage.CLOSED_WON:
-            contact = contacts_db[deal.contact_id]
-            contact.lifetime_value += deal.value
-            contacts_db[deal.contact_id] = contact
-
-    deals_db[deal_id] = deal
+        fields["closed_at"] = now
+
+    # Only these fields are written. Winning is conditional on the deal not
+    # being won already, so a repeated or racing request (from any worker)
+    # adds the deal's value to the contact's LTV once.
+    won = stage == DealStage.CLOSED_WON
+    deal = await deals_db.set_fields(deal_id, unless={"stage": stage} if won else None, **fields)
+    if deal is None:
+        deal = await deals_db.get(deal_id)
+        if deal is None:
+            raise HTTPException(status_code=404, detail="Deal not found")
+        # Already won
+        return deal
+
+    if won:
+        await contacts_db.increment(deal.contact_id, "lifetime_value", deal.value)
 
     return deal
 
@@ -474,7 +533,8 @@ async def update_deal_stage(deal_id: str, stage: DealStage):
 @app.post("/api/v1/crm/activities", response_model=Activity, status_code=201)
 async def create_activity(activity_data: ActivityCreate):
     """Create a new activity"""
-    if activity_data.contact_id not in contacts_db:
+    contact = await contacts_db.get(activity_data.contact_id)
+    if contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
 
     activity_id = str(uuid.uuid4())
@@ -486,12 +546,10 @@ async def create_activity(activity_data: ActivityCreate):
         completed_at=None if not activity_data.completed else datetime.now()
     )
 
-    activities_db[activity_id] = activity
+    await activities_db.save(activity)
 
-    # Update last contacted
-    contact = contacts_db[activity_data.contact_id]
-    contact.last_contacted = datetime.now()
-    contacts_db[activity_data.contact_id] = contact
+    # Update last contacted (only that field, other workers may be updating the contact too)
+    await contacts_db.set_fields(contact.id, last_contacted=datetime.now())
 
     logger.info(f"Activity created: {activity_id}")
 
@@ -499,41 +557,33 @@ async def create_activity(activity_data: ActivityCreate):
 
 @app.get("/api/v1/crm/activities", response_model=List[Activity])
 async def list_activities(
+    response: Response,
     contact_id: Optional[str] = None,
     deal_id: Optional[str] = None,
     activity_type: Optional[ActivityType] = None,
     completed: Optional[bool] = None,
-    limit: int = Query(default=50, le=500)
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: Optional[str] = None
 ):
-    """List activities with filtering"""
-    activities = list(activities_db.values())
-
-    if contact_id:
-        activities = [a for a in activities if a.contact_id == contact_id]
-
-    if deal_id:
-        activities = [a for a in activities if a.deal_id == deal_id]
-
-    if activity_type:
-        activities = [a for a in activities if a.activity_type == activity_type]
-
-    if completed is not None:
-        activities = [a for a in activities if a.completed == completed]
-
-    activities.sort(key=lambda x: x.created_at, reverse=True)
-
-    return activities[:limit]
+    """List activities with filtering, newest first; paginate with the X-Next-Cursor header"""
+    return await paginate(
+        activities_db, response, limit, cursor,
+        contact_id=contact_id,
+        deal_id=deal_id,
+        activity_type=activity_type,
+        completed=completed
+    )
 
 @app.put("/api/v1/crm/activities/{activity_id}/complete")
 async def complete_activity(activity_id: str):
     """Mark activity as completed"""
-    if activity_id not in activities_db:
+    activity = await activities_db.get(activity_id)
+    if activity is None:
         raise HTTPException(status_code=404, detail="Activity not found")
 
-    activity = activities_db[activity_id]
     activity.completed = True
     activity.completed_at = datetime.now()
-    activities_db[activity_id] = activity
+    await activities_db.save(activity)
 
     return activity
 
@@ -542,14 +592,13 @@ async def complete_activity(activity_id: str):
 @app.get("/api/v1/crm/contacts/{contact_id}/360", response_model=Customer360Response)
 async def get_customer_360(contact_id: str):
     """Get Customer 360° view with complete contact history"""
-    if contact_id not in contacts_db:
+    contact = await contacts_db.get(contact_id)
+    if contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
 
-    contact = contacts_db[contact_id]
-
     # Get all related data
-    contact_deals = [d for d in deals_db.values() if d.contact_id == contact_id]
-    contact_activities = [a for a in activities_db.values() if a.contact_id == contact_id]
+    contact_deals = await deals_db.find(contact_id=contact_id)
+    contact_activities = await activities_db.find(contact_id=contact_id)
 
     # Calculate metrics
     total_revenue = sum(d.value for d in contact_deals if d.stage == DealStage.CLOSED_WON)
@@ -593,7 +642,7 @@ async def get_customer_360(contact_id: str):
 @app.get("/api/v1/crm/pipeline/metrics", response_model=PipelineMetrics)
 async def get_pipeline_metrics():
     """Get sales pipeline metrics and analytics"""
-    deals = list(deals_db.values())
+    deals = await deals_db.find()
 
     total_deals = len(deals)
     total_value = sum(d.value for d in deals)
@@ -612,14 +661,13 @@ async def get_pipeline_metrics():
     ]
     avg_sales_cycle = sum(sales_cycles) / len(sales_cycles) if sales_cycles else 0
 
-    # Deals by stage
-    deals_by_stage = {}
-    value_by_stage = {}
+    # Deals by stage, in one pass over the deals already loaded
+    deals_by_stage = {stage.value: 0 for stage in DealStage}
+    value_by_stage = {stage.value: 0 for stage in DealStage}
 
-    for stage in DealStage:
-        stage_deals = [d for d in deals if d.stage == stage]
-        deals_by_stage[stage.value] = len(stage_deals)
-        value_by_stage[stage.value] = sum(d.value for d in stage_deals)
+    for d in deals:
+        deals_by_stage[DealStage(d.stage).value] += 1
+        value_by_stage[DealStage(d.stage).value] += d.value
 
     return PipelineMetrics(
         total_deals=total_deals,
@@ -634,19 +682,18 @@ async def get_pipeline_metrics():
 @app.get("/api/v1/crm/leads/{contact_id}/score", response_model=LeadScoringResponse)
 async def score_lead(contact_id: str):
     """Calculate lead score and qualification status"""
-    if contact_id not in contacts_db:
+    contact = await contacts_db.get(contact_id)
+    if contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
 
-    contact = contacts_db[contact_id]
-    contact_activities = [a for a in activities_db.values() if a.contact_id == contact_id]
+    contact_activities = await activities_db.find(contact_id=contact_id)
 
     return calculate_lead_score(contact, contact_activities)
 
 @app.get("/api/v1/crm/reports/top-customers")
-async def get_top_customers(limit: int = 10):
+async def get_top_customers(limit: int = Query(default=10, ge=1, le=500)):
     """Get top customers by lifetime value"""
-    contacts = list(contacts_db.values())
-    contacts.sort(key=lambda x: x.lifetime_value, reverse=True)
+    contacts = await contacts_db.top("lifetime_value", limit)
 
     return {
         "top_customers": [
@@ -657,7 +704,7 @@ async def get_top_customers(limit: int = 10):
                 "lifetime_value": c.lifetime_value,
                 "email": c.email
             }
-            for c in contacts[:limit]
+            for c in contacts
         ]
     }
 
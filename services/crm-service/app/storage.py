@@ -0,0 +1,424 @@
+"""
+Pluggable storage for contacts, deals and activities
+
+Endpoints use one ``Repository`` per collection and never see the backend:
+
+- ``MemoryStorage`` keeps records in the indexed in-process ``Table``; it is
+  what the tests and single-process development run on
+- ``PostgresStorage`` keeps a table per collection behind an asyncpg
+  connection pool, so every worker process and replica shares the same data
+
+In PostgreSQL a record is stored whole as JSONB next to copies of the fields
+it is filtered, ordered or aggregated on (``Collection.fields``), which carry
+the indexes; see migrations/001_create_tables.sql. Adding a model field needs
+no migration unless it becomes one of those columns.
+"""
+import heapq
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Generic, List, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+from app.store import OrderKey, Table
+
+logger = logging.getLogger(__name__)
+
+M = TypeVar("M", bound=BaseModel)
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / "migrations"
+
+# Advisory lock held while applying migrations, so workers starting together
+# don't race on CREATE ... IF NOT EXISTS
+MIGRATION_LOCK_ID = 8003
+
+
+@dataclass(frozen=True)
+class Collection(Generic[M]):
+    """A record type, its table and the fields that can be filtered on"""
+    table: str
+    model: Type[M]
+    fields: Tuple[str, ...]
+
+
+class Repository(ABC, Generic[M]):
+    """Async access to the records of one collection
+
+    Filters are ``field=value`` on ``Collection.fields``; None values are
+    ignored. Records are ordered by (created_at, id).
+    """
+
+    def __init__(self, collection: Collection[M]):
+        self.collection = collection
+
+    def _check_fields(self, *fields: str) -> None:
+        unknown = [f for f in fields if f not in self.collection.fields]
+        if unknown:
+            raise ValueError(f"{self.collection.table} cannot filter or sort on {', '.join(unknown)}")
+
+    def _check_settable(self, *fields: str) -> None:
+        unknown = [f for f in fields if f == "id" or f not in self.collection.model.model_fields]
+        if unknown:
+            raise ValueError(f"{self.collection.table} cannot set {', '.join(unknown)}")
+
+    @abstractmethod
+    async def get(self, record_id: str) -> Optional[M]:
+        """Record by id, or None"""
+
+    @abstractmethod
+    async def save(self, record: M) -> None:
+        """Insert or replace ``record``"""
+
+    @abstractmethod
+    async def delete(self, record_id: str) -> bool:
+        """Delete by id; False if there was no such record"""
+
+    @abstractmethod
+    async def find(self, **filters: Any) -> List[M]:
+        """All matching records, oldest first"""
+
+    @abstractmethod
+    async def page(
+        self,
+        limit: int,
+        before: Optional[OrderKey] = None,
+        offset: int = 0,
+        **filters: Any
+    ) -> Tuple[List[M], Optional[OrderKey]]:
+        """Up to ``limit`` matching records newest first, and the cursor key for the next page"""
+
+    @abstractmethod
+    async def count(self, **filters: Any) -> int:
+        """Number of matching records"""
+
+    @abstractmethod
+    async def top(self, field: str, limit: int) -> List[M]:
+        """The ``limit`` records with the largest ``field``"""
+
+    @abstractmethod
+    async def increment(self, record_id: str, field: str, amount: float) -> Optional[M]:
+        """Atomically add ``amount`` to a numeric field; the updated record, or None"""
+
+    @abstractmethod
+    async def set_fields(
+        self,
+        record_id: str,
+        unless: Optional[Dict[str, Any]] = None,
+        **fields: Any
+    ) -> Optional[M]:
+        """Atomically set only the given fields; the updated record, or None
+
+        Unlike ``save`` of a record read earlier, this can't undo another
+        worker's concurrent change (e.g. an ``increment``) to other fields.
+        ``unless`` maps filterable fields to values: when the record already
+        has any of them nothing is written and None is returned, so exactly
+        one of several racing callers makes a given transition.
+        """
+
+
+class Storage(ABC):
+    """A storage backend: lifecycle plus a repository per collection"""
+
+    name = ""
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    def repository(self, collection: Collection[M]) -> Repository[M]:
+        pass
+
+
+# ============================================================================
+# IN-MEMORY
+# ============================================================================
+
+class MemoryRepository(Repository[M]):
+    """Repository over an indexed ``Table``; data lives and dies with the process"""
+
+    def __init__(self, collection: Collection[M]):
+        super().__init__(collection)
+        self.table: Table[M] = Table(collection.fields)
+
+    async def get(self, record_id: str) -> Optional[M]:
+        return self.table.get(record_id)
+
+    async def save(self, record: M) -> None:
+        self.table[record.id] = record
+
+    async def delete(self, record_id: str) -> bool:
+        if record_id not in self.table:
+            return False
+        del self.table[record_id]
+        return True
+
+    async def find(self, **filters: Any) -> List[M]:
+        self._check_fields(*filters)
+        return self.table.find(**filters)
+
+    async def page(self, limit, before=None, offset=0, **filters):
+        self._check_fields(*filters)
+        return self.table.page(limit, before=before, offset=offset, **filters)
+
+    async def count(self, **filters: Any) -> int:
+        self._check_fields(*filters)
+        filters = {f: v for f, v in filters.items() if v is not None}
+        if not filters:
+            return len(self.table)
+        if len(filters) == 1:
+            return self.table.count(*next(iter(filters.items())))
+        return len(self.table.find(**filters))
+
+    async def top(self, field: str, limit: int) -> List[M]:
+        self._check_fields(field)
+        return heapq.nlargest(limit, self.table.values(), key=lambda r: getattr(r, field))
+
+    async def increment(self, record_id: str, field: str, amount: float) -> Optional[M]:
+        self._check_fields(field)
+        record = self.table.get(record_id)
+        if record is None:
+            return None
+        setattr(record, field, getattr(record, field) + amount)
+        self.table[record_id] = record
+        return record
+
+    async def set_fields(self, record_id, unless=None, **fields):
+        self._check_settable(*fields)
+        unless = unless or {}
+        self._check_fields(*unless)
+        record = self.table.get(record_id)
+        if record is None or any(getattr(record, f) == v for f, v in unless.items()):
+            return None
+        for field, value in fields.items():
+            setattr(record, field, value)
+        self.table[record_id] = record
+        return record
+
+
+class MemoryStorage(Storage):
+    """Process-local storage; each uvicorn worker has its own copy"""
+
+    name = "memory"
+
+    def repository(self, collection: Collection[M]) -> MemoryRepository[M]:
+        return MemoryRepository(collection)
+
+
+# ============================================================================
+# POSTGRESQL
+# ============================================================================
+
+def _column_value(value: Any) -> Any:
+    """Enums are stored by value in their columns"""
+    return value.value if isinstance(value, Enum) else value
+
+
+class PostgresRepository(Repository[M]):
+    """Repository over one PostgreSQL table: id, created_at, ``fields`` columns and the JSONB record"""
+
+    def __init__(self, storage: "PostgresStorage", collection: Collection[M]):
+        super().__init__(collection)
+        self.storage = storage
+        columns = ["id", "created_at", *collection.fields, "data"]
+        placeholders = [f"${i}" for i in range(1, len(columns) + 1)]
+        placeholders[-1] += "::jsonb"
+        updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns[1:])
+        self._upsert_sql = (
+            f"INSERT INTO {collection.table} ({', '.join(columns)}) VALUES ({', '.join(placeholders)}) "
+            f"ON CONFLICT (id) DO UPDATE SET {updates}"
+        )
+
+    def _load(self, data: str) -> M:
+        return self.collection.model.model_validate_json(data)
+
+    def _where(self, filters: Dict[str, Any], before: Optional[OrderKey] = None) -> Tuple[str, List[Any]]:
+        """WHERE clause and its arguments for equality filters and an optional keyset cursor"""
+        self._check_fields(*filters)
+        clauses: List[str] = []
+        args: List[Any] = []
+        for field, value in filters.items():
+            if value is None:
+                continue
+            args.append(_column_value(value))
+            clauses.append(f"{field} = ${len(args)}")
+        if before is not None:
+            args.extend(before)
+            clauses.append(f"(created_at, id) < (${len(args) - 1}::timestamp, ${len(args)}::text)")
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), args
+
+    async def get(self, record_id: str) -> Optional[M]:
+        data = await self.storage.pool.fetchval(
+            f"SELECT data FROM {self.collection.table} WHERE id = $1", record_id
+        )
+        return None if data is None else self._load(data)
+
+    async def save(self, record: M) -> None:
+        values = [_column_value(getattr(record, f)) for f in self.collection.fields]
+        await self.storage.pool.execute(
+            self._upsert_sql, record.id, record.created_at, *values, record.model_dump_json()
+        )
+
+    async def delete(self, record_id: str) -> bool:
+        status = await self.storage.pool.execute(
+            f"DELETE FROM {self.collection.table} WHERE id = $1", record_id
+        )
+        return status != "DELETE 0"
+
+    async def find(self, **filters: Any) -> List[M]:
+        where, args = self._where(filters)
+        rows = await self.storage.pool.fetch(
+            f"SELECT data FROM {self.collection.table}{where} ORDER BY created_at, id", *args
+        )
+        return [self._load(row["data"]) for row in rows]
+
+    async def page(self, limit, before=None, offset=0, **filters):
+        where, args = self._where(filters, before)
+        # One row beyond the page tells whether there is a next page
+        args += [limit + 1, offset]
+        rows = await self.storage.pool.fetch(
+            f"SELECT id, created_at, data FROM {self.collection.table}{where} "
+            f"ORDER BY created_at DESC, id DESC LIMIT ${len(args) - 1} OFFSET ${len(args)}",
+            *args
+        )
+        items = [self._load(row["data"]) for row in rows[:limit]]
+        if len(rows) <= limit or limit <= 0:
+            return items, None
+        last = rows[limit - 1]
+        return items, (last["created_at"], last["id"])
+
+    async def count(self, **filters: Any) -> int:
+        where, args = self._where(filters)
+        return await self.storage.pool.fetchval(f"SELECT count(*) FROM {self.collection.table}{where}", *args)
+
+    async def top(self, field: str, limit: int) -> List[M]:
+        self._check_fields(field)
+        rows = await self.storage.pool.fetch(
+            f"SELECT data FROM {self.collection.table} ORDER BY {field} DESC, created_at DESC LIMIT $1", limit
+        )
+        return [self._load(row["data"]) for row in rows]
+
+    async def increment(self, record_id: str, field: str, amount: float) -> Optional[M]:
+        self._check_fields(field)
+        # One statement, so concurrent workers can't lose each other's updates
+        data = await self.storage.pool.fetchval(
+            f"UPDATE {self.collection.table} SET {field} = {field} + $2, "
+            f"data = jsonb_set(data, '{{{field}}}', to_jsonb({field} + $2)) "
+            f"WHERE id = $1 RETURNING data",
+            record_id, amount
+        )
+        return None if data is None else self._load(data)
+
+    def _set_fields_sql(self, fields: List[str], unless: List[str] = ()) -> Tuple[str, List[str]]:
+        """UPDATE setting the columns among ``fields`` and merging all of them into the JSONB record
+
+        Arguments are the id, the column values in the returned order, the
+        JSON object of every field, then the ``unless`` values.
+        """
+        self._check_fields(*unless)
+        columns = [f for f in fields if f in ("created_at", *self.collection.fields)]
+        assignments = [f"{c} = ${i}" for i, c in enumerate(columns, start=2)]
+        assignments.append(f"data = data || ${len(columns) + 2}::jsonb")
+        conditions = ["id = $1"] + [
+            f"{f} IS DISTINCT FROM ${i}" for i, f in enumerate(unless, start=len(columns) + 3)
+        ]
+        sql = (
+            f"UPDATE {self.collection.table} SET {', '.join(assignments)} "
+            f"WHERE {' AND '.join(conditions)} RETURNING data"
+        )
+        return sql, columns
+
+    async def set_fields(self, record_id, unless=None, **fields):
+        self._check_settable(*fields)
+        unless = unless or {}
+        sql, columns = self._set_fields_sql(list(fields), list(unless))
+        # One statement, so concurrent workers can't lose each other's updates
+        data = await self.storage.pool.fetchval(
+            sql, record_id, *(_column_value(fields[c]) for c in columns), to_json(fields).decode(),
+            *(_column_value(v) for v in unless.values())
+        )
+        return None if data is None else self._load(data)
+
+
+class PostgresStorage(Storage):
+    """Shared storage on PostgreSQL through a per-process asyncpg connection pool"""
+
+    name = "postgres"
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        database: str,
+        min_size: int = 2,
+        max_size: int = 10,
+        command_timeout: float = 10.0,
+        apply_migrations: bool = True
+    ):
+        self._connect = dict(
+            host=host, port=port, user=user, password=password, database=database,
+            min_size=min_size, max_size=max_size, command_timeout=command_timeout
+        )
+        self.apply_migrations = apply_migrations
+        self._pool = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            raise RuntimeError("PostgreSQL storage is not started")
+        return self._pool
+
+    async def start(self) -> None:
+        # Only needed with STORAGE_BACKEND=postgres
+        import asyncpg
+
+        self._pool = await asyncpg.create_pool(**self._connect)
+        if self.apply_migrations:
+            await self.migrate()
+        logger.info(
+            f"PostgreSQL storage ready: {self._connect['host']}:{self._connect['port']}/"
+            f"{self._connect['database']} (pool {self._connect['min_size']}-{self._connect['max_size']})"
+        )
+
+    async def stop(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def migrate(self) -> None:
+        """Apply migrations/*.sql in name order; each must be idempotent"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("SELECT pg_advisory_xact_lock($1)", MIGRATION_LOCK_ID)
+                for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+                    await conn.execute(path.read_text())
+
+    def repository(self, collection: Collection[M]) -> PostgresRepository[M]:
+        return PostgresRepository(self, collection)
+
+
+def create_storage(settings) -> Storage:
+    """Storage backend selected by settings.STORAGE_BACKEND"""
+    if settings.STORAGE_BACKEND == MemoryStorage.name:
+        return MemoryStorage()
+    if settings.STORAGE_BACKEND == PostgresStorage.name:
+        return PostgresStorage(
+            host=settings.POSTGRES_HOST,
+            port=settings.POSTGRES_PORT,
+            user=settings.POSTGRES_USER,
+            password=settings.POSTGRES_PASSWORD,
+            database=settings.POSTGRES_DB,
+            min_size=settings.POSTGRES_POOL_MIN_SIZE,
+            max_size=settings.POSTGRES_POOL_MAX_SIZE,
+            command_timeout=settings.POSTGRES_COMMAND_TIMEOUT,
+            apply_migrations=settings.POSTGRES_APPLY_MIGRATIONS
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
@@ -0,0 +1,178 @@
+"""
+In-memory record store with secondary indexes and ordered, cursor-paged listing
+
+A ``Table`` maps record id -> record like the plain dicts it replaces. It also
+keeps the records ordered by ``(created_at, id)``, and for each value of each
+indexed field (deals by contact_id and stage, activities by contact_id,
+deal_id and type, ...) an equally ordered bucket, so filtered lookups touch
+only the matching records and listings never sort.
+
+``page()`` walks a bucket newest first from a keyset cursor (the order key of
+the last record of the previous page), so fetching any page costs a binary
+search plus the page, however deep it is. Records are pydantic models that
+endpoints mutate in place; writing the record back (``table[id] = record``)
+moves it to the buckets of its new field values.
+"""
+import base64
+import json
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Any, Dict, Generic, Hashable, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# (created_at, id); ids break ties between records created in the same instant
+OrderKey = Tuple[Any, str]
+
+
+def encode_cursor(key: OrderKey) -> str:
+    """Opaque, URL-safe cursor for an order key"""
+    created_at, record_id = key
+    raw = json.dumps([created_at.isoformat(), record_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> OrderKey:
+    """Order key from ``encode_cursor``; raises ValueError on anything else"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, record_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(record_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _remove(keys: List[OrderKey], key: OrderKey) -> None:
+    del keys[bisect_left(keys, key)]
+
+
+class Table(Generic[T]):
+    """Records by id, ordered by ``order_by``, plus secondary indexes on the given fields"""
+
+    def __init__(self, indexed_fields: Iterable[str] = (), order_by: str = "created_at"):
+        self.order_by = order_by
+        self._records: Dict[str, T] = {}
+        self._order: List[OrderKey] = []
+        # field -> value -> sorted order keys of the records with that value
+        self._indexes: Dict[str, Dict[Hashable, List[OrderKey]]] = {f: {} for f in indexed_fields}
+        # id -> (order key, field -> value) the record is currently indexed under
+        self._indexed: Dict[str, Tuple[OrderKey, Dict[str, Hashable]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, record_id: object) -> bool:
+        return record_id in self._records
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._records)
+
+    def __getitem__(self, record_id: str) -> T:
+        return self._records[record_id]
+
+    def __setitem__(self, record_id: str, record: T) -> None:
+        """Insert or update ``record``, re-indexing any changed fields
+
+        New records normally sort last, so insertion is an append after a
+        binary search.
+        """
+        key = (getattr(record, self.order_by), record_id)
+        values = {field: getattr(record, field) for field in self._indexes}
+        previous_key, previous_values = self._indexed.get(record_id, (None, {}))
+
+        self._records[record_id] = record
+        if key != previous_key:
+            if previous_key is not None:
+                _remove(self._order, previous_key)
+            insort(self._order, key)
+        for field, value in values.items():
+            if key == previous_key and previous_values[field] == value:
+                continue
+            if previous_key is not None:
+                self._unlink(field, previous_values[field], previous_key)
+            insort(self._indexes[field].setdefault(value, []), key)
+        self._indexed[record_id] = (key, values)
+
+    def __delitem__(self, record_id: str) -> None:
+        del self._records[record_id]
+        key, values = self._indexed.pop(record_id)
+        _remove(self._order, key)
+        for field, value in values.items():
+            self._unlink(field, value, key)
+
+    def _unlink(self, field: str, value: Hashable, key: OrderKey) -> None:
+        bucket = self._indexes[field][value]
+        _remove(bucket, key)
+        if not bucket:
+            del self._indexes[field][value]
+
+    def get(self, record_id: str, default: Optional[T] = None) -> Optional[T]:
+        return self._records.get(record_id, default)
+
+    def values(self) -> List[T]:
+        return list(self._records.values())
+
+    def clear(self) -> None:
+        self._records.clear()
+        self._order.clear()
+        self._indexed.clear()
+        for index in self._indexes.values():
+            index.clear()
+
+    def count(self, field: str, value: Hashable) -> int:
+        """Number of records whose indexed ``field`` equals ``value``"""
+        return len(self._indexes[field].get(value, ()))
+
+    def _candidates(self, filters: Dict[str, Any]) -> Tuple[List[OrderKey], Dict[str, Any]]:
+        """Ordered keys to scan and the filters still to check on them
+
+        The smallest bucket among the indexed filters is picked; with no
+        indexed filter every record is a candidate.
+        """
+        filters = {f: v for f, v in filters.items() if v is not None}
+        indexed = [f for f in filters if f in self._indexes]
+        if not indexed:
+            return self._order, filters
+        field = min(indexed, key=lambda f: self.count(f, filters[f]))
+        return self._indexes[field].get(filters.pop(field), []), filters
+
+    def _matches(self, record: T, filters: Dict[str, Any]) -> bool:
+        return all(getattr(record, f) == v for f, v in filters.items())
+
+    def find(self, **filters: Any) -> List[T]:
+        """Records matching every ``field=value`` filter, oldest first; None filters are ignored"""
+        keys, filters = self._candidates(filters)
+        records = (self._records[record_id] for _, record_id in keys)
+        return [r for r in records if self._matches(r, filters)]
+
+    def page(
+        self,
+        limit: int,
+        before: Optional[OrderKey] = None,
+        offset: int = 0,
+        **filters: Any
+    ) -> Tuple[List[T], Optional[OrderKey]]:
+        """Up to ``limit`` matching records newest first, and the cursor key for the next page
+
+        ``before`` is the cursor key returned with the previous page; only
+        records ordered before it are returned. The next key is None once no
+        further matching record exists.
+        """
+        keys, filters = self._candidates(filters)
+        position = bisect_left(keys, before) if before is not None else len(keys)
+        items: List[T] = []
+        last_key: Optional[OrderKey] = None
+        # One record beyond the page tells whether there is a next page
+        while position > 0:
+            position -= 1
+            record = self._records[keys[position][1]]
+            if not self._matches(record, filters):
+                continue
+            if offset:
+                offset -= 1
+                continue
+            if len(items) == limit:
+                return items, last_key
+            items.append(record)
+            last_key = keys[position]
+        return items, None
@@ -0,0 +1,49 @@
+-- CRM Service Database Migrations
+-- Version: 001
+-- Description: Create contacts, deals and activities tables
+--
+-- Each record is stored whole in "data"; the other columns copy the fields
+-- the API filters, orders or aggregates on. Every index ends in
+-- (created_at, id) so filtered listings are served newest first straight
+-- from the index, which is what keyset (cursor) pagination relies on.
+
+CREATE TABLE IF NOT EXISTS crm_contacts (
+    id TEXT PRIMARY KEY,
+    created_at TIMESTAMP NOT NULL,
+    contact_type TEXT NOT NULL,
+    lead_source TEXT,
+    lifetime_value DOUBLE PRECISION NOT NULL DEFAULT 0,
+    data JSONB NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_crm_contacts_created ON crm_contacts (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_crm_contacts_type ON crm_contacts (contact_type, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_crm_contacts_source ON crm_contacts (lead_source, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_crm_contacts_lifetime_value ON crm_contacts (lifetime_value DESC);
+
+CREATE TABLE IF NOT EXISTS crm_deals (
+    id TEXT PRIMARY KEY,
+    created_at TIMESTAMP NOT NULL,
+    contact_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    data JSONB NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_crm_deals_created ON crm_deals (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_crm_deals_contact ON crm_deals (contact_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_crm_deals_stage ON crm_deals (stage, created_at, id);
+
+CREATE TABLE IF NOT EXISTS crm_activities (
+    id TEXT PRIMARY KEY,
+    created_at TIMESTAMP NOT NULL,
+    contact_id TEXT NOT NULL,
+    deal_id TEXT,
+    activity_type TEXT NOT NULL,
+    completed BOOLEAN NOT NULL DEFAULT FALSE,
+    data JSONB NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_crm_activities_created ON crm_activities (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_crm_activities_contact ON crm_activities (contact_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_crm_activities_deal ON crm_activities (deal_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_crm_activities_type ON crm_activities (activity_type, created_at, id);
@@ -0,0 +1,22 @@
+"""
+Pytest configuration and shared fixtures
+"""
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture
+def client():
+    """API client on the in-memory storage backend, emptied after each test"""
+    from app import main
+
+    with TestClient(main.app) as client:
+        yield client
+    for repository in (main.contacts_db, main.deals_db, main.activities_db):
+        repository.table.clear()
@@ -0,0 +1,156 @@
+"""
+Tests for the CRM API on the in-memory storage backend
+"""
+import pytest
+
+from app import main
+from app.main import DealStage
+
+
+def create_contact(client, name="Ana", **fields):
+    return client.post("/api/v1/crm/contacts", json={
+        "first_name": name, "last_name": "Ruiz", "email": f"{name.lower()}@example.com", **fields
+    }).json()
+
+
+@pytest.fixture
+def detached_reads(monkeypatch):
+    """Contacts read as copies, as from PostgreSQL, so a stale read can't see later writes"""
+    get_contact = main.contacts_db.get
+
+    async def get_copy(contact_id):
+        contact = await get_contact(contact_id)
+        return None if contact is None else contact.model_copy(deep=True)
+
+    monkeypatch.setattr(main.contacts_db, "get", get_copy)
+
+
+class TestEndpoints:
+    """Endpoints keep storage indexes and derived fields in step"""
+
+    def test_deal_stage_change_moves_deal(self, client):
+        contact = create_contact(client)
+        deal = client.post("/api/v1/crm/deals", json={
+            "title": "Pilot", "contact_id": contact["id"], "value": 1200
+        }).json()
+
+        client.put(f"/api/v1/crm/deals/{deal['id']}/stage", params={"stage": "closed_won"})
+
+        assert client.get("/api/v1/crm/deals", params={"stage": "qualification"}).json() == []
+        won = client.get("/api/v1/crm/deals", params={"stage": "closed_won", "contact_id": contact["id"]}).json()
+        assert [d["id"] for d in won] == [deal["id"]]
+
+        metrics = client.get("/api/v1/crm/pipeline/metrics").json()
+        assert metrics["deals_by_stage"]["closed_won"] == 1
+        assert metrics["deals_by_stage"]["qualification"] == 0
+
+        view = client.get(f"/api/v1/crm/contacts/{contact['id']}/360").json()
+        assert view["total_revenue"] == 1200
+
+    def test_cursor_pagination(self, client):
+        ids = [create_contact(client, f"Contact{i}")["id"] for i in range(5)]
+
+        seen, params = [], {"limit": 2}
+        while True:
+            response = client.get("/api/v1/crm/contacts", params=params)
+            seen += [c["id"] for c in response.json()]
+            if "X-Next-Cursor" not in response.headers:
+                break
+            params["cursor"] = response.headers["X-Next-Cursor"]
+
+        assert seen == ids[::-1]
+        assert client.get("/api/v1/crm/contacts", params={"cursor": "bogus"}).status_code == 400
+
+    def test_limit_must_be_positive(self, client):
+        create_contact(client)
+        for path in ("contacts", "deals", "activities"):
+            for limit in (0, -1):
+                response = client.get(f"/api/v1/crm/{path}", params={"limit": limit})
+                assert response.status_code == 422
+
+    def test_won_deals_add_to_lifetime_value(self, client):
+        ana, ben = create_contact(client, "Ana"), create_contact(client, "Ben")
+        for contact, value in ((ana, 100), (ana, 250), (ben, 300)):
+            deal = client.post("/api/v1/crm/deals", json={
+                "title": "Order", "contact_id": contact["id"], "value": value
+            }).json()
+            client.put(f"/api/v1/crm/deals/{deal['id']}/stage", params={"stage": "closed_won"})
+
+        assert client.get(f"/api/v1/crm/contacts/{ana['id']}").json()["lifetime_value"] == 350
+        top = client.get("/api/v1/crm/reports/top-customers", params={"limit": 1}).json()["top_customers"]
+        assert [c["id"] for c in top] == [ana["id"]]
+
+    def test_activity_during_a_won_deal_keeps_lifetime_value(self, client, monkeypatch, detached_reads):
+        contact = create_contact(client)
+        deal = client.post("/api/v1/crm/deals", json={
+            "title": "Order", "contact_id": contact["id"], "value": 500
+        }).json()
+
+        # The deal is won (as if by another worker) after create_activity has
+        # read the contact and before it records last_contacted
+        save_activity = main.activities_db.save
+
+        async def save_while_deal_is_won(activity):
+            await main.update_deal_stage(deal["id"], DealStage.CLOSED_WON)
+            await save_activity(activity)
+
+        monkeypatch.setattr(main.activities_db, "save", save_while_deal_is_won)
+        response = client.post("/api/v1/crm/activities", json={
+            "contact_id": contact["id"], "activity_type": "call", "title": "Follow-up"
+        })
+        assert response.status_code == 201
+
+        stored = client.get(f"/api/v1/crm/contacts/{contact['id']}").json()
+        assert stored["lifetime_value"] == 500
+        assert stored["last_contacted"] is not None
+
+    def test_update_during_a_won_deal_keeps_lifetime_value(self, client, monkeypatch, detached_reads):
+        contact = create_contact(client)
+        deal = client.post("/api/v1/crm/deals", json={
+            "title": "Order", "contact_id": contact["id"], "value": 500
+        }).json()
+
+        # The deal is won right after update_contact has read the contact
+        get_contact = main.contacts_db.get
+
+        async def get_then_win_deal(contact_id):
+            read = await get_contact(contact_id)
+            await main.update_deal_stage(deal["id"], DealStage.CLOSED_WON)
+            return read
+
+        monkeypatch.setattr(main.contacts_db, "get", get_then_win_deal)
+        updated = client.put(f"/api/v1/crm/contacts/{contact['id']}", json={"company": "Acme"}).json()
+
+        assert (updated["company"], updated["lifetime_value"]) == ("Acme", 500)
+
+    def test_repeated_win_adds_deal_value_once(self, client):
+        contact = create_contact(client)
+        deal = client.post("/api/v1/crm/deals", json={
+            "title": "Order", "contact_id": contact["id"], "value": 500
+        }).json()
+
+        for _ in range(2):
+            response = client.put(f"/api/v1/crm/deals/{deal['id']}/stage", params={"stage": "closed_won"})
+            assert response.status_code == 200
+            assert response.json()["stage"] == "closed_won"
+
+        assert client.get(f"/api/v1/crm/contacts/{contact['id']}").json()["lifetime_value"] == 500
+        missing = client.put("/api/v1/crm/deals/missing/stage", params={"stage": "closed_won"})
+        assert missing.status_code == 404
+
+    def test_update_contact_is_validated(self, client):
+        contact = create_contact(client)
+
+        updated = client.put(f"/api/v1/crm/contacts/{contact['id']}", json={"contact_type": "customer"})
+        assert updated.json()["contact_type"] == "customer"
+        assert client.get("/api/v1/crm/contacts", params={"contact_type": "customer"}).json()[0]["id"] == contact["id"]
+
+        assert client.put(f"/api/v1/crm/contacts/{contact['id']}", json={"contact_type": "bogus"}).status_code == 422
+        assert client.get(f"/api/v1/crm/contacts/{contact['id']}").json()["contact_type"] == "customer"
+
+    def test_delete_contact(self, client):
+        contact = create_contact(client)
+
+        assert client.delete(f"/api/v1/crm/contacts/{contact['id']}").status_code == 204
+        assert client.delete(f"/api/v1/crm/contacts/{contact['id']}").status_code == 404
+        assert client.get("/health").json()["total_contacts"] == 0
@@ -0,0 +1,175 @@
+"""
+Tests for the storage backends
+"""
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Optional
+
+import pytest
+import pytest_asyncio
+from pydantic import BaseModel
+
+from app.config import Settings
+from app.storage import (
+    Collection,
+    MemoryStorage,
+    PostgresRepository,
+    PostgresStorage,
+    create_storage,
+)
+
+
+class Stage(str, Enum):
+    OPEN = "open"
+    WON = "won"
+
+
+class Item(BaseModel):
+    id: str
+    owner: str
+    stage: Stage
+    value: float = 0.0
+    note: Optional[str] = None
+    created_at: datetime
+
+
+ITEMS = Collection("items", Item, ("owner", "stage", "value"))
+
+
+def make_item(i: int, **fields) -> Item:
+    defaults = dict(id=str(i), owner="a", stage=Stage.OPEN, created_at=datetime(2024, 1, 1) + timedelta(minutes=i))
+    return Item(**{**defaults, **fields})
+
+
+class TestMemoryRepository:
+    """Test cases for the in-memory repository"""
+
+    @pytest_asyncio.fixture
+    async def repository(self):
+        repository = MemoryStorage().repository(ITEMS)
+        for i in range(5):
+            await repository.save(make_item(i, owner="a" if i % 2 else "b", value=float(i)))
+        return repository
+
+    @pytest.mark.asyncio
+    async def test_crud(self, repository):
+        assert (await repository.get("3")).value == 3
+        assert await repository.get("missing") is None
+
+        assert await repository.delete("3")
+        assert not await repository.delete("3")
+        assert await repository.count() == 4
+
+    @pytest.mark.asyncio
+    async def test_find_count_and_page(self, repository):
+        assert [i.id for i in await repository.find(owner="a")] == ["1", "3"]
+        assert await repository.count(owner="b") == 3
+        assert await repository.count(owner="b", value=2.0) == 1
+
+        items, before = await repository.page(2, owner="b")
+        assert [i.id for i in items] == ["4", "2"]
+        items, before = await repository.page(2, before=before, owner="b")
+        assert ([i.id for i in items], before) == (["0"], None)
+
+    @pytest.mark.asyncio
+    async def test_top_and_increment(self, repository):
+        updated = await repository.increment("0", "value", 10.0)
+
+        assert updated.value == 10.0
+        assert [i.id for i in await repository.top("value", 2)] == ["0", "4"]
+        assert await repository.increment("missing", "value", 1.0) is None
+
+    @pytest.mark.asyncio
+    async def test_set_fields_leaves_other_fields_alone(self, repository):
+        stale = (await repository.get("2")).model_copy()
+        await repository.increment("2", "value", 5.0)
+
+        updated = await repository.set_fields("2", stage=Stage.WON, note="called")
+
+        assert (updated.stage, updated.note, updated.value) == (Stage.WON, "called", 7.0)
+        assert stale.value == 2.0
+        assert [i.id for i in await repository.find(stage=Stage.WON)] == ["2"]
+        assert await repository.set_fields("missing", note="x") is None
+        with pytest.raises(ValueError, match="id"):
+            await repository.set_fields("2", id="9")
+        with pytest.raises(ValueError, match="bogus"):
+            await repository.set_fields("2", bogus=1)
+
+    @pytest.mark.asyncio
+    async def test_set_fields_unless_matches_only_once(self, repository):
+        assert (await repository.set_fields("2", unless={"stage": Stage.WON}, stage=Stage.WON)).stage == Stage.WON
+        assert await repository.set_fields("2", unless={"stage": Stage.WON}, stage=Stage.WON, note="x") is None
+        assert (await repository.get("2")).note is None
+        with pytest.raises(ValueError, match="note"):
+            await repository.set_fields("2", unless={"note": None}, stage=Stage.OPEN)
+
+    @pytest.mark.asyncio
+    async def test_rejects_fields_other_backends_cannot_filter_on(self, repository):
+        with pytest.raises(ValueError, match="note"):
+            await repository.find(note="x")
+        with pytest.raises(ValueError):
+            await repository.top("note", 1)
+
+
+class TestPostgresRepository:
+    """SQL built by the PostgreSQL repository (no database needed)"""
+
+    @pytest.fixture
+    def repository(self) -> PostgresRepository:
+        return PostgresStorage("localhost", 5432, "user", "", "db").repository(ITEMS)
+
+    def test_where_with_filters_and_cursor(self, repository):
+        created = datetime(2024, 1, 1)
+
+        where, args = repository._where({"owner": "a", "stage": Stage.WON, "value": None}, (created, "7"))
+
+        assert where == " WHERE owner = $1 AND stage = $2 AND (created_at, id) < ($3::timestamp, $4::text)"
+        assert args == ["a", "won", created, "7"]
+        assert repository._where({}) == ("", [])
+
+    def test_where_rejects_unknown_columns(self, repository):
+        with pytest.raises(ValueError):
+            repository._where({"note; DROP TABLE items": "x"})
+
+    def test_upsert_writes_columns_and_document(self, repository):
+        assert repository._upsert_sql == (
+            "INSERT INTO items (id, created_at, owner, stage, value, data) VALUES ($1, $2, $3, $4, $5, $6::jsonb) "
+            "ON CONFLICT (id) DO UPDATE SET created_at = EXCLUDED.created_at, owner = EXCLUDED.owner, "
+            "stage = EXCLUDED.stage, value = EXCLUDED.value, data = EXCLUDED.data"
+        )
+
+    def test_set_fields_updates_columns_and_merges_document(self, repository):
+        assert repository._set_fields_sql(["note", "stage"]) == (
+            "UPDATE items SET stage = $2, data = data || $3::jsonb WHERE id = $1 RETURNING data",
+            ["stage"]
+        )
+        assert repository._set_fields_sql(["note"]) == (
+            "UPDATE items SET data = data || $2::jsonb WHERE id = $1 RETURNING data", []
+        )
+
+    def test_set_fields_unless_adds_conditions(self, repository):
+        assert repository._set_fields_sql(["stage", "note"], ["stage"]) == (
+            "UPDATE items SET stage = $2, data = data || $3::jsonb "
+            "WHERE id = $1 AND stage IS DISTINCT FROM $4 RETURNING data",
+            ["stage"]
+        )
+        with pytest.raises(ValueError):
+            repository._set_fields_sql(["stage"], ["note"])
+
+    @pytest.mark.asyncio
+    async def test_requires_start(self, repository):
+        with pytest.raises(RuntimeError):
+            await repository.get("1")
+
+
+class TestCreateStorage:
+    """Test cases for backend selection"""
+
+    def test_backends(self):
+        assert isinstance(create_storage(Settings(STORAGE_BACKEND="memory")), MemoryStorage)
+        postgres = create_storage(Settings(STORAGE_BACKEND="postgres", POSTGRES_POOL_MAX_SIZE=4))
+        assert isinstance(postgres, PostgresStorage)
+        assert postgres._connect["max_size"] == 4
+
+        with pytest.raises(ValueError):
+            create_storage(Settings(STORAGE_BACKEND="sqlite"))
@@ -0,0 +1,137 @@
+"""
+Tests for the indexed in-memory store
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import count
+from typing import Optional
+
+import pytest
+
+from app.store import Table, decode_cursor, encode_cursor
+
+
+_clock = count()
+
+
+@dataclass
+class Record:
+    id: str
+    owner: str
+    stage: str
+    note: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime(2024, 1, 1) + timedelta(seconds=next(_clock)))
+
+
+def make_table(*records):
+    table = Table(["owner", "stage"])
+    for record in records:
+        table[record.id] = record
+    return table
+
+
+class TestTable:
+    """Test cases for Table"""
+
+    def test_find_by_index(self):
+        table = make_table(Record("1", "a", "open"), Record("2", "b", "open"), Record("3", "a", "won"))
+
+        assert [r.id for r in table.find(owner="a")] == ["1", "3"]
+        assert [r.id for r in table.find(stage="open")] == ["1", "2"]
+        assert table.find(owner="missing") == []
+
+    def test_find_combines_filters_and_ignores_none(self):
+        table = make_table(Record("1", "a", "open", "x"), Record("2", "a", "open"), Record("3", "a", "won", "x"))
+
+        assert [r.id for r in table.find(owner="a", stage="open", note="x")] == ["1"]
+        assert [r.id for r in table.find(owner="a", stage=None)] == ["1", "2", "3"]
+        # Unindexed filters alone fall back to a scan
+        assert [r.id for r in table.find(note="x")] == ["1", "3"]
+
+    def test_write_back_reindexes_mutated_record(self):
+        table = make_table(Record("1", "a", "open"))
+
+        record = table["1"]
+        record.stage = "won"
+        table["1"] = record
+
+        assert table.find(stage="open") == []
+        assert table.find(stage="won") == [record]
+        assert table.count("stage", "won") == 1
+
+    def test_delete_removes_from_indexes(self):
+        table = make_table(Record("1", "a", "open"), Record("2", "a", "won"))
+
+        del table["1"]
+
+        assert "1" not in table
+        assert len(table) == 1
+        assert [r.id for r in table.find(owner="a")] == ["2"]
+        assert table.count("stage", "open") == 0
+        with pytest.raises(KeyError):
+            del table["1"]
+
+    def test_find_orders_by_created_at(self):
+        created = datetime(2024, 1, 1)
+        table = make_table(
+            Record("a", "a", "open", created_at=created),
+            Record("b", "a", "open", created_at=created - timedelta(days=1))
+        )
+
+        assert [r.id for r in table.find()] == ["b", "a"]
+        assert [r.id for r in table.find(owner="a")] == ["b", "a"]
+
+    def test_clear(self):
+        table = make_table(Record("1", "a", "open"))
+
+        table.clear()
+
+        assert len(table) == 0
+        assert table.find(owner="a") == []
+
+
+class TestPage:
+    """Test cases for Table.page"""
+
+    def walk(self, table, limit, **filters):
+        pages, before = [], None
+        while True:
+            items, before = table.page(limit, before=before, **filters)
+            pages.append([r.id for r in items])
+            if before is None:
+                return pages
+
+    def test_pages_newest_first_without_gaps(self):
+        table = make_table(*(Record(str(i), "a" if i % 2 else "b", "open") for i in range(7)))
+
+        assert self.walk(table, 3) == [["6", "5", "4"], ["3", "2", "1"], ["0"]]
+        assert self.walk(table, 2, owner="a") == [["5", "3"], ["1"]]
+        # An exactly full last page has no next cursor
+        assert self.walk(table, 4, owner="b") == [["6", "4", "2", "0"]]
+
+    def test_cursor_survives_deleting_its_record(self):
+        table = make_table(*(Record(str(i), "a", "open") for i in range(5)))
+
+        items, before = table.page(2)
+        del table[items[-1].id]
+
+        assert [r.id for r in table.page(2, before=before)[0]] == ["2", "1"]
+
+    def test_ties_on_created_at_are_broken_by_id(self):
+        created = datetime(2024, 1, 1)
+        table = make_table(*(Record(i, "a", "open", created_at=created) for i in "cab"))
+
+        assert self.walk(table, 1) == [["c"], ["b"], ["a"]]
+
+    def test_offset_and_filters(self):
+        table = make_table(*(Record(str(i), "a", "open", note="x" if i < 3 else None) for i in range(6)))
+
+        assert [r.id for r in table.page(2, offset=1)[0]] == ["4", "3"]
+        assert [r.id for r in table.page(5, owner="a", note="x")[0]] == ["2", "1", "0"]
+
+    def test_cursor_round_trip(self):
+        key = (datetime(2024, 5, 1, 12, 30, 15, 123), "abc")
+
+        assert decode_cursor(encode_cursor(key)) == key
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
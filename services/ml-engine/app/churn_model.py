@@ -0,0 +1,222 @@
+"""
+Churn model training, persistence and loading
+
+The trained model is a GradientBoostingClassifier over the same RFM-style
+features the rule-based scorer uses. Artifacts are versioned files in a model
+directory: ``churn_model-<version>.joblib`` plus a ``.json`` metadata sidecar
+with the feature list, training metrics and library versions.
+"""
+import json
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# sklearn and joblib are only needed to train or load an artifact; importing
+# them lazily keeps them off the service's startup path
+if TYPE_CHECKING:
+    from sklearn.ensemble import GradientBoostingClassifier
+
+logger = logging.getLogger(__name__)
+
+# Input column -> default used when a customer omits it
+FEATURE_DEFAULTS = {
+    'days_since_last_purchase': 30,
+    'purchase_count': 0,
+    'total_spent': 0,
+    'engagement_score': 50,
+    'customer_age_days': 365,
+}
+
+# Model input order; the last two are derived in extract_features
+FEATURE_COLUMNS = list(FEATURE_DEFAULTS) + ['avg_order_value', 'monthly_frequency']
+
+LABEL_COLUMN = 'churned'
+ARTIFACT_PREFIX = 'churn_model-'
+
+GBM_PARAMS = {
+    'n_estimators': 150,
+    'max_depth': 3,
+    'learning_rate': 0.1,
+    'subsample': 0.8,
+    'random_state': 42,
+}
+
+
+def extract_features(frame: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Numeric feature columns for a customer frame, defaults filled in"""
+    n = len(frame)
+    features = {}
+    for name, default in FEATURE_DEFAULTS.items():
+        if name not in frame:
+            features[name] = np.full(n, default, dtype=np.float64)
+            continue
+        values = pd.to_numeric(frame[name], errors='coerce').to_numpy(dtype=np.float64)
+        features[name] = np.where(np.isnan(values), default, values)
+
+    frequency = features['purchase_count']
+    features['avg_order_value'] = np.divide(
+        features['total_spent'], frequency, out=np.zeros(n), where=frequency > 0
+    )
+    features['monthly_frequency'] = frequency / np.maximum(features['customer_age_days'] / 30, 1)
+    return features
+
+
+def feature_matrix(features: Dict[str, np.ndarray]) -> np.ndarray:
+    return np.column_stack([features[name] for name in FEATURE_COLUMNS])
+
+
+class ChurnModelArtifact:
+    """A loaded churn model plus its metadata"""
+
+    def __init__(self, version: str, model: Any, metadata: Dict[str, Any]):
+        self.version = version
+        self.model = model
+        self.metadata = metadata
+
+    def predict_proba(self, features: Dict[str, np.ndarray], batch_size: int = 50000) -> np.ndarray:
+        """Churn probability per row, scored in batches to bound memory"""
+        X = feature_matrix(features)
+        if len(X) == 0:
+            return np.zeros(0)
+        return np.concatenate([
+            self.model.predict_proba(X[start:start + batch_size])[:, 1]
+            for start in range(0, len(X), batch_size)
+        ])
+
+
+def train_churn_model(history: pd.DataFrame) -> Tuple["GradientBoostingClassifier", Dict[str, Any]]:
+    """Fit the churn model on labelled CRM history
+
+    ``history`` has the FEATURE_DEFAULTS columns and a 0/1 ``churned`` label.
+    Metrics are measured on a stratified 20% holdout; the returned model is
+    refit on all rows.
+    """
+    from sklearn.ensemble import GradientBoostingClassifier
+    from sklearn.metrics import roc_auc_score
+    from sklearn.model_selection import train_test_split
+
+    if LABEL_COLUMN not in history:
+        raise ValueError(f"Training data needs a '{LABEL_COLUMN}' label column")
+
+    X = feature_matrix(extract_features(history))
+    y = pd.to_numeric(history[LABEL_COLUMN], errors='raise').to_numpy(dtype=int)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, stratify=y, random_state=GBM_PARAMS['random_state']
+    )
+    holdout_model = GradientBoostingClassifier(**GBM_PARAMS).fit(X_train, y_train)
+    holdout_proba = holdout_model.predict_proba(X_test)[:, 1]
+
+    metrics = {
+        'rows': int(len(y)),
+        'churn_rate': round(float(y.mean()), 4),
+        'holdout_auc': round(float(roc_auc_score(y_test, holdout_proba)), 4),
+        'holdout_accuracy': round(float(((holdout_proba > 0.5) == y_test).mean()), 4),
+    }
+
+    model = GradientBoostingClassifier(**GBM_PARAMS).fit(X, y)
+    return model, metrics
+
+
+def synthetic_history(n: int, seed: int = 0) -> pd.DataFrame:
+    """Labelled customers (churn loosely driven by recency and engagement) for tests and benchmarks"""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'customer_id': [f"c{i}" for i in range(n)],
+        'days_since_last_purchase': rng.integers(0, 180, n),
+        'purchase_count': rng.poisson(4, n),
+        'total_spent': rng.gamma(2.0, 150.0, n).round(2),
+        'engagement_score': rng.integers(0, 100, n),
+        'customer_age_days': rng.integers(30, 1500, n),
+    })
+    logit = (
+        0.025 * (frame['days_since_last_purchase'] - 60)
+        - 0.04 * (frame['engagement_score'] - 50)
+        - 0.3 * (frame['purchase_count'] - 4)
+    )
+    frame['churned'] = (rng.random(n) < 1 / (1 + np.exp(-logit))).astype(int)
+    return frame
+
+
+def save_artifact(
+    model: "GradientBoostingClassifier",
+    metrics: Dict[str, Any],
+    model_dir: str,
+    version: Optional[str] = None
+) -> Path:
+    """Write a versioned model artifact and its metadata; returns the model path"""
+    import joblib
+    import sklearn
+
+    version = version or datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    directory = Path(model_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    model_path = directory / f"{ARTIFACT_PREFIX}{version}.joblib"
+    metadata = {
+        'version': version,
+        'features': FEATURE_COLUMNS,
+        'params': GBM_PARAMS,
+        'metrics': metrics,
+        'sklearn_version': sklearn.__version__,
+        'trained_at': datetime.now(timezone.utc).isoformat(),
+    }
+
+    joblib.dump(model, model_path)
+    model_path.with_suffix('.json').write_text(json.dumps(metadata, indent=2))
+    logger.info(f"Churn model {version} saved to {model_path}")
+    return model_path
+
+
+def _read_metadata(model_path: Path) -> Dict[str, Any]:
+    metadata_path = model_path.with_suffix('.json')
+    return json.loads(metadata_path.read_text()) if metadata_path.exists() else {}
+
+
+def require_artifact(model_dir: str, version: str) -> Path:
+    """Path of a pinned version; raises if it is missing or was trained on other features
+
+    Called at startup, so a deployment pinned to a version it doesn't ship
+    fails instead of quietly scoring with rules.
+    """
+    model_path = Path(model_dir) / f"{ARTIFACT_PREFIX}{version}.joblib"
+    if not model_path.exists():
+        raise FileNotFoundError(f"Pinned churn model {version} not found at {model_path}")
+    if _read_metadata(model_path).get('features', FEATURE_COLUMNS) != FEATURE_COLUMNS:
+        raise ValueError(f"Pinned churn model {version} was trained on a different feature set")
+    return model_path
+
+
+def load_artifact(model_dir: str, version: Optional[str] = None) -> Optional[ChurnModelArtifact]:
+    """Load a specific version, or the newest one, from ``model_dir``
+
+    Returns None when no artifact exists so callers can fall back to rules;
+    a pinned version that can't be used raises (see require_artifact).
+    """
+    directory = Path(model_dir)
+    if version:
+        candidates = [require_artifact(model_dir, version)]
+    else:
+        # Versions are UTC timestamps, so lexical order is chronological
+        candidates = sorted(directory.glob(f"{ARTIFACT_PREFIX}*.joblib"), reverse=True)
+
+    for model_path in candidates:
+        metadata = _read_metadata(model_path)
+        if metadata.get('features', FEATURE_COLUMNS) != FEATURE_COLUMNS:
+            logger.warning(f"Skipping {model_path.name}: trained on a different feature set")
+            continue
+
+        import joblib
+
+        # mmap_mode lets worker processes share the artifact's numpy buffers
+        model = joblib.load(model_path, mmap_mode='r')
+        version = model_path.stem[len(ARTIFACT_PREFIX):]
+        logger.info(f"Loaded churn model {version}")
+        return ChurnModelArtifact(version, model, metadata)
+
+    logger.info(f"No churn model found in {model_dir}, using rule-based scoring")
+    return None
@@ -0,0 +1,181 @@
+"""
+Binary request bodies
+
+Large series and catalogs can be posted as Apache Arrow IPC streams or NumPy
+.npz archives instead of JSON, negotiated by Content-Type. Both carry:
+
+* columns named after request fields; a dotted name nests into an object
+  field, so "historical_data.dates" + "historical_data.values" is a series.
+  Ragged (list-of-lists) fields are an Arrow list column, or in .npz a
+  "<field>.values" + "<field>.offsets" pair.
+* the remaining scalar fields as JSON: Arrow schema metadata key "request",
+  or a string array named "request" in the .npz.
+
+Series columns are handed to the Series type as arrays, so they are decoded
+without materializing per-point Python objects.
+"""
+import io
+import json
+from typing import Any, Callable, Dict, Optional, Type
+
+import numpy as np
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+from app.core.timeseries import Series
+
+JSON = "application/json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+NPZ = "application/x-npz"
+
+REQUEST_METADATA_KEY = "request"
+
+
+def _nest(columns: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold dotted column names into nested dicts; offsets pairs become ragged lists"""
+    fields: Dict[str, Any] = {}
+    for name, values in columns.items():
+        head, _, tail = name.partition(".")
+        if tail:
+            fields.setdefault(head, {})[tail] = values
+        else:
+            fields[name] = values
+
+    for name, value in fields.items():
+        if isinstance(value, dict) and set(value) == {"values", "offsets"}:
+            offsets = np.asarray(value["offsets"], dtype=np.int64)
+            flat = np.asarray(value["values"], dtype=np.float64)
+            fields[name] = [flat[start:end].tolist() for start, end in zip(offsets[:-1], offsets[1:])]
+    return fields
+
+
+def decode_arrow(body: bytes) -> Dict[str, Any]:
+    import pyarrow as pa
+
+    table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    metadata = table.schema.metadata or {}
+    fields = json.loads(metadata.get(REQUEST_METADATA_KEY.encode(), b"{}"))
+
+    columns = {}
+    for name in table.column_names:
+        column = table.column(name)
+        kind = column.type
+        if column.null_count or pa.types.is_list(kind) or pa.types.is_large_list(kind) \
+                or pa.types.is_string(kind) or pa.types.is_large_string(kind):
+            columns[name] = column.to_pylist()
+        else:
+            # Single-chunk numeric/timestamp columns come out without a copy
+            columns[name] = column.to_numpy()
+    fields.update(_nest(columns))
+    return fields
+
+
+def decode_npz(body: bytes) -> Dict[str, Any]:
+    with np.load(io.BytesIO(body), allow_pickle=False) as archive:
+        columns = {name: archive[name] for name in archive.files}
+    request = columns.pop(REQUEST_METADATA_KEY, None)
+    fields = json.loads(str(request)) if request is not None else {}
+    for name, values in columns.items():
+        if values.dtype.kind == "U":
+            columns[name] = values.tolist()
+    fields.update(_nest(columns))
+    return fields
+
+
+DECODERS: Dict[str, Callable[[bytes], Dict[str, Any]]] = {
+    ARROW_STREAM: decode_arrow,
+    NPZ: decode_npz,
+}
+
+
+def _for_model(model: Type[BaseModel], fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn array columns into lists except where the field takes a Series"""
+    prepared = {}
+    for name, value in fields.items():
+        field = model.model_fields.get(name)
+        if isinstance(value, np.ndarray) and not (field is not None and field.annotation is Series):
+            value = value.tolist()
+        prepared[name] = value
+    return prepared
+
+
+def _validation_error(error: ValidationError) -> RequestValidationError:
+    # Same shape as FastAPI's own body errors; inputs may hold arrays, so drop them
+    return RequestValidationError([
+        {**detail, "loc": ("body", *detail["loc"])}
+        for detail in error.errors(include_url=False, include_input=False)
+    ])
+
+
+def negotiated_body(model: Type[BaseModel]) -> Callable[[Request], Any]:
+    """FastAPI dependency parsing ``model`` from a JSON, Arrow IPC or .npz body"""
+
+    async def parse(request: Request) -> BaseModel:
+        content_type = request.headers.get("content-type", JSON).split(";")[0].strip().lower()
+        body = await request.body()
+
+        try:
+            if content_type == JSON:
+                return model.model_validate_json(body)
+            decoder = DECODERS.get(content_type)
+            if decoder is None:
+                raise HTTPException(
+                    status_code=415,
+                    detail=f"Unsupported Content-Type {content_type}; use one of {[JSON, *DECODERS]}"
+                )
+            fields = decoder(body)
+        except ValidationError as e:
+            raise _validation_error(e)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Could not decode {content_type} body: {str(e)}")
+
+        try:
+            return model.model_validate(_for_model(model, fields))
+        except ValidationError as e:
+            raise _validation_error(e)
+
+    return parse
+
+
+def negotiated_openapi(model: Type[BaseModel]) -> Dict[str, Any]:
+    """``openapi_extra`` documenting a negotiated_body endpoint's request body"""
+    binary = {"schema": {"type": "string", "format": "binary"}}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                JSON: {"schema": {"$ref": f"#/components/schemas/{model.__name__}"}},
+                ARROW_STREAM: binary,
+                NPZ: binary,
+            },
+        }
+    }
+
+
+def encode_arrow(fields: Dict[str, Any], columns: Dict[str, Any]) -> bytes:
+    """Client-side helper: build an Arrow IPC stream body"""
+    import pyarrow as pa
+
+    table = pa.table(columns).replace_schema_metadata({REQUEST_METADATA_KEY: json.dumps(fields)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_npz(fields: Dict[str, Any], columns: Dict[str, Any], ragged: Optional[Dict[str, Any]] = None) -> bytes:
+    """Client-side helper: build a .npz body; ``ragged`` maps field -> list of lists"""
+    arrays = {name: np.asarray(values) for name, values in columns.items()}
+    for name, rows in (ragged or {}).items():
+        lengths = np.fromiter((len(row) for row in rows), dtype=np.int64, count=len(rows))
+        arrays[f"{name}.offsets"] = np.concatenate(([0], np.cumsum(lengths)))
+        arrays[f"{name}.values"] = np.fromiter(
+            (v for row in rows for v in row), dtype=np.float64, count=int(lengths.sum())
+        )
+    arrays[REQUEST_METADATA_KEY] = np.array(json.dumps(fields))
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
@@ -0,0 +1,127 @@
+"""
+ML Engine Configuration
+"""
+import os
+from typing import List, Optional
+
+from pydantic import model_validator
+from pydantic_settings import BaseSettings
+
+# Each fit process holds Prophet and sklearn, so the default stays small even
+# on machines with many cores
+MAX_DEFAULT_FIT_POOL_WORKERS = 2
+
+
+class Settings(BaseSettings):
+    """Application settings"""
+
+    # API Configuration
+    APP_NAME: str = "ML Engine - Pueblo Mente IA"
+    APP_VERSION: str = "2.0.0"
+
+    # uvicorn worker processes (uvicorn reads the same variable when --workers
+    # isn't given). Every worker starts its own process pools, so the fit and
+    # simulation pool defaults split cpu_count between the workers.
+    WEB_CONCURRENCY: int = 1
+
+    # Redis for state every worker must see (job status, uploaded demand
+    # history). Unset keeps that state in process, which is only correct
+    # with a single worker.
+    REDIS_HOST: Optional[str] = None
+    REDIS_PORT: int = 6379
+    REDIS_DB: int = 0
+    REDIS_PASSWORD: Optional[str] = None
+
+    # Model fitting pool
+    # Prophet and sales forest fits run in a dedicated process pool so they
+    # never block the event loop. By default each uvicorn worker gets
+    # cpu_count // WEB_CONCURRENCY processes, at least 1 and at most 2. Set
+    # FIT_POOL_WORKERS=0 to fit inline (single-process dev).
+    FIT_POOL_WORKERS: Optional[int] = None
+    FIT_POOL_MAX_QUEUE: int = 8  # fits allowed to wait for a free worker
+    FIT_POOL_RETRY_AFTER: int = 5  # seconds, sent with 429 when saturated
+
+    # Fitted model cache (keyed by series fingerprint + hyperparameters)
+    MODEL_CACHE_MAX_ENTRIES: int = 256
+    MODEL_CACHE_TTL: int = 21600  # 6 hours
+    MODEL_CACHE_MAX_MB: int = 128
+
+    # Warm-start parameters per business_id (small; kept for a month+ so the
+    # next monthly refresh can start from the previous fit). Cached per
+    # process and, with REDIS_HOST set, shared with the other workers
+    WARM_START_MAX_ENTRIES: int = 20000
+    WARM_START_TTL: int = 3888000  # 45 days
+    WARM_START_MAX_MB: int = 64
+
+    # Streaming churn endpoint: rows scored per chunk, and how much of the
+    # upload is kept in memory before spilling to a temp file
+    CHURN_STREAM_CHUNK_SIZE: int = 5000
+    CHURN_STREAM_SPOOL_BYTES: int = 8 * 1024 * 1024
+
+    # Trained churn model. Artifacts are written by `python -m app.train_churn`;
+    # the newest one in CHURN_MODEL_DIR is loaded unless a version is pinned.
+    # With no artifact the churn endpoints use the rule-based score; a pinned
+    # version that is missing stops the service at startup.
+    CHURN_MODEL_DIR: str = "models/churn"
+    CHURN_MODEL_VERSION: Optional[str] = None
+    CHURN_INFERENCE_BATCH: int = 50000  # rows per predict_proba call
+
+    # Pricing elasticity store (in Redis when REDIS_HOST is set): demand
+    # history kept per product, how many products are kept (least recently
+    # updated are evicted) and how often the background task re-estimates
+    # elasticity for updated products
+    ELASTICITY_MAX_HISTORY: int = 365
+    ELASTICITY_MAX_PRODUCTS: int = 100000
+    ELASTICITY_REFRESH_INTERVAL: float = 60.0  # seconds
+
+    # Monte Carlo inventory simulation: its own process pool fed with chunks
+    # of SIMULATION_CHUNK_SIZE SKUs. By default the cores are split between
+    # the uvicorn workers (cpu_count // WEB_CONCURRENCY, at least 1).
+    SIMULATION_POOL_WORKERS: Optional[int] = None
+    SIMULATION_POOL_MAX_QUEUE: int = 64
+    SIMULATION_CHUNK_SIZE: int = 500
+
+    # Sales forecasting: forests train on the fit pool above (429 when it is
+    # full) and are cached per business and series. The pool already runs
+    # fits in parallel, so each forest uses SALES_MODEL_N_JOBS cores.
+    SALES_MODEL_N_JOBS: int = 1
+    SALES_MODEL_CACHE_MAX_ENTRIES: int = 256
+    SALES_MODEL_CACHE_MAX_MB: int = 256
+
+    # Market trend / risk scoring: reference table (None = the packaged
+    # app/data/market_reference.json) and the cache of scored responses
+    MARKET_REFERENCE_PATH: Optional[str] = None
+    MARKET_CACHE_MAX_ENTRIES: int = 10000
+    MARKET_CACHE_TTL: int = 86400  # 1 day
+    MARKET_CACHE_MAX_MB: int = 16
+
+    # Background warm-up after startup (imports Prophet/sklearn and fits tiny
+    # models in the API process and fit pool workers); /ready is 503 until done
+    WARMUP_ENABLED: bool = True
+
+    # Asynchronous jobs: worker tasks draining the job queue, how many jobs
+    # may wait, and how long finished results are kept for polling
+    JOB_WORKERS: int = 4
+    JOB_QUEUE_MAX: int = 256
+    JOB_RESULT_TTL: int = 3600  # seconds
+    JOB_PENDING_TTL: int = 86400  # seconds a queued or running job's status is kept
+    JOB_WEBHOOK_TIMEOUT: float = 10.0  # seconds
+    # Webhooks must be https to a public address; when this is non-empty
+    # (JSON list, e.g. '["hooks.example.com"]') the host must also be listed
+    JOB_WEBHOOK_ALLOWED_HOSTS: List[str] = []
+
+    @model_validator(mode="after")
+    def split_cores_between_workers(self) -> "Settings":
+        cores = max((os.cpu_count() or 1) // max(self.WEB_CONCURRENCY, 1), 1)
+        if self.FIT_POOL_WORKERS is None:
+            self.FIT_POOL_WORKERS = min(cores, MAX_DEFAULT_FIT_POOL_WORKERS)
+        if self.SIMULATION_POOL_WORKERS is None:
+            self.SIMULATION_POOL_WORKERS = cores
+        return self
+
+    class Config:
+        env_file = ".env"
+        case_sensitive = True
+
+
+settings = Settings()
@@ -0,0 +1,96 @@
+"""
+Process pool for CPU-bound model fits
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class FitPoolSaturated(Exception):
+    """Raised when every worker is busy and the wait queue is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Fit pool saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class FitPool:
+    """Bounded process pool that runs model fits off the event loop
+
+    At most ``workers + max_queue`` fits are accepted at once; anything beyond
+    that is rejected immediately with :class:`FitPoolSaturated` so callers can
+    answer 429 instead of piling up requests behind a multi-second fit.
+    With ``workers=0`` fits run one at a time on a background thread.
+    """
+
+    def __init__(self, workers: int, max_queue: int, retry_after: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return max(self.workers, 1) + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.workers > 0:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                logger.info(f"Fit pool started with {self.workers} workers")
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fit")
+        return self._executor
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                raise FitPoolSaturated(self.retry_after)
+            self._in_flight += 1
+
+    def _release(self, _future: Any = None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` on the pool; ``fn`` and its arguments must be picklable"""
+        self._acquire()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+
+        # Release the slot when the worker finishes, not when the caller
+        # stops waiting, so abandoned requests still count until done.
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            logger.error("Fit pool worker died, restarting pool")
+            self._reset()
+            raise
+
+    def _reset(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "in_flight": self._in_flight,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
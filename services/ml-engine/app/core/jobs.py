@@ -0,0 +1,345 @@
+"""
+Asynchronous jobs for long-running computations
+
+Submitting a job returns its id immediately; a fixed set of worker tasks
+drains a bounded queue and runs each job's coroutine (which hands CPU work to
+the existing process pools or threads). Finished jobs keep their result for
+``result_ttl`` seconds, are optionally POSTed to a webhook, and queue depth,
+wait time and run time are exported as Prometheus metrics.
+
+A job runs in the worker process that accepted it, but its status and result
+are written to a ``JobStore``. With ``RedisJobStore`` every uvicorn worker
+(and replica) can answer a poll for any job; ``MemoryJobStore`` only works
+with a single worker.
+
+Webhook URLs come from clients, so they must be https, resolve only to public
+addresses and, when an allowlist is configured, name an allowed host. They are
+checked on submission and again before each delivery (DNS may have changed),
+and redirects are not followed.
+"""
+import asyncio
+import ipaddress
+import json
+import logging
+import socket
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.shared import KEY_PREFIX
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE_DEPTH = Gauge("ml_jobs_queue_depth", "Jobs waiting for a worker")
+JOB_RUNNING = Gauge("ml_jobs_running", "Jobs currently running")
+JOB_WAIT_SECONDS = Histogram(
+    "ml_job_wait_seconds", "Time from submission to start", ["kind"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 15, 60, 300, 900)
+)
+JOB_RUN_SECONDS = Histogram(
+    "ml_job_run_seconds", "Job run time", ["kind"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 15, 60, 300, 900)
+)
+JOBS_FINISHED = Counter("ml_jobs_finished_total", "Finished jobs", ["kind", "status"])
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+WEBHOOK_ATTEMPTS = 3
+
+
+class JobQueueFull(Exception):
+    """Raised when the job queue is at capacity"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class WebhookRejected(ValueError):
+    """Raised for webhook URLs the service won't call"""
+
+
+async def resolve_host(host: str, port: int) -> List[str]:
+    """Every address ``host`` resolves to"""
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return [info[4][0] for info in infos]
+
+
+async def check_webhook_url(url: str, allowed_hosts: Iterable[str] = ()) -> None:
+    """Raise WebhookRejected unless ``url`` is an https URL to an allowed, public host"""
+    try:
+        parsed = httpx.URL(url)
+    except httpx.InvalidURL as e:
+        raise WebhookRejected(f"Invalid webhook URL: {str(e)}")
+    if parsed.scheme != "https":
+        raise WebhookRejected("Webhook URL must use https")
+    host = parsed.host.lower()
+    allowed = {h.lower() for h in allowed_hosts}
+    if allowed and host not in allowed:
+        raise WebhookRejected(f"Webhook host {host} is not allowed")
+
+    try:
+        addresses = await resolve_host(host, parsed.port or 443)
+    except OSError:
+        raise WebhookRejected(f"Webhook host {host} does not resolve")
+    # Private, loopback, link-local, reserved, ... all count as not global
+    if not addresses or not all(ipaddress.ip_address(a.split("%")[0]).is_global for a in addresses):
+        raise WebhookRejected(f"Webhook host {host} resolves to a non-public address")
+
+
+class Job:
+    __slots__ = (
+        "id", "kind", "status", "created_at", "started_at", "finished_at",
+        "result", "error", "webhook_url", "expires_at", "run",
+    )
+
+    def __init__(self, kind: str, run: Callable[[], Awaitable[Any]], webhook_url: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.webhook_url = webhook_url
+        self.expires_at: Optional[float] = None
+        self.run: Optional[Callable[[], Awaitable[Any]]] = run
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobStore(ABC):
+    """Job status records (``Job.to_dict()``) by job id, each kept for a TTL"""
+
+    name = ""
+
+    @abstractmethod
+    async def put(self, record: Dict[str, Any], ttl: float) -> None:
+        pass
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def delete(self, job_id: str) -> None:
+        pass
+
+
+class MemoryJobStore(JobStore):
+    """Records in this process only"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._records: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _purge(self) -> None:
+        now = time.time()
+        expired = [job_id for job_id, (expires_at, _) in self._records.items() if expires_at <= now]
+        for job_id in expired:
+            del self._records[job_id]
+
+    async def put(self, record: Dict[str, Any], ttl: float) -> None:
+        self._purge()
+        self._records[record["job_id"]] = (time.time() + ttl, record)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        self._purge()
+        entry = self._records.get(job_id)
+        return entry[1] if entry is not None else None
+
+    async def delete(self, job_id: str) -> None:
+        self._records.pop(job_id, None)
+
+
+class RedisJobStore(JobStore):
+    """Records as JSON strings under ``<prefix>:<job id>``, expired by Redis"""
+
+    name = "redis"
+
+    def __init__(self, redis: "Redis", prefix: str = f"{KEY_PREFIX}:job"):
+        self.redis = redis
+        self.prefix = prefix
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.prefix}:{job_id}"
+
+    async def put(self, record: Dict[str, Any], ttl: float) -> None:
+        await self.redis.set(self._key(record["job_id"]), json.dumps(record), px=max(int(ttl * 1000), 1))
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.redis.get(self._key(job_id))
+        return json.loads(raw) if raw is not None else None
+
+    async def delete(self, job_id: str) -> None:
+        await self.redis.delete(self._key(job_id))
+
+
+class JobManager:
+    """Bounded job queue with worker tasks and TTL'd results
+
+    ``start()`` must be called from the running event loop (the app lifespan)
+    before jobs are processed; ``submit`` only enqueues. Queued and running
+    jobs are kept in the store for ``pending_ttl`` seconds, finished ones for
+    ``result_ttl``.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_queue: int,
+        result_ttl: float,
+        retry_after: int = 5,
+        webhook_timeout: float = 10.0,
+        webhook_allowed_hosts: Iterable[str] = (),
+        store: Optional[JobStore] = None,
+        pending_ttl: float = 86400.0
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self.retry_after = retry_after
+        self.webhook_timeout = webhook_timeout
+        self.webhook_allowed_hosts = tuple(webhook_allowed_hosts)
+        self.store = store if store is not None else MemoryJobStore()
+        self.pending_ttl = pending_ttl
+        self._running = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, kind: str, run: Callable[[], Awaitable[Any]], webhook_url: Optional[str] = None) -> Job:
+        """Queue ``run()``; its (JSON-serializable) return value becomes the result"""
+        if self._queue is None:
+            raise RuntimeError("JobManager.start() has not been called")
+        if self._queue.full():
+            raise JobQueueFull(self.retry_after)
+
+        job = Job(kind, run, webhook_url)
+        # Stored before it is queued, so a worker's "running" update can't be overwritten
+        await self.store.put(job.to_dict(), self.pending_ttl)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            await self.store.delete(job.id)
+            raise JobQueueFull(self.retry_after)
+        JOB_QUEUE_DEPTH.inc()
+        return job
+
+    async def check_webhook(self, url: str) -> None:
+        """Raise WebhookRejected unless jobs may report to ``url``"""
+        await check_webhook_url(url, self.webhook_allowed_hosts)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status record of a job submitted to any worker, or None once expired"""
+        return await self.store.get(job_id)
+
+    async def _save(self, job: Job) -> None:
+        ttl = job.expires_at - time.time() if job.expires_at is not None else self.pending_ttl
+        try:
+            await self.store.put(job.to_dict(), ttl)
+        except Exception as e:
+            # Keep the worker alive; pollers see the previous status
+            logger.error(f"Could not store status of job {job.id}: {str(e)}")
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            JOB_QUEUE_DEPTH.dec()
+            try:
+                await self._execute(job)
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, job: Job) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+        JOB_WAIT_SECONDS.labels(job.kind).observe(job.started_at - job.created_at)
+        JOB_RUNNING.inc()
+        self._running += 1
+        await self._save(job)
+        try:
+            job.result = await job.run()
+            job.status = SUCCEEDED
+        except asyncio.CancelledError:
+            job.status = FAILED
+            job.error = "Cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {str(e)}")
+            job.status = FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            job.expires_at = job.finished_at + self.result_ttl
+            job.run = None  # drop the request payload
+            JOB_RUNNING.dec()
+            self._running -= 1
+            JOB_RUN_SECONDS.labels(job.kind).observe(job.finished_at - job.started_at)
+            JOBS_FINISHED.labels(job.kind, job.status).inc()
+            await self._save(job)
+
+        if job.webhook_url:
+            await self._notify(job)
+
+    async def _notify(self, job: Job) -> None:
+        """POST the finished job to its webhook, retrying with backoff"""
+        try:
+            await self.check_webhook(job.webhook_url)
+        except WebhookRejected as e:
+            logger.error(f"Not calling webhook for job {job.id}: {str(e)}")
+            return
+        async with httpx.AsyncClient(timeout=self.webhook_timeout, follow_redirects=False) as client:
+            for attempt in range(WEBHOOK_ATTEMPTS):
+                try:
+                    response = await client.post(job.webhook_url, json=job.to_dict())
+                    if response.status_code < 500:
+                        return
+                except httpx.HTTPError as e:
+                    logger.warning(f"Webhook for job {job.id} failed: {str(e)}")
+                if attempt + 1 < WEBHOOK_ATTEMPTS:
+                    await asyncio.sleep(2 ** attempt)
+        logger.error(f"Giving up on webhook for job {job.id}")
+
+    def stats(self) -> Dict[str, Any]:
+        """This process's workers and queue; the store is shared"""
+        return {
+            "workers": self.workers,
+            "running": self._running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "store": self.store.name,
+        }
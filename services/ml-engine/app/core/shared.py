@@ -0,0 +1,32 @@
+"""
+State shared between worker processes
+
+The image runs several uvicorn workers (WEB_CONCURRENCY), and a request may
+land on any of them. State that a later request must find wherever it lands
+(job status, uploaded demand history, warm-start parameters) is kept in Redis when REDIS_HOST is
+set. Without it every process keeps its own copy, which is only correct with
+a single worker.
+"""
+from typing import TYPE_CHECKING, Optional
+
+# redis is only needed when REDIS_HOST is configured
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+# Every ml-engine key starts with this, so the Redis can be shared with other services
+KEY_PREFIX = "ml-engine"
+
+
+def create_redis(settings) -> Optional["Redis"]:
+    """Async Redis client for settings.REDIS_*, or None when REDIS_HOST is unset"""
+    if not settings.REDIS_HOST:
+        return None
+    from redis.asyncio import Redis
+
+    return Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=settings.REDIS_DB,
+        password=settings.REDIS_PASSWORD,
+        decode_responses=True
+    )
@@ -0,0 +1,61 @@
+"""
+Per-stage latency instrumentation
+
+The Instrumentator on /metrics only sees whole requests. ``stage()`` times one
+internal step of a model (data preparation, fit, predict, insights,
+serialization, ...) into the ``ml_stage_duration_seconds`` histogram,
+labelled by component, stage, engine and an input size bucket, so slow calls
+can be attributed to a step and compared across engines and input sizes.
+
+When OpenTelemetry is installed each stage is also recorded as a span on the
+current trace; without it (or without a configured SDK) spans are no-ops.
+"""
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Iterator
+
+from prometheus_client import Histogram
+
+try:
+    from opentelemetry import trace
+    _tracer = trace.get_tracer("ml-engine")
+except ImportError:  # tracing is optional
+    _tracer = None
+
+STAGE_SECONDS = Histogram(
+    "ml_stage_duration_seconds",
+    "Time spent in one internal stage of an ML component",
+    ["component", "stage", "engine", "size"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+
+# Upper bounds of the input size buckets (rows, points or SKUs)
+SIZE_BUCKETS = [(10, "<=10"), (100, "<=100"), (1_000, "<=1k"), (10_000, "<=10k"), (100_000, "<=100k")]
+
+
+def size_bucket(n: int) -> str:
+    """Coarse size label so per-stage latencies stay comparable without high cardinality"""
+    for bound, label in SIZE_BUCKETS:
+        if n <= bound:
+            return label
+    return ">100k"
+
+
+@contextmanager
+def stage(component: str, name: str, engine: str = "", size: int = 0) -> Iterator[None]:
+    """Time the enclosed block as stage ``name`` of ``component``
+
+    Works around ``await`` too; the time includes waiting on pools or threads.
+    """
+    bucket = size_bucket(size)
+    with ExitStack() as spans:
+        if _tracer is not None:
+            spans.enter_context(_tracer.start_as_current_span(
+                f"{component}.{name}",
+                attributes={"ml.engine": engine, "ml.size": size, "ml.size_bucket": bucket}
+            ))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            STAGE_SECONDS.labels(component, name, engine, bucket).observe(time.perf_counter() - start)
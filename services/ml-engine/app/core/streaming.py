@@ -0,0 +1,45 @@
+"""
+Helpers for line-oriented streaming request and response bodies
+"""
+import json
+import tempfile
+from typing import IO, Any, AsyncIterator, Iterator, List
+
+
+def ndjson_line(record: Any) -> str:
+    """Serialize one NDJSON record, including the trailing newline"""
+    return json.dumps(record) + "\n"
+
+
+async def spool_body(chunks: AsyncIterator[bytes], max_memory: int) -> IO[bytes]:
+    """Copy a streamed request body into a temp file, rewound for reading
+
+    The body stays in memory up to ``max_memory`` bytes and is moved to disk
+    beyond that. Reading the whole upload before answering (rather than
+    streaming the response while the client is still sending) avoids
+    deadlocking the many HTTP clients that only read once the upload is done.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    try:
+        async for chunk in chunks:
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def iter_line_batches(body: IO[bytes], size: int) -> Iterator[List[str]]:
+    """Yield non-blank decoded lines from ``body`` in lists of at most ``size``"""
+    batch: List[str] = []
+    for raw in body:
+        line = raw.rstrip(b"\r\n")
+        if not line:
+            continue
+        batch.append(line.decode("utf-8"))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
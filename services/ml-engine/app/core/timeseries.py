@@ -0,0 +1,230 @@
+"""
+Time-series ingestion
+
+Parses incoming series straight into contiguous arrays: a datetime64[ns] array
+of dates and a float64 array of values. Request models declare ``Series``
+fields, so payloads are validated once at the edge and no per-point objects
+are kept around. Both payload shapes are accepted:
+
+    [{"date": "2024-01-01", "value": 10.5}, ...]
+    {"dates": ["2024-01-01", ...], "values": [10.5, ...]}
+
+Fields that need a minimum amount of history declare it with
+``Annotated[Series, min_points(n)]``, so short series fail validation (422)
+instead of failing inside a model.
+"""
+from operator import itemgetter
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pydantic import AfterValidator
+from pydantic_core import core_schema
+
+_NS_PER_DAY = 86_400 * 10**9
+
+# Median spacing (days) -> pandas frequency used to detect and fill gaps
+_FREQUENCIES = [
+    ((1, 1), "D"),
+    ((7, 7), "W"),
+    ((28, 31), "M"),
+    ((89, 92), "Q"),
+    ((365, 366), "Y"),
+]
+
+
+def parse_dates(dates: Sequence[Any]) -> np.ndarray:
+    """Vectorized date parsing to datetime64[ns]
+
+    Tries one inferred format for the whole column first and only falls back
+    to per-element format detection for mixed-format input.
+    """
+    index = pd.Index(dates, dtype=object)
+    try:
+        parsed = pd.to_datetime(index)
+    except (ValueError, TypeError):
+        parsed = pd.to_datetime(index, format="mixed")
+    if parsed.tz is not None:
+        parsed = parsed.tz_convert(None)
+    return parsed.as_unit("ns").to_numpy()
+
+
+class Series:
+    """A validated series: ``ds`` (datetime64[ns]) and ``y`` (float64), sorted by date"""
+
+    __slots__ = ("ds", "y")
+
+    def __init__(self, ds: np.ndarray, y: np.ndarray):
+        self.ds = ds
+        self.y = y
+
+    def __len__(self) -> int:
+        return len(self.y)
+
+    @classmethod
+    def empty(cls) -> "Series":
+        return cls(np.empty(0, dtype="datetime64[ns]"), np.empty(0, dtype=np.float64))
+
+    @classmethod
+    def from_arrays(cls, dates: Any, values: Any) -> "Series":
+        """Validate and sort parallel date/value columns"""
+        if len(dates) != len(values):
+            raise ValueError(f"Series has {len(dates)} dates but {len(values)} values")
+
+        ds = dates if isinstance(dates, np.ndarray) and dates.dtype.kind == "M" else parse_dates(dates)
+        ds = ds.astype("datetime64[ns]", copy=False)
+        y = np.ascontiguousarray(values, dtype=np.float64)
+        if not np.isfinite(y).all():
+            raise ValueError("Series values must be finite numbers")
+        if np.isnat(ds).any():
+            raise ValueError("Series dates must not be null")
+
+        # Monotonic check is O(n); only pay for a sort when it fails
+        if len(ds) > 1 and (np.diff(ds.view(np.int64)) < 0).any():
+            order = np.argsort(ds, kind="stable")
+            ds, y = ds[order], y[order]
+        return cls(ds, y)
+
+    @classmethod
+    def coerce(cls, value: Any) -> "Series":
+        """Build a Series from any accepted payload shape"""
+        if isinstance(value, Series):
+            return value
+        if isinstance(value, dict):
+            if "dates" not in value or "values" not in value:
+                raise ValueError("Columnar series needs 'dates' and 'values'")
+            return cls.from_arrays(value["dates"], value["values"])
+        if isinstance(value, (list, tuple)):
+            if not value:
+                return cls.empty()
+            if isinstance(value[0], dict):
+                try:
+                    dates = list(map(itemgetter("date"), value))
+                    values = list(map(itemgetter("value"), value))
+                except KeyError as e:
+                    raise ValueError(f"Series point is missing {e}")
+            else:
+                # Objects with .date/.value, e.g. TimeSeriesData
+                dates = [point.date for point in value]
+                values = [point.value for point in value]
+            try:
+                return cls.from_arrays(dates, np.asarray(values, dtype=np.float64))
+            except TypeError:
+                raise ValueError("Series values must be numbers")
+        raise ValueError("Expected a list of {date, value} points or {dates, values} columns")
+
+    def frame(self) -> pd.DataFrame:
+        """The (ds, y) frame Prophet expects, without copying the arrays"""
+        return pd.DataFrame({"ds": self.ds, "y": self.y}, copy=False)
+
+    def to_columns(self) -> Dict[str, list]:
+        return {
+            "dates": np.datetime_as_string(self.ds, unit="D").tolist(),
+            "values": self.y.tolist(),
+        }
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: Any) -> core_schema.CoreSchema:
+        return core_schema.no_info_plain_validator_function(
+            cls.coerce,
+            serialization=core_schema.plain_serializer_function_ser_schema(lambda s: s.to_columns())
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(cls, schema: Any, handler: Any) -> Dict[str, Any]:
+        return {
+            "anyOf": [
+                {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"date": {"type": "string"}, "value": {"type": "number"}},
+                        "required": ["date", "value"],
+                    },
+                },
+                {
+                    "type": "object",
+                    "properties": {
+                        "dates": {"type": "array", "items": {"type": "string"}},
+                        "values": {"type": "array", "items": {"type": "number"}},
+                    },
+                    "required": ["dates", "values"],
+                },
+            ]
+        }
+
+
+def min_points(n: int) -> AfterValidator:
+    """Validator rejecting series with fewer than ``n`` points"""
+
+    def check(series: Series) -> Series:
+        if len(series) < n:
+            raise ValueError(f"Series needs at least {n} points, got {len(series)}")
+        return series
+
+    return AfterValidator(check)
+
+
+def infer_frequency(ds: np.ndarray) -> Optional[str]:
+    """Pandas frequency matching the series' median spacing, if it is a regular one"""
+    if len(ds) < 3:
+        return None
+    steps = np.diff(ds.view(np.int64))
+    if (steps == 0).any():
+        return None  # duplicate dates; no single grid to fill
+    median_days = np.median(steps) / _NS_PER_DAY
+    for (low, high), freq in _FREQUENCIES:
+        if low <= median_days <= high:
+            return freq
+    return None
+
+
+def find_gaps(series: Series, freq: Optional[str] = None) -> int:
+    """Number of periods missing between the first and last date"""
+    freq = freq or infer_frequency(series.ds)
+    if freq is None:
+        return 0
+    periods = pd.PeriodIndex(series.ds, freq=freq)
+    expected = periods[-1].ordinal - periods[0].ordinal + 1
+    return max(expected - len(np.unique(periods.asi8)), 0)
+
+
+def regularize(series: Series, freq: Optional[str] = None, how: str = "interpolate") -> Series:
+    """Resample onto a regular grid at ``freq`` (inferred when omitted)
+
+    Points falling in the same period are summed (``how="sum"``) or averaged
+    (``how="interpolate"``). Missing periods are then filled with zero or by
+    linear interpolation, respectively. Each output date is the first
+    observed date of its period; filled periods get the period start, or the
+    period end when the series uses month-end style dates.
+    Series without a detectable regular frequency are returned unchanged.
+    """
+    freq = freq or infer_frequency(series.ds)
+    if freq is None or find_gaps(series, freq) == 0:
+        return series
+
+    periods = pd.PeriodIndex(series.ds, freq=freq)
+    ordinals = periods.asi8 - periods.asi8[0]
+    n = int(ordinals[-1]) + 1
+
+    counts = np.bincount(ordinals, minlength=n)
+    sums = np.bincount(ordinals, weights=series.y, minlength=n)
+    present = counts > 0
+
+    if how == "sum":
+        y = sums
+    else:
+        observed = np.flatnonzero(present)
+        y = np.interp(np.arange(n), observed, sums[present] / counts[present])
+
+    # Keep the original dates where observed, and match a period-end
+    # convention for the filled ones
+    grid_periods = pd.period_range(periods[0], periods=n, freq=freq)
+    if (series.ds == periods.end_time.normalize().as_unit("ns").to_numpy()).all():
+        grid = grid_periods.end_time.normalize().as_unit("ns").to_numpy()
+    else:
+        grid = grid_periods.start_time.as_unit("ns").to_numpy()
+    first_seen = np.full(n, np.iinfo(np.int64).max)
+    np.minimum.at(first_seen, ordinals, series.ds.view(np.int64))
+    ds = np.where(present, first_seen, grid.view(np.int64)).view("datetime64[ns]")
+    return Series(ds, y)
@@ -0,0 +1,91 @@
+"""
+Warm-start parameters per business_id
+
+Each worker keeps recent parameters in a process-local ``ModelCache``. When a
+Redis client is given they are also written there, so the next fit for a
+business warm-starts whichever uvicorn worker (or replica) it lands on. Redis
+is only consulted from the async forecast path; the sync path stays local.
+"""
+import json
+import logging
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import numpy as np
+
+from app.core.model_cache import ModelCache
+from app.core.shared import KEY_PREFIX
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+
+def dump_params(params: Dict[str, Any]) -> str:
+    """JSON for warm_start_params() output; arrays become lists"""
+    return json.dumps({
+        name: value.tolist() if isinstance(value, np.ndarray) else value
+        for name, value in params.items()
+    })
+
+
+def load_params(raw: str) -> Dict[str, Any]:
+    """Inverse of dump_params()"""
+    return {
+        name: np.asarray(value, dtype=np.float64) if isinstance(value, list) else value
+        for name, value in json.loads(raw).items()
+    }
+
+
+class WarmStartStore:
+    """Local cache of warm-start parameters, optionally backed by Redis"""
+
+    def __init__(
+        self,
+        local: ModelCache,
+        redis: Optional["Redis"] = None,
+        prefix: str = f"{KEY_PREFIX}:warm-start"
+    ):
+        self.local = local
+        self.redis = redis
+        self.prefix = prefix
+
+    def _key(self, business_id: str) -> str:
+        return f"{self.prefix}:{business_id}"
+
+    def get(self, business_id: str) -> Optional[Dict[str, Any]]:
+        return self.local.get(business_id)
+
+    def put(self, business_id: str, params: Dict[str, Any]) -> None:
+        self.local.put(business_id, params)
+
+    async def get_async(self, business_id: str) -> Optional[Dict[str, Any]]:
+        """Local parameters, else the shared copy (kept locally from then on)"""
+        params = self.local.get(business_id)
+        if params is not None or self.redis is None:
+            return params
+        try:
+            raw = await self.redis.get(self._key(business_id))
+        except Exception as e:
+            # A cold start is only slower, so don't fail the forecast
+            logger.error(f"Warm-start lookup failed for {business_id}: {str(e)}")
+            return None
+        if raw is None:
+            return None
+        params = load_params(raw)
+        self.local.put(business_id, params)
+        return params
+
+    async def put_async(self, business_id: str, params: Dict[str, Any]) -> None:
+        self.local.put(business_id, params)
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(
+                self._key(business_id), dump_params(params), px=max(int(self.local.ttl_seconds * 1000), 1)
+            )
+        except Exception as e:
+            logger.error(f"Warm-start save failed for {business_id}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis" if self.redis is not None else "memory", **self.local.stats()}
@@ -0,0 +1,62 @@
+"""
+Background warm-up and readiness
+
+Heavy libraries (Prophet, sklearn) are imported on first use so the process
+starts serving /health quickly. The warm-up runs the first use deliberately,
+in the background right after startup: each step imports its libraries and
+fits a tiny model, in the API process or in every pool worker. /ready reports
+ready only once all steps have finished, so a load balancer can hold traffic
+back until the first real request no longer pays the cold-start cost.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+WarmupStep = Callable[[], Awaitable[Any]]
+
+
+class Warmup:
+    """Runs named warm-up steps concurrently and tracks readiness
+
+    A failed step is logged and reported but does not block readiness; the
+    component then just warms up on its first request instead.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.started_at: Optional[float] = None
+        self.seconds: Optional[float] = None
+        self.steps: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    async def run(self, steps: Dict[str, WarmupStep]) -> None:
+        self.started_at = time.perf_counter()
+
+        async def timed(name: str, step: WarmupStep) -> None:
+            start = time.perf_counter()
+            try:
+                await step()
+            except Exception as e:
+                logger.error(f"Warm-up step {name} failed: {str(e)}")
+                self.errors[name] = str(e)
+            self.steps[name] = round(time.perf_counter() - start, 3)
+
+        await asyncio.gather(*(timed(name, step) for name, step in steps.items()))
+        self.mark_ready()
+        logger.info(f"Warm-up finished in {self.seconds:.2f}s: {self.steps}")
+
+    def mark_ready(self) -> None:
+        if self.started_at is not None:
+            self.seconds = round(time.perf_counter() - self.started_at, 3)
+        self.ready = True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "seconds": self.seconds,
+            "steps": self.steps,
+            "errors": self.errors,
+        }
@@ -0,0 +1,275 @@
+"""
+Per-product elasticity store
+
+Demand history is recorded per (user_id, product_id) as it arrives; a
+background task periodically re-estimates elasticity and mean demand for the
+products that changed, so pricing requests only need a lookup instead of
+shipping and re-processing the full history on every call.
+
+Two backends share the interface:
+
+- ``MemoryElasticityStore`` keeps everything in the process. Uploads only
+  reach the worker that received them and are lost on restart, so it is for
+  single-worker deployments and tests
+- ``RedisElasticityStore`` keeps history, estimates and the dirty set in
+  Redis, so every uvicorn worker and replica reads the same estimates
+
+Both keep at most ``max_history`` values per product and at most
+``max_products`` products, evicting the least recently updated.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.core.shared import KEY_PREFIX
+from app.pricing import ragged_stats, volatility_elasticity
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+ProductKey = Tuple[str, str]  # (user_id, product_id)
+Estimate = Tuple[float, float]  # (elasticity, mean demand)
+
+# Products re-estimated per Redis round trip
+REFRESH_BATCH = 5000
+
+
+def estimate(histories: Sequence[Sequence[float]]) -> List[Estimate]:
+    """(elasticity, mean demand) per history, in one vectorized pass"""
+    stats = ragged_stats(histories)
+    elasticity = volatility_elasticity(stats["count"], stats["mean"], stats["std"])
+    return list(zip(elasticity.tolist(), stats["mean"].tolist()))
+
+
+def _as_arrays(pairs: List[Estimate]) -> Tuple[np.ndarray, np.ndarray]:
+    values = np.array(pairs, dtype=np.float64).reshape(len(pairs), 2)
+    return values[:, 0], values[:, 1]
+
+
+class ElasticityStore(ABC):
+    """Demand history plus precomputed (elasticity, mean demand) per product
+
+    ``record`` only appends and marks products dirty; ``refresh`` recomputes
+    the dirty products and swaps the results in. Reads never see a
+    half-updated entry.
+    """
+
+    name = ""
+
+    def __init__(self, max_history: int = 365, max_products: int = 100000):
+        self.max_history = max_history
+        self.max_products = max_products
+
+    @abstractmethod
+    async def record(self, user_id: str, histories: Iterable[Tuple[str, Sequence[float]]]) -> None:
+        """Append (product_id, values) observations"""
+
+    @abstractmethod
+    async def refresh(self) -> int:
+        """Re-estimate every product recorded since the last refresh; the number refreshed"""
+
+    @abstractmethod
+    async def lookup(self, user_id: str, product_id: str) -> Optional[Estimate]:
+        """(elasticity, mean demand) for a product, or None if never refreshed"""
+
+    @abstractmethod
+    async def lookup_many(self, user_id: str, product_ids: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Elasticity and mean demand arrays for a catalog; NaN where unknown"""
+
+    @abstractmethod
+    async def stats(self) -> Dict[str, Any]:
+        pass
+
+    async def run(self, interval: float) -> None:
+        """Refresh every ``interval`` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                refreshed = await self.refresh()
+                if refreshed:
+                    logger.info(f"Refreshed elasticity for {refreshed} products")
+            except Exception as e:
+                logger.error(f"Elasticity refresh failed: {str(e)}")
+
+
+class MemoryElasticityStore(ElasticityStore):
+    """Process-local store; each uvicorn worker has its own copy"""
+
+    name = "memory"
+
+    def __init__(self, max_history: int = 365, max_products: int = 100000):
+        super().__init__(max_history, max_products)
+        # Least recently updated first
+        self._history: "OrderedDict[ProductKey, Deque[float]]" = OrderedDict()
+        self._estimates: Dict[ProductKey, Estimate] = {}
+        self._dirty: Set[ProductKey] = set()
+        self._lock = threading.Lock()
+        self.refreshes = 0
+
+    async def record(self, user_id: str, histories: Iterable[Tuple[str, Sequence[float]]]) -> None:
+        with self._lock:
+            for product_id, values in histories:
+                key = (user_id, product_id)
+                history = self._history.get(key)
+                if history is None:
+                    history = self._history[key] = deque(maxlen=self.max_history)
+                else:
+                    self._history.move_to_end(key)
+                history.extend(values)
+                self._dirty.add(key)
+            while len(self._history) > self.max_products:
+                key, _ = self._history.popitem(last=False)
+                self._estimates.pop(key, None)
+                self._dirty.discard(key)
+
+    def _refresh(self) -> int:
+        with self._lock:
+            keys = list(self._dirty)
+            self._dirty.clear()
+            histories = [list(self._history[key]) for key in keys]
+        if not keys:
+            return 0
+
+        updates = dict(zip(keys, estimate(histories)))
+
+        with self._lock:
+            # Skip products evicted while estimating
+            self._estimates.update((key, value) for key, value in updates.items() if key in self._history)
+            self.refreshes += 1
+        return len(keys)
+
+    async def refresh(self) -> int:
+        return await asyncio.to_thread(self._refresh)
+
+    async def lookup(self, user_id: str, product_id: str) -> Optional[Estimate]:
+        return self._estimates.get((user_id, product_id))
+
+    async def lookup_many(self, user_id: str, product_ids: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        missing = (np.nan, np.nan)
+        estimates = self._estimates
+        return _as_arrays([estimates.get((user_id, pid), missing) for pid in product_ids])
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "products": len(self._estimates),
+            "pending": len(self._dirty),
+            "refreshes": self.refreshes,
+        }
+
+
+class RedisElasticityStore(ElasticityStore):
+    """Store shared by every worker through Redis
+
+    Keys under ``prefix``: a list of recent values per product, a sorted set
+    of products by last update (for eviction), the set of dirty products and
+    a hash of estimates. Workers claim dirty products with SPOP, so concurrent
+    refreshers never estimate the same product twice.
+    """
+
+    name = "redis"
+
+    def __init__(
+        self,
+        redis: "Redis",
+        max_history: int = 365,
+        max_products: int = 100000,
+        prefix: str = f"{KEY_PREFIX}:elasticity"
+    ):
+        super().__init__(max_history, max_products)
+        self.redis = redis
+        self.prefix = prefix
+        self._products = f"{prefix}:products"
+        self._dirty = f"{prefix}:dirty"
+        self._estimates = f"{prefix}:estimates"
+        self._refreshes = f"{prefix}:refreshes"
+
+    @staticmethod
+    def _member(user_id: str, product_id: str) -> str:
+        return json.dumps([user_id, product_id], separators=(",", ":"))
+
+    def _history_key(self, member: str) -> str:
+        return f"{self.prefix}:history:{member}"
+
+    async def record(self, user_id: str, histories: Iterable[Tuple[str, Sequence[float]]]) -> None:
+        now = time.time()
+        pipe = self.redis.pipeline(transaction=False)
+        for product_id, values in histories:
+            member = self._member(user_id, product_id)
+            key = self._history_key(member)
+            if len(values):
+                pipe.rpush(key, *map(float, values))
+                pipe.ltrim(key, -self.max_history, -1)
+            pipe.zadd(self._products, {member: now})
+            pipe.sadd(self._dirty, member)
+        await pipe.execute()
+        await self._evict()
+
+    async def _evict(self) -> None:
+        excess = await self.redis.zcard(self._products) - self.max_products
+        if excess <= 0:
+            return
+        members = [member for member, _ in await self.redis.zpopmin(self._products, excess)]
+        if not members:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.delete(*map(self._history_key, members))
+        pipe.hdel(self._estimates, *members)
+        pipe.srem(self._dirty, *members)
+        await pipe.execute()
+
+    async def refresh(self) -> int:
+        refreshed = 0
+        while True:
+            members = await self.redis.spop(self._dirty, REFRESH_BATCH)
+            if not members:
+                break
+            pipe = self.redis.pipeline(transaction=False)
+            for member in members:
+                pipe.lrange(self._history_key(member), 0, -1)
+            raw = await pipe.execute()
+
+            # An empty list means the product was evicted after being marked
+            present = [(member, [float(v) for v in values]) for member, values in zip(members, raw) if values]
+            if present:
+                estimates = await asyncio.to_thread(estimate, [values for _, values in present])
+                await self.redis.hset(self._estimates, mapping={
+                    member: json.dumps(value) for (member, _), value in zip(present, estimates)
+                })
+            refreshed += len(present)
+        if refreshed:
+            await self.redis.incr(self._refreshes)
+        return refreshed
+
+    async def lookup(self, user_id: str, product_id: str) -> Optional[Estimate]:
+        raw = await self.redis.hget(self._estimates, self._member(user_id, product_id))
+        return tuple(json.loads(raw)) if raw is not None else None
+
+    async def lookup_many(self, user_id: str, product_ids: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        if not product_ids:
+            return _as_arrays([])
+        raw = await self.redis.hmget(self._estimates, [self._member(user_id, pid) for pid in product_ids])
+        missing = (np.nan, np.nan)
+        return _as_arrays([json.loads(value) if value is not None else missing for value in raw])
+
+    async def stats(self) -> Dict[str, Any]:
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hlen(self._estimates)
+        pipe.scard(self._dirty)
+        pipe.get(self._refreshes)
+        products, pending, refreshes = await pipe.execute()
+        return {
+            "backend": self.name,
+            "products": products,
+            "pending": pending,
+            "refreshes": int(refreshes or 0),
+        }
@@ -0,0 +1,298 @@
+"""
+Forecasting kernels
+
+Pure functions that fit and run forecasting models. They take and return plain
+arrays/DataFrames and do not touch the FastAPI app, so they can be shipped to
+the fit pool's worker processes.
+
+Prophet (and the matplotlib/Stan stack it pulls in) is imported on first fit
+rather than at module load, so the service starts without paying for it.
+"""
+import copy
+from statistics import NormalDist
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from prophet import Prophet
+
+# Below two full yearly cycles Prophet's yearly seasonality is not
+# identifiable, so "auto" switches to a fast NumPy engine. The history must
+# cover two years (first to last date plus one typical step, so 24 month-ends
+# qualify) and have enough points to fit the seasonal terms.
+MIN_DAYS_FOR_SEASONALITY = 730
+MIN_POINTS_FOR_SEASONALITY = 24
+
+_NS_PER_DAY = 86_400 * 10**9
+
+# Smoothing parameter grid searched by the ETS engine
+_ETS_ALPHAS = np.linspace(0.1, 0.9, 9)
+_ETS_BETAS = np.linspace(0.05, 0.5, 6)
+_ETS_PHIS = np.array([0.9, 0.95, 0.98, 1.0])
+
+# Theil-Sen takes the median slope over every pair of points up to this many
+# pairs (about 450 points); longer series use this many random pairs, which
+# keeps memory bounded at a negligible cost in accuracy
+MAX_THEIL_SEN_PAIRS = 100_000
+
+# Fit-time hyperparameters. interval_width only affects predict() and is
+# applied per call, so it is deliberately not part of this dict (or of the
+# model cache key).
+PROPHET_PARAMS = {
+    "yearly_seasonality": True,
+    "weekly_seasonality": False,
+    "daily_seasonality": False,
+    "changepoint_prior_scale": 0.05,
+}
+
+
+def fit_prophet(ds: np.ndarray, y: np.ndarray, init: Optional[Dict[str, Any]] = None) -> "Prophet":
+    """Fit a Prophet model on (ds, y)
+
+    ``init`` are parameters from a previous fit of the same business (see
+    warm_start_params); the optimizer starts from them instead of from
+    scratch, which typically converges in far fewer iterations when only a
+    few points were appended.
+    """
+    from prophet import Prophet
+
+    model = Prophet(**PROPHET_PARAMS)
+    df = pd.DataFrame({"ds": ds, "y": y})
+    if init is None:
+        model.fit(df)
+    else:
+        model.fit(df, init=_resize_init(init, len(df), model))
+    return model
+
+
+def warm_start_params(model: "Prophet") -> Dict[str, Any]:
+    """Extract the fitted parameters of a (MAP) Prophet fit for warm starts"""
+    params = {name: float(model.params[name][0][0]) for name in ("k", "m", "sigma_obs")}
+    for name in ("delta", "beta"):
+        params[name] = np.asarray(model.params[name][0], dtype=np.float64)
+    return params
+
+
+def _resize_init(init: Dict[str, Any], n_points: int, model: "Prophet") -> Dict[str, Any]:
+    """Match the changepoint count Prophet will use for ``n_points`` rows
+
+    Short histories get fewer changepoints, so appending a point can add one.
+    Trailing changepoints are truncated or zero-padded; anything still
+    mismatched is replaced by Prophet's default init.
+    """
+    hist_size = int(np.floor(n_points * model.changepoint_range))
+    n_changepoints = model.n_changepoints
+    if n_changepoints + 1 > hist_size:
+        n_changepoints = hist_size - 1
+    # Prophet keeps a single dummy changepoint when there is no room for any
+    n_changepoints = max(n_changepoints, 1)
+
+    delta = np.zeros(n_changepoints)
+    previous = init["delta"][:n_changepoints]
+    delta[:len(previous)] = previous
+    return {**init, "delta": delta}
+
+
+def prophet_predict(model: "Prophet", periods: int, interval_width: float) -> pd.DataFrame:
+    """Forecast ``periods`` months ahead from a fitted model
+
+    Works on a shallow copy so a cached model can serve concurrent requests
+    with different interval widths.
+    """
+    model = copy.copy(model)
+    model.interval_width = interval_width
+
+    future = model.make_future_dataframe(periods=periods, freq='ME')
+    return model.predict(future)
+
+
+def history_days(ds: np.ndarray) -> float:
+    """Days covered by sorted dates ``ds``: first to last date plus the median step"""
+    if len(ds) < 2:
+        return 0.0
+    steps = np.diff(ds.astype("datetime64[ns]").view(np.int64))
+    return float(steps.sum() + np.median(steps)) / _NS_PER_DAY
+
+
+def select_engine(requested: str, ds: np.ndarray) -> str:
+    """Resolve "auto" to a concrete engine for a series with sorted dates ``ds``"""
+    if requested != "auto":
+        return requested
+    if len(ds) >= MIN_POINTS_FOR_SEASONALITY and history_days(ds) >= MIN_DAYS_FOR_SEASONALITY:
+        return "prophet"
+    return "ets" if len(ds) >= 4 else "linear"
+
+
+def _future_dates(ds: np.ndarray, periods: int) -> np.ndarray:
+    # Same month-end spacing as Prophet's make_future_dataframe(freq='ME')
+    last = pd.Timestamp(ds[-1])
+    dates = pd.date_range(start=last, periods=periods + 1, freq='ME')
+    return dates[dates > last][:periods].values
+
+
+def _horizon_steps(ds: np.ndarray, future_ds: np.ndarray) -> np.ndarray:
+    """Observation steps from the last date of ``ds`` to each future date (at least 1)
+
+    Step-based engines forecast one observation step at a time, while the
+    forecast is labelled by month-end; a daily series is ~30 steps per month.
+    The mean step is used so month-ends of unequal length don't drift.
+    """
+    ns = np.asarray(ds, dtype="datetime64[ns]").view(np.int64)
+    step = (ns[-1] - ns[0]) / (len(ns) - 1)
+    elapsed = np.asarray(future_ds, dtype="datetime64[ns]").view(np.int64) - ns[-1]
+    return np.maximum(np.rint(elapsed / step), 1)
+
+
+def _forecast_frame(ds, fitted, future_ds, future, trend, half_width) -> pd.DataFrame:
+    """Assemble a frame with the columns CashFlowPredictor reads from Prophet"""
+    yhat = np.concatenate([fitted, future])
+    return pd.DataFrame({
+        "ds": np.concatenate([ds, future_ds]),
+        "yhat": yhat,
+        "yhat_lower": yhat - half_width,
+        "yhat_upper": yhat + half_width,
+        "trend": trend,
+        "yearly": np.zeros(len(yhat)),
+    })
+
+
+def _ets_sse(y: np.ndarray, alpha: np.ndarray, beta: np.ndarray, phi: np.ndarray) -> np.ndarray:
+    """One-step-ahead squared error of every parameter combination
+
+    All combinations run side by side as one vectorized recursion over time,
+    keeping only the current level/slope and the running error per
+    combination, so memory is O(grid) whatever the series length.
+    """
+    level = np.full(alpha.shape, y[0])
+    slope = np.full(alpha.shape, y[1] - y[0])
+    sse = np.zeros(alpha.shape)
+    for t in range(1, len(y)):
+        fitted = level + phi * slope
+        sse += (y[t] - fitted) ** 2
+        new_level = alpha * y[t] + (1 - alpha) * fitted
+        slope = beta * (new_level - level) + (1 - beta) * phi * slope
+        level = new_level
+    return sse
+
+
+def _ets_path(y: np.ndarray, alpha: float, beta: float, phi: float):
+    """Fitted values and levels of a single parameter combination, plus the final slope"""
+    n = len(y)
+    fitted = np.empty(n)
+    levels = np.empty(n)
+    level, slope = y[0], y[1] - y[0]
+    fitted[0] = levels[0] = level
+    for t in range(1, n):
+        fitted[t] = level + phi * slope
+        new_level = alpha * y[t] + (1 - alpha) * fitted[t]
+        slope = beta * (new_level - level) + (1 - beta) * phi * slope
+        level = levels[t] = new_level
+    return fitted, levels, slope
+
+
+def ets_forecast(ds: np.ndarray, y: np.ndarray, periods: int, interval_width: float) -> pd.DataFrame:
+    """Damped Holt (additive trend) exponential smoothing
+
+    Every (alpha, beta, phi) combination in a small grid is scored by its
+    one-step-ahead squared error; only the winner's fitted path is then
+    recomputed and kept. Each future month-end is forecast as many
+    observation steps ahead as separate it from the last date.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n < 3:
+        # Not enough points to estimate a level and a trend separately
+        return linear_forecast(ds, y, periods, interval_width)
+
+    alpha, beta, phi = (
+        g.ravel() for g in np.meshgrid(_ETS_ALPHAS, _ETS_BETAS, _ETS_PHIS, indexing="ij")
+    )
+    sse = _ets_sse(y, alpha, beta, phi)
+    best = int(np.argmin(sse))
+    a, b, p = float(alpha[best]), float(beta[best]), float(phi[best])
+    sigma = np.sqrt(sse[best] / max(n - 1, 1))
+    fitted, levels, slope = _ets_path(y, a, b, p)
+
+    future_ds = _future_dates(ds, periods)
+    h = _horizon_steps(ds, future_ds)
+    # p + p^2 + ... + p^h
+    damp = h if p == 1.0 else p * (1 - p ** h) / (1 - p)
+    future = levels[-1] + damp * slope
+
+    # Forecast variance of ETS(A,A,N), used as an approximation for the damped
+    # model (beta here is on the level change, hence the a * b rescaling)
+    ab = a * b
+    var_factor = 1 + (h - 1) * (a ** 2 + a * ab * h + ab ** 2 * h * (2 * h - 1) / 6)
+    z = NormalDist().inv_cdf(0.5 + interval_width / 2)
+    half_width = np.concatenate([np.full(n, z * sigma), z * sigma * np.sqrt(var_factor)])
+
+    trend = np.concatenate([levels, future])
+    return _forecast_frame(ds, fitted, future_ds, future, trend, half_width)
+
+
+def _theil_sen_slope(x: np.ndarray, y: np.ndarray) -> float:
+    """Median of the pairwise slopes, over at most MAX_THEIL_SEN_PAIRS pairs"""
+    n = len(y)
+    if n < 2:
+        return 0.0
+    if n * (n - 1) // 2 <= MAX_THEIL_SEN_PAIRS:
+        i, j = np.triu_indices(n, k=1)
+    else:
+        # Fixed seed, so the same series always gets the same forecast
+        rng = np.random.default_rng(0)
+        i = rng.integers(0, n, MAX_THEIL_SEN_PAIRS)
+        j = rng.integers(0, n, MAX_THEIL_SEN_PAIRS)
+    dx = x[j] - x[i]
+    valid = dx != 0
+    return float(np.median((y[j] - y[i])[valid] / dx[valid])) if valid.any() else 0.0
+
+
+def linear_forecast(ds: np.ndarray, y: np.ndarray, periods: int, interval_width: float) -> pd.DataFrame:
+    """Robust (Theil-Sen) linear trend on elapsed months"""
+    y = np.asarray(y, dtype=np.float64)
+    ds = np.asarray(ds, dtype="datetime64[ns]")
+    future_ds = _future_dates(ds, periods)
+
+    # Elapsed time in months, so irregular gaps are handled correctly
+    x = (ds - ds[0]) / np.timedelta64(1, "D") / 30.4375
+    future_x = (future_ds - ds[0]) / np.timedelta64(1, "D") / 30.4375
+
+    n = len(y)
+    slope = _theil_sen_slope(x, y)
+    intercept = np.median(y - slope * x)
+
+    fitted = intercept + slope * x
+    future = intercept + slope * future_x
+
+    # Prediction interval from the robust residual scale (MAD)
+    residuals = y - fitted
+    sigma = 1.4826 * np.median(np.abs(residuals - np.median(residuals)))
+    sxx = ((x - x.mean()) ** 2).sum()
+    all_x = np.concatenate([x, future_x])
+    leverage = 1 / max(n, 1) + ((all_x - x.mean()) ** 2 / sxx if sxx > 0 else 0)
+    z = NormalDist().inv_cdf(0.5 + interval_width / 2)
+    half_width = z * sigma * np.sqrt(1 + leverage)
+
+    trend = np.concatenate([fitted, future])
+    return _forecast_frame(ds, fitted, future_ds, future, trend, half_width)
+
+
+FAST_ENGINES = {
+    "ets": ets_forecast,
+    "linear": linear_forecast,
+}
+
+
+def warm_up() -> None:
+    """Import Prophet and run one tiny fit/predict so the first request doesn't pay for it
+
+    Loads the compiled Stan model and the plotting stack Prophet imports;
+    run once per worker process.
+    """
+    ds = pd.date_range("2020-01-31", periods=MIN_POINTS_FOR_SEASONALITY, freq="ME").values
+    y = 100 + np.arange(len(ds), dtype=np.float64)
+    prophet_predict(fit_prophet(ds, y), 1, 0.8)
+    for engine in FAST_ENGINES.values():
+        engine(ds, y, 1, 0.8)
@@ -0,0 +1,207 @@
+"""
+Inventory kernels
+
+Vectorized EOQ / safety stock / reorder point math over whole catalogs. Every
+function takes and returns NumPy arrays with one entry per SKU; the
+single-product endpoint runs the same code on length-1 arrays.
+"""
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Demand history is monthly; lead times are in days
+PERIODS_PER_YEAR = 12
+DAYS_PER_PERIOD = 30
+
+Z_SCORE = 1.65  # 95% service level
+STOCKOUT_PROBABILITY = 0.05  # matching Z_SCORE
+
+# Monte Carlo safety stock: lead-time demand scenarios drawn per SKU
+DEFAULT_SCENARIOS = 2000
+
+# Columns of an ERP catalog export; each `demand_*` column is one period
+CATALOG_COLUMNS = ["product_id", "lead_time_days", "holding_cost_per_unit", "ordering_cost"]
+DEMAND_COLUMN_PREFIX = "demand_"
+
+# Catalog recommendations; rule i fires when bit i is set in a SKU's
+# recommendation code (see recommendation_codes)
+RECOMMENDATION_RULES = [
+    "High safety stock needed due to demand volatility - consider supplier diversification",
+    "Large order quantities recommended - negotiate volume discounts",
+]
+
+
+def optimize_stock_levels(
+    avg_demand: np.ndarray,
+    std_demand: np.ndarray,
+    lead_time_days: np.ndarray,
+    holding_cost: np.ndarray,
+    ordering_cost: np.ndarray,
+    stockout_cost: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """EOQ, safety stock, reorder point and annual costs per SKU
+
+    ``avg_demand``/``std_demand`` are per period; ``stockout_cost`` is NaN
+    for SKUs without one.
+    """
+    annual_demand = avg_demand * PERIODS_PER_YEAR
+
+    # EOQ = sqrt((2 * D * S) / H)
+    eoq = np.sqrt(2 * annual_demand * ordering_cost / holding_cost)
+
+    lead_time_periods = lead_time_days / DAYS_PER_PERIOD
+    safety_stock = Z_SCORE * std_demand * np.sqrt(lead_time_periods)
+    avg_lead_time_demand = avg_demand * lead_time_periods
+    reorder_point = avg_lead_time_demand + safety_stock
+    optimal_stock = reorder_point + eoq / 2
+
+    orders_per_year = np.divide(annual_demand, eoq, out=np.zeros_like(eoq), where=eoq > 0)
+    annual_holding_cost = (eoq / 2 + safety_stock) * holding_cost
+    annual_ordering_cost = orders_per_year * ordering_cost
+    expected_stockout_cost = np.where(
+        np.isnan(stockout_cost), 0.0, STOCKOUT_PROBABILITY * stockout_cost * orders_per_year
+    )
+
+    return {
+        "economic_order_quantity": eoq,
+        "reorder_point": reorder_point,
+        "safety_stock": safety_stock,
+        "optimal_stock_level": optimal_stock,
+        "annual_holding_cost": annual_holding_cost,
+        "annual_ordering_cost": annual_ordering_cost,
+        "total_cost": annual_holding_cost + annual_ordering_cost + expected_stockout_cost,
+        "order_interval_days": np.divide(365 * eoq, annual_demand, out=np.zeros_like(eoq), where=annual_demand > 0),
+        "avg_demand": avg_demand,
+        "avg_lead_time_demand": avg_lead_time_demand,
+    }
+
+
+def recommendation_codes(result: Dict[str, np.ndarray]) -> np.ndarray:
+    """Bitmask of RECOMMENDATION_RULES that fire for each SKU"""
+    lead_time_demand = result["avg_lead_time_demand"]
+    flags = [
+        np.divide(result["safety_stock"], lead_time_demand, out=np.zeros_like(lead_time_demand),
+                  where=lead_time_demand > 0) > 0.5,
+        result["economic_order_quantity"] > result["avg_demand"] * 3,
+    ]
+    codes = np.zeros(len(lead_time_demand), dtype=np.int64)
+    for bit, flag in enumerate(flags):
+        codes |= flag.astype(np.int64) << bit
+    return codes
+
+
+def simulate_safety_stock(
+    avg_demand: np.ndarray,
+    std_demand: np.ndarray,
+    lead_time_days: np.ndarray,
+    lead_time_std_days: np.ndarray,
+    holding_cost: np.ndarray,
+    ordering_cost: np.ndarray,
+    stockout_cost: np.ndarray,
+    service_level: Optional[float],
+    n_scenarios: int,
+    seed: np.random.SeedSequence,
+) -> Dict[str, np.ndarray]:
+    """Safety stock per SKU from simulated lead-time demand
+
+    Each scenario draws a lead time ~ N(lead_time_days, lead_time_std_days),
+    truncated at zero, and lead-time demand ~ N(avg * L, std * sqrt(L)) in
+    periods, truncated at zero. With ``service_level`` the reorder point is
+    that quantile of the scenarios. Without it the reorder point minimizes
+    annual holding cost of the safety stock plus expected stockout cost
+    (P(stockout per cycle) * stockout_cost * orders per year).
+    The safety stock is never negative.
+
+    Pure function of its arguments, so chunks can run in pool workers.
+    Passing a spawned ``seed`` per chunk keeps the results reproducible
+    however the catalog is split.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(avg_demand)
+    shape = (n, n_scenarios)
+
+    lead_time = np.maximum(
+        lead_time_days[:, None] + lead_time_std_days[:, None] * rng.standard_normal(shape), 0.0
+    ) / DAYS_PER_PERIOD
+    demand = avg_demand[:, None] * lead_time + std_demand[:, None] * np.sqrt(lead_time) * rng.standard_normal(shape)
+    demand = np.sort(np.maximum(demand, 0.0), axis=1)
+
+    expected = avg_demand * lead_time_days / DAYS_PER_PERIOD
+    deterministic = optimize_stock_levels(
+        avg_demand, std_demand, lead_time_days, holding_cost, ordering_cost, stockout_cost
+    )
+    eoq = deterministic["economic_order_quantity"]
+    orders_per_year = np.divide(
+        avg_demand * PERIODS_PER_YEAR, eoq, out=np.zeros_like(eoq), where=eoq > 0
+    )
+    stockout_cost = np.where(np.isnan(stockout_cost), 0.0, stockout_cost)
+
+    if service_level is not None:
+        index = min(max(int(np.ceil(service_level * n_scenarios)) - 1, 0), n_scenarios - 1)
+        reorder_point = np.maximum(demand[:, index], expected)
+    else:
+        # Cost is piecewise: between scenario values only holding cost grows,
+        # so the optimum is either at the expected demand (zero safety stock)
+        # or at one of the sorted scenario values above it
+        stockouts_after = (n_scenarios - 1 - np.arange(n_scenarios)) / n_scenarios
+        cost = (
+            holding_cost[:, None] * (demand - expected[:, None])
+            + (stockout_cost * orders_per_year)[:, None] * stockouts_after
+        )
+        cost[demand < expected[:, None]] = np.inf
+        best = np.argmin(cost, axis=1)
+        at_expected = stockout_cost * orders_per_year * (demand > expected[:, None]).mean(axis=1)
+        candidate = np.take_along_axis(cost, best[:, None], axis=1)[:, 0]
+        reorder_point = np.where(at_expected <= candidate, expected, demand[np.arange(n), best])
+
+    stockout_probability = (demand > reorder_point[:, None]).mean(axis=1)
+    safety_stock = reorder_point - expected
+    annual_holding_cost = (eoq / 2 + safety_stock) * holding_cost
+
+    return {
+        "economic_order_quantity": eoq,
+        "reorder_point": reorder_point,
+        "safety_stock": safety_stock,
+        "optimal_stock_level": reorder_point + eoq / 2,
+        "service_level": 1 - stockout_probability,
+        "stockout_probability": stockout_probability,
+        "annual_holding_cost": annual_holding_cost,
+        "annual_ordering_cost": deterministic["annual_ordering_cost"],
+        "total_cost": annual_holding_cost + deterministic["annual_ordering_cost"]
+        + stockout_probability * stockout_cost * orders_per_year,
+    }
+
+
+def catalog_frame_arrays(frame: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Kernel inputs from a wide catalog export (one row per SKU)
+
+    Missing demand cells are ignored in the per-SKU mean/std.
+    """
+    missing = [name for name in CATALOG_COLUMNS if name not in frame]
+    demand_columns = [name for name in frame.columns if str(name).startswith(DEMAND_COLUMN_PREFIX)]
+    if missing or not demand_columns:
+        raise ValueError(
+            f"Catalog needs columns {CATALOG_COLUMNS} and at least one '{DEMAND_COLUMN_PREFIX}*' column"
+            + (f"; missing {missing}" if missing else "")
+        )
+
+    demand = frame[demand_columns].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    counts = (~np.isnan(demand)).sum(axis=1)
+    filled = np.where(np.isnan(demand), 0.0, demand)
+    safe_counts = np.maximum(counts, 1)
+    avg = filled.sum(axis=1) / safe_counts
+    std = np.sqrt(np.maximum((filled * filled).sum(axis=1) / safe_counts - avg * avg, 0.0))
+
+    def numeric(name: str) -> np.ndarray:
+        return pd.to_numeric(frame[name], errors="coerce").to_numpy(dtype=np.float64)
+
+    return {
+        "product_id": frame["product_id"].astype(str).to_numpy(),
+        "avg_demand": avg,
+        "std_demand": std,
+        "lead_time_days": numeric("lead_time_days"),
+        "holding_cost": numeric("holding_cost_per_unit"),
+        "ordering_cost": numeric("ordering_cost"),
+        "stockout_cost": numeric("stockout_cost") if "stockout_cost" in frame else np.full(len(frame), np.nan),
+    }
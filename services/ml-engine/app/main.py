@@ -3,29 +3,118 @@ ML Engine - Advanced Predictive Analytics & Machine Learning Service
 Provides enterprise-grade ML capabilities for forecasting, prediction, and optimization
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, Request, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional, Any
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.openapi.utils import get_openapi
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, HttpUrl, ValidationError, model_validator
+from typing import Annotated, List, Dict, Optional, Any, AsyncIterator, Awaitable, Callable, Iterator, Tuple, Type
 from datetime import datetime, timedelta
 from enum import Enum
 import numpy as np
 import pandas as pd
-from prophet import Prophet
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingClassifier
-from sklearn.preprocessing import StandardScaler
 import logging
 import asyncio
+import hashlib
+import json
+import threading
+from contextlib import asynccontextmanager
+from functools import partial
 from prometheus_fastapi_instrumentator import Instrumentator
 
+from app.churn_model import ChurnModelArtifact, extract_features, load_artifact, require_artifact
+from app.core.binary import negotiated_body, negotiated_openapi
+from app.core.config import settings
+from app.core.fit_pool import FitPool, FitPoolSaturated
+from app.core.jobs import JobManager, JobQueueFull, MemoryJobStore, RedisJobStore, WebhookRejected
+from app.core.model_cache import ModelCache, series_fingerprint
+from app.core.shared import create_redis
+from app.core.stages import stage
+from app.core.streaming import iter_line_batches, ndjson_line, spool_body
+from app.core.timeseries import Series, infer_frequency, min_points, regularize
+from app.core.warm_starts import WarmStartStore
+from app.core.warmup import Warmup, WarmupStep
+from app.elasticity_store import ElasticityStore, MemoryElasticityStore, RedisElasticityStore
+from app.forecasting import (
+    FAST_ENGINES,
+    PROPHET_PARAMS,
+    fit_prophet,
+    prophet_predict,
+    select_engine,
+    warm_start_params,
+    warm_up as warm_up_forecasting,
+)
+from app.inventory import (
+    DEFAULT_SCENARIOS,
+    RECOMMENDATION_RULES as INVENTORY_RECOMMENDATION_RULES,
+    catalog_frame_arrays,
+    optimize_stock_levels,
+    recommendation_codes as inventory_recommendation_codes,
+    simulate_safety_stock,
+)
+from app.market import (
+    MarketReference,
+    financial_inputs,
+    normalize_key,
+    normalize_keywords,
+    score_business_risk,
+    score_market_trend,
+)
+from app.pricing import (
+    DEFAULT_COMPETITOR_BAND,
+    DEFAULT_GRID_SIZE,
+    RECOMMENDATION_RULES as PRICING_RECOMMENDATION_RULES,
+    grid_search_prices,
+    optimize_prices,
+    ragged_stats,
+    recommendation_codes,
+    volatility_elasticity,
+)
+from app.sales import FOREST_PARAMS, MIN_SALES_POINTS, SalesModel, fit_sales_model, warm_up as warm_up_sales
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup and shutdown events
+    """
+    if settings.CHURN_MODEL_VERSION:
+        # Fail the deploy rather than silently fall back to rules
+        require_artifact(settings.CHURN_MODEL_DIR, settings.CHURN_MODEL_VERSION)
+    elasticity_refresher = asyncio.create_task(
+        elasticity_store.run(settings.ELASTICITY_REFRESH_INTERVAL)
+    )
+    await job_manager.start()
+    warmup_task = None
+    if settings.WARMUP_ENABLED:
+        warmup_task = asyncio.create_task(warmup.run(warmup_steps()))
+    else:
+        warmup.mark_ready()
+
+    yield
+
+    # Shutdown
+    if warmup_task is not None:
+        warmup_task.cancel()
+    elasticity_refresher.cancel()
+    await job_manager.stop()
+    fit_pool.shutdown()
+    simulation_pool.shutdown()
+    if shared_redis is not None:
+        await shared_redis.aclose()
+
+
 app = FastAPI(
-    title="ML Engine - Pueblo Mente IA",
+    title=settings.APP_NAME,
     description="Advanced Machine Learning & Predictive Analytics Engine",
-    version="2.0.0"
+    version=settings.APP_VERSION,
+    lifespan=lifespan
 )
 
 # CORS
@@ -40,6 +129,30 @@ app.add_middleware(
 # Prometheus metrics
 Instrumentator().instrument(app).expose(app)
 
+
+def openapi_schema() -> Dict[str, Any]:
+    """OpenAPI schema including the request models parsed by negotiated_body
+
+    Those endpoints read the body themselves (JSON, Arrow or .npz), so FastAPI
+    does not see their models; register them for the $refs in openapi_extra.
+    """
+    if app.openapi_schema:
+        return app.openapi_schema
+
+    schema = get_openapi(title=app.title, version=app.version, description=app.description, routes=app.routes)
+    components = schema.setdefault("components", {}).setdefault("schemas", {})
+    for model in NEGOTIATED_REQUEST_MODELS:
+        model_schema = model.model_json_schema(ref_template="#/components/schemas/{model}")
+        for name, definition in model_schema.pop("$defs", {}).items():
+            components.setdefault(name, definition)
+        components[model.__name__] = model_schema
+
+    app.openapi_schema = schema
+    return schema
+
+
+app.openapi = openapi_schema
+
 # ============================================================================
 # MODELS & SCHEMAS
 # ============================================================================
@@ -48,12 +161,38 @@ class TimeSeriesData(BaseModel):
     date: str
     value: float
 
+class ForecastFormat(str, Enum):
+    RECORDS = "records"
+    COLUMNAR = "columnar"
+
+class ForecastEngine(str, Enum):
+    AUTO = "auto"  # Prophet with enough history for seasonality, else ETS/linear
+    PROPHET = "prophet"
+    ETS = "ets"
+    LINEAR = "linear"
+
+class ForecastColumns(BaseModel):
+    """Forecast as parallel arrays, one entry per forecast period"""
+    date: List[str]
+    predicted_value: List[float]
+    lower_bound: List[float]
+    upper_bound: List[float]
+    trend: List[float]
+
+# A trend needs two points; inventory statistics need one
+MIN_FORECAST_POINTS = 2
+ForecastHistory = Annotated[Series, min_points(MIN_FORECAST_POINTS)]
+
 class CashFlowForecastRequest(BaseModel):
     user_id: str
     business_id: str
-    historical_data: List[TimeSeriesData]
+    historical_data: ForecastHistory
     forecast_periods: int = Field(default=12, ge=1, le=60)
     confidence_level: float = Field(default=0.95, ge=0.8, le=0.99)
+    # "columnar" returns the forecast in `columns` and leaves
+    # `forecast`/`confidence_intervals` empty
+    response_format: ForecastFormat = ForecastFormat.RECORDS
+    engine: ForecastEngine = ForecastEngine.AUTO
 
 class CashFlowForecastResponse(BaseModel):
     forecast: List[Dict[str, Any]]
@@ -63,18 +202,52 @@ class CashFlowForecastResponse(BaseModel):
     insights: List[str]
     risk_score: float
     recommended_actions: List[str]
+    engine: str
+    columns: Optional[ForecastColumns] = None
+
+class CashFlowBatchItem(BaseModel):
+    business_id: str
+    historical_data: ForecastHistory
+    forecast_periods: int = Field(default=12, ge=1, le=60)
+    confidence_level: float = Field(default=0.95, ge=0.8, le=0.99)
+    engine: ForecastEngine = ForecastEngine.AUTO
+
+class CashFlowBatchRequest(BaseModel):
+    user_id: str
+    items: List[CashFlowBatchItem] = Field(..., min_length=1, max_length=10000)
+    response_format: ForecastFormat = ForecastFormat.RECORDS
 
 class SalesForecastRequest(BaseModel):
     user_id: str
     business_id: str
-    historical_sales: List[TimeSeriesData]
+    historical_sales: Series
+    # Regressors by name: a number (constant) or one value per period from
+    # the first history period through the end of the horizon
     external_factors: Optional[Dict[str, Any]] = None
     forecast_horizon: int = Field(default=30, ge=1, le=365)
+    confidence_level: float = Field(default=0.9, ge=0.5, le=0.99)
+
+class SalesForecastColumns(BaseModel):
+    date: List[str]
+    predicted_value: List[float]
+    lower_bound: List[float]
+    upper_bound: List[float]
+
+class SalesForecastResponse(BaseModel):
+    business_id: str
+    frequency: str
+    forecast: SalesForecastColumns
+    total_predicted_sales: float
+    feature_importance: Dict[str, float]
+    cached_model: bool
 
 class CustomerChurnRequest(BaseModel):
     user_id: str
     customers: List[Dict[str, Any]]
 
+# Request bodies accepted by the streaming churn endpoint
+STREAMING_CHURN_FORMATS = ("application/x-ndjson", "text/csv")
+
 class CustomerChurnResponse(BaseModel):
     customer_id: str
     churn_probability: float
@@ -82,14 +255,28 @@ class CustomerChurnResponse(BaseModel):
     retention_recommendations: List[str]
     lifetime_value_prediction: float
 
+class PricingStrategy(str, Enum):
+    MARKUP = "markup"  # closed-form markup with competition adjustments
+    GRID = "grid"  # profit grid search over a constant-elasticity demand curve
+
 class PricingOptimizationRequest(BaseModel):
     user_id: str
     product_id: str
     current_price: float
     cost: float
     competitor_prices: List[float]
-    historical_demand: List[TimeSeriesData]
+    # May be omitted for products whose demand was uploaded to the
+    # elasticity store (POST /api/v1/ml/pricing/demand)
+    historical_demand: Series = Field(default_factory=Series.empty)
     elasticity: Optional[float] = None
+    strategy: PricingStrategy = PricingStrategy.MARKUP
+    # Grid strategy only: candidate count and +/- band around the competitor price
+    grid_size: int = Field(default=DEFAULT_GRID_SIZE, ge=11, le=2001)
+    competitor_band: float = Field(default=DEFAULT_COMPETITOR_BAND, gt=0, le=1)
+
+class ProfitCurve(BaseModel):
+    price: List[float]
+    profit: List[float]
 
 class PricingOptimizationResponse(BaseModel):
     optimal_price: float
@@ -99,11 +286,81 @@ class PricingOptimizationResponse(BaseModel):
     revenue_impact: float
     confidence_score: float
     recommendations: List[str]
+    strategy: str = PricingStrategy.MARKUP.value
+    # Grid strategy only
+    expected_profit: Optional[float] = None
+    profit_curve: Optional[ProfitCurve] = None
+
+class PricingCatalogRequest(BaseModel):
+    """A catalog as parallel arrays, one entry per SKU"""
+    user_id: str
+    product_id: List[str] = Field(..., min_length=1, max_length=100000)
+    current_price: List[float]
+    cost: List[float]
+    # Mean competitor price per SKU; null where unknown
+    competitor_price: Optional[List[Optional[float]]] = None
+    # Per-SKU demand; may be omitted (or empty per SKU) for products in the
+    # elasticity store
+    demand_history: Optional[List[List[float]]] = None
+    # Known elasticities; null entries come from the elasticity store, or
+    # are estimated from demand_history for unknown products
+    elasticity: Optional[List[Optional[float]]] = None
+    strategy: PricingStrategy = PricingStrategy.MARKUP
+    grid_size: int = Field(default=DEFAULT_GRID_SIZE, ge=11, le=2001)
+    competitor_band: float = Field(default=DEFAULT_COMPETITOR_BAND, gt=0, le=1)
+    # Return every SKU's price/profit curve (grid strategy; large for big catalogs)
+    include_curves: bool = False
+
+    @model_validator(mode="after")
+    def check_columns(self) -> "PricingCatalogRequest":
+        n = len(self.product_id)
+        for name in ("current_price", "cost", "competitor_price", "demand_history", "elasticity"):
+            values = getattr(self, name)
+            if values is not None and len(values) != n:
+                raise ValueError(f"{name} has {len(values)} entries, expected {n}")
+        if any(price <= 0 for price in self.current_price):
+            raise ValueError("current_price must be positive")
+        return self
+
+class DemandHistoryUpload(BaseModel):
+    """New demand observations per product, appended to the elasticity store"""
+    user_id: str
+    product_id: List[str] = Field(..., min_length=1, max_length=100000)
+    demand_history: List[List[float]]
+    # Re-estimate these products now instead of on the next background refresh
+    refresh: bool = False
+
+    @model_validator(mode="after")
+    def check_columns(self) -> "DemandHistoryUpload":
+        if len(self.demand_history) != len(self.product_id):
+            raise ValueError(
+                f"demand_history has {len(self.demand_history)} entries, expected {len(self.product_id)}"
+            )
+        return self
+
+class PricingCatalogColumns(BaseModel):
+    product_id: List[str]
+    optimal_price: List[float]
+    expected_units_sold: List[float]
+    expected_revenue: List[float]
+    price_elasticity: List[float]
+    revenue_impact: List[float]
+    recommendation_code: List[int]
+    expected_profit: Optional[List[float]] = None
+
+class PricingCatalogResponse(BaseModel):
+    columns: PricingCatalogColumns
+    # Text for each bit of recommendation_code
+    recommendation_legend: List[str]
+    summary: Dict[str, Any]
+    strategy: str
+    # One curve per SKU, in product_id order, when include_curves is set
+    profit_curves: Optional[List[ProfitCurve]] = None
 
 class InventoryOptimizationRequest(BaseModel):
     user_id: str
     product_id: str
-    historical_demand: List[TimeSeriesData]
+    historical_demand: Annotated[Series, min_points(1)]
     lead_time_days: int
     holding_cost_per_unit: float
     ordering_cost: float
@@ -119,6 +376,82 @@ class InventoryOptimizationResponse(BaseModel):
     total_cost: float
     recommendations: List[str]
 
+class InventoryCatalogRequest(BaseModel):
+    """A catalog as parallel arrays, one entry per SKU"""
+    user_id: str
+    product_id: List[str] = Field(..., min_length=1, max_length=100000)
+    demand_history: List[List[float]]
+    lead_time_days: List[float]
+    holding_cost_per_unit: List[float]
+    ordering_cost: List[float]
+    # Null entries (or the whole column omitted) mean no stockout cost
+    stockout_cost: Optional[List[Optional[float]]] = None
+
+    @model_validator(mode="after")
+    def check_columns(self) -> "InventoryCatalogRequest":
+        n = len(self.product_id)
+        for name in ("demand_history", "lead_time_days", "holding_cost_per_unit", "ordering_cost", "stockout_cost"):
+            values = getattr(self, name)
+            if values is not None and len(values) != n:
+                raise ValueError(f"{name} has {len(values)} entries, expected {n}")
+        if any(cost <= 0 for cost in self.holding_cost_per_unit):
+            raise ValueError("holding_cost_per_unit must be positive")
+        return self
+
+class InventoryCatalogColumns(BaseModel):
+    product_id: List[str]
+    economic_order_quantity: List[float]
+    reorder_point: List[float]
+    safety_stock: List[float]
+    optimal_stock_level: List[float]
+    annual_holding_cost: List[float]
+    annual_ordering_cost: List[float]
+    total_cost: List[float]
+    order_interval_days: List[float]
+    recommendation_code: List[int]
+
+class InventoryCatalogResponse(BaseModel):
+    columns: InventoryCatalogColumns
+    # Text for each bit of recommendation_code
+    recommendation_legend: List[str]
+    summary: Dict[str, Any]
+
+class InventoryObjective(str, Enum):
+    SERVICE_LEVEL = "service_level"  # smallest safety stock reaching service_level
+    COST = "cost"  # minimize holding + expected stockout cost
+
+class InventorySimulationRequest(InventoryCatalogRequest):
+    # Lead time variability per SKU; omitted means fixed lead times
+    lead_time_std_days: Optional[List[float]] = None
+    objective: InventoryObjective = InventoryObjective.SERVICE_LEVEL
+    service_level: float = Field(default=0.95, ge=0.5, le=0.999)
+    n_scenarios: int = Field(default=DEFAULT_SCENARIOS, ge=100, le=20000)
+    seed: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_lead_time_std(self) -> "InventorySimulationRequest":
+        if self.lead_time_std_days is not None and len(self.lead_time_std_days) != len(self.product_id):
+            raise ValueError(
+                f"lead_time_std_days has {len(self.lead_time_std_days)} entries, expected {len(self.product_id)}"
+            )
+        return self
+
+class InventorySimulationColumns(BaseModel):
+    product_id: List[str]
+    economic_order_quantity: List[float]
+    reorder_point: List[float]
+    safety_stock: List[float]
+    optimal_stock_level: List[float]
+    service_level: List[float]
+    stockout_probability: List[float]
+    total_cost: List[float]
+
+class InventorySimulationResponse(BaseModel):
+    columns: InventorySimulationColumns
+    objective: str
+    n_scenarios: int
+    summary: Dict[str, Any]
+
 class MarketTrendRequest(BaseModel):
     industry: str
     region: str
@@ -146,6 +479,34 @@ class RiskAssessmentResponse(BaseModel):
     risk_factors: List[Dict[str, Any]]
     mitigation_strategies: List[str]
 
+class JobKind(str, Enum):
+    CASHFLOW_FORECAST = "cashflow_forecast"
+    SALES_FORECAST = "sales_forecast"
+    CHURN_PREDICT = "churn_predict"
+    PRICING_CATALOG = "pricing_catalog"
+    INVENTORY_CATALOG = "inventory_catalog"
+    INVENTORY_SIMULATION = "inventory_simulation"
+
+class JobSubmission(BaseModel):
+    kind: JobKind
+    payload: Dict[str, Any]  # the request body of the matching endpoint
+    webhook_url: Optional[HttpUrl] = None  # POSTed the job status when it finishes
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    kind: JobKind
+    status: str  # queued, running, succeeded or failed
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+
 # ============================================================================
 # ML MODELS & ALGORITHMS
 # ============================================================================
@@ -153,32 +514,203 @@ class RiskAssessmentResponse(BaseModel):
 class CashFlowPredictor:
     """Advanced cash flow forecasting using Prophet and ensemble methods"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        fit_pool: Optional[FitPool] = None,
+        model_cache: Optional[ModelCache] = None,
+        warm_starts: Optional[WarmStartStore] = None
+    ):
         self.model = None
-
-    def forecast(self, historical_data: List[TimeSeriesData], periods: int) -> Dict[str, Any]:
-        """Generate cash flow forecast with confidence intervals"""
+        self.fit_pool = fit_pool
+        self.model_cache = model_cache
+        # Last fitted Prophet parameters per business_id, used to warm-start
+        # the next fit when the business's history grows (shared between
+        # workers by forecast_async when the store has Redis)
+        self.warm_starts = warm_starts
+        self._pending_fits: Dict[str, asyncio.Task] = {}
+
+    def forecast(
+        self,
+        historical_data: Series,
+        periods: int,
+        confidence_level: float = 0.95,
+        engine: str = "auto",
+        business_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Generate cash flow forecast with confidence intervals
+
+        When ``business_id`` is given, a Prophet fit warm-starts from that
+        business's previous fit (e.g. after a new monthly observation).
+        """
         try:
-            # Prepare data for Prophet
-            df = pd.DataFrame([
-                {'ds': pd.to_datetime(item.date), 'y': item.value}
-                for item in historical_data
-            ])
-
-            # Initialize and fit Prophet model
-            model = Prophet(
-                yearly_seasonality=True,
-                weekly_seasonality=False,
-                daily_seasonality=False,
-                changepoint_prior_scale=0.05,
-                interval_width=0.95
-            )
-            model.fit(df)
+            requested = ForecastEngine(engine).value
+            with stage("cash_flow", "prepare", requested, len(historical_data)):
+                df = self._prepare_data(historical_data)
+            engine = select_engine(requested, df['ds'].values)
+            if engine in FAST_ENGINES:
+                with stage("cash_flow", "fit_predict", engine, len(df)):
+                    forecast = FAST_ENGINES[engine](df['ds'].values, df['y'].values, periods, confidence_level)
+                return self._summarize(forecast, df, periods, engine)
+
+            key = series_fingerprint(df['ds'].values, df['y'].values, PROPHET_PARAMS)
+
+            with stage("cash_flow", "fit", engine, len(df)):
+                model = self.model_cache.get(key) if self.model_cache is not None else None
+                if model is None:
+                    init = self._warm_start_for(business_id)
+                    model = fit_prophet(df['ds'].values, df['y'].values, init)
+                    if self.model_cache is not None:
+                        self.model_cache.put(key, model)
+            self._remember_fit(business_id, model)
+
+            with stage("cash_flow", "predict", engine, len(df)):
+                forecast = prophet_predict(model, periods, confidence_level)
+            return self._summarize(forecast, df, periods, engine)
+
+        except Exception as e:
+            logger.error(f"Cash flow forecasting error: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Forecasting failed: {str(e)}")
 
-            # Make future dataframe
-            future = model.make_future_dataframe(periods=periods, freq='M')
-            forecast = model.predict(future)
+    async def forecast_async(
+        self,
+        historical_data: Series,
+        periods: int,
+        confidence_level: float = 0.95,
+        engine: str = "auto",
+        business_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Same as forecast() but fits on the fit pool, keeping the event loop free
+
+        The fast engines take milliseconds and run inline. Raises
+        FitPoolSaturated when a Prophet fit is needed and the pool is full.
+        """
+        try:
+            requested = ForecastEngine(engine).value
+            with stage("cash_flow", "prepare", requested, len(historical_data)):
+                df = self._prepare_data(historical_data)
+            engine = select_engine(requested, df['ds'].values)
+            if engine in FAST_ENGINES:
+                with stage("cash_flow", "fit_predict", engine, len(df)):
+                    forecast = FAST_ENGINES[engine](df['ds'].values, df['y'].values, periods, confidence_level)
+                return self._summarize(forecast, df, periods, engine)
+
+            # Includes time queued for a pool worker, or a cache hit
+            with stage("cash_flow", "fit", engine, len(df)):
+                model = await self._get_or_fit_model(df, business_id)
+            await self._remember_fit_async(business_id, model)
+            with stage("cash_flow", "predict", engine, len(df)):
+                forecast = await asyncio.to_thread(prophet_predict, model, periods, confidence_level)
+            return self._summarize(forecast, df, periods, engine)
+
+        except FitPoolSaturated:
+            raise
+        except Exception as e:
+            logger.error(f"Cash flow forecasting error: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Forecasting failed: {str(e)}")
 
+    async def forecast_batch(
+        self,
+        items: List[CashFlowBatchItem],
+        max_concurrency: int
+    ) -> AsyncIterator[Tuple[int, Any]]:
+        """Forecast many series, yielding (index, result or exception) as each finishes
+
+        At most ``max_concurrency`` items are in flight so a large batch cannot
+        take over the whole fit pool; when interactive traffic has saturated the
+        pool, items wait for a slot instead of failing.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_item(index: int, item: CashFlowBatchItem) -> Tuple[int, Any]:
+            async with semaphore:
+                while True:
+                    try:
+                        result = await self.forecast_async(
+                            item.historical_data,
+                            item.forecast_periods,
+                            item.confidence_level,
+                            item.engine,
+                            item.business_id
+                        )
+                        return index, result
+                    except FitPoolSaturated:
+                        await asyncio.sleep(0.5)
+                    except Exception as e:
+                        return index, e
+
+        tasks = [asyncio.create_task(run_item(i, item)) for i, item in enumerate(items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Client went away or iteration stopped early
+            for task in tasks:
+                task.cancel()
+
+    async def _get_or_fit_model(self, df: pd.DataFrame, business_id: Optional[str] = None):
+        """Return a fitted model from cache, fitting on the pool on a miss
+
+        Concurrent requests for the same series share a single fit.
+        """
+        key = series_fingerprint(df['ds'].values, df['y'].values, PROPHET_PARAMS)
+
+        model = self.model_cache.get(key) if self.model_cache is not None else None
+        if model is not None:
+            return model
+
+        fit = self._pending_fits.get(key)
+        if fit is None:
+            init = await self._warm_start_for_async(business_id)
+            # Another request may have started the fit during the lookup
+            fit = self._pending_fits.get(key)
+        if fit is None:
+            fit = asyncio.ensure_future(self._fit_and_cache(key, df, init))
+            self._pending_fits[key] = fit
+            fit.add_done_callback(lambda _: self._pending_fits.pop(key, None))
+
+        # Shield so a disconnecting client doesn't cancel a fit others wait on
+        return await asyncio.shield(fit)
+
+    async def _fit_and_cache(self, key: str, df: pd.DataFrame, init: Optional[Dict[str, Any]]):
+        model = await self.fit_pool.run(fit_prophet, df['ds'].values, df['y'].values, init)
+        if self.model_cache is not None:
+            self.model_cache.put(key, model)
+        return model
+
+    def _warm_start_for(self, business_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        if business_id is None or self.warm_starts is None:
+            return None
+        return self.warm_starts.get(business_id)
+
+    def _remember_fit(self, business_id: Optional[str], model) -> None:
+        if business_id is not None and self.warm_starts is not None:
+            self.warm_starts.put(business_id, warm_start_params(model))
+
+    async def _warm_start_for_async(self, business_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        if business_id is None or self.warm_starts is None:
+            return None
+        return await self.warm_starts.get_async(business_id)
+
+    async def _remember_fit_async(self, business_id: Optional[str], model) -> None:
+        if business_id is not None and self.warm_starts is not None:
+            await self.warm_starts.put_async(business_id, warm_start_params(model))
+
+    def _prepare_data(self, historical_data: Series) -> pd.DataFrame:
+        """Prepare data for Prophet
+
+        Gaps in a regular series are filled by interpolation, since the fast
+        engines treat consecutive points as equally spaced.
+        """
+        series = regularize(Series.coerce(historical_data))
+        return series.frame()
+
+    def _summarize(self, forecast: pd.DataFrame, df: pd.DataFrame, periods: int, engine: str) -> Dict[str, Any]:
+        """Derive trend, seasonality, insights and risk from a forecast frame
+
+        ``forecast`` has Prophet's columns (ds, yhat, yhat_lower, yhat_upper,
+        trend, yearly) covering history plus the future periods.
+        """
+        with stage("cash_flow", "insights", engine, len(df)):
             # Calculate trend
             recent_trend = forecast['trend'].tail(periods).mean()
             historical_trend = forecast['trend'].head(len(df)).mean()
@@ -193,28 +725,26 @@ class CashFlowPredictor:
             # Calculate risk score
             risk_score = self._calculate_risk_score(forecast, df)
 
-            # Format response
-            forecast_data = []
-            for idx in range(len(df), len(forecast)):
-                forecast_data.append({
-                    'date': forecast.iloc[idx]['ds'].strftime('%Y-%m-%d'),
-                    'predicted_value': round(forecast.iloc[idx]['yhat'], 2),
-                    'lower_bound': round(forecast.iloc[idx]['yhat_lower'], 2),
-                    'upper_bound': round(forecast.iloc[idx]['yhat_upper'], 2),
-                    'trend': round(forecast.iloc[idx]['trend'], 2)
-                })
-
-            return {
-                'forecast': forecast_data,
-                'trend': trend_direction,
-                'seasonality_detected': seasonality_detected,
-                'insights': insights,
-                'risk_score': risk_score
+        with stage("cash_flow", "format", engine, len(df)):
+            # Format response: one columnar pass over the future rows
+            future = forecast.iloc[len(df):]
+            values = future[['yhat', 'yhat_lower', 'yhat_upper', 'trend']].round(2)
+            forecast_columns = {
+                'date': future['ds'].dt.strftime('%Y-%m-%d').tolist(),
+                'predicted_value': values['yhat'].tolist(),
+                'lower_bound': values['yhat_lower'].tolist(),
+                'upper_bound': values['yhat_upper'].tolist(),
+                'trend': values['trend'].tolist()
             }
 
-        except Exception as e:
-            logger.error(f"Cash flow forecasting error: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Forecasting failed: {str(e)}")
+        return {
+            'forecast': forecast_columns,
+            'trend': trend_direction,
+            'seasonality_detected': seasonality_detected,
+            'insights': insights,
+            'risk_score': risk_score,
+            'engine': engine
+        }
 
     def _generate_insights(self, forecast: pd.DataFrame, historical: pd.DataFrame, periods: int) -> List[str]:
         """Generate actionable insights from forecast"""
@@ -259,50 +789,199 @@ class CashFlowPredictor:
         return round(risk_score, 2)
 
 
-class DynamicPricingEngine:
-    """ML-powered dynamic pricing optimization"""
+class SalesForecaster:
+    """Random forest sales forecasting with lag, calendar and external features
 
-    def optimize_price(self, request: PricingOptimizationRequest) -> PricingOptimizationResponse:
-        """Calculate optimal price using demand elasticity and competitive analysis"""
-        try:
-            # Calculate price elasticity if not provided
-            if request.elasticity is None:
-                elasticity = self._calculate_price_elasticity(request.historical_demand)
-            else:
-                elasticity = request.elasticity
-
-            # Competitor price analysis
-            avg_competitor_price = np.mean(request.competitor_prices) if request.competitor_prices else request.current_price
-            price_position = request.current_price / avg_competitor_price if avg_competitor_price > 0 else 1.0
+    Forests train on the fit pool when one is given, so concurrent fits are
+    bounded and forecast() raises FitPoolSaturated once it is full.
+    """
 
-            # Calculate optimal price using profit maximization
-            # P* = MC / (1 + 1/e) where e is elasticity
-            marginal_cost = request.cost
+    def __init__(
+        self,
+        fit_pool: Optional[FitPool] = None,
+        model_cache: Optional[ModelCache] = None,
+        n_jobs: int = 1
+    ):
+        self.fit_pool = fit_pool
+        self.model_cache = model_cache
+        self.n_jobs = n_jobs
+        self._pending_fits: Dict[str, asyncio.Future] = {}
+
+    async def forecast(self, request: SalesForecastRequest) -> SalesForecastResponse:
+        # Missing periods had no sales
+        series = regularize(request.historical_sales, how="sum")
+        if len(series) < MIN_SALES_POINTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Sales forecasting needs at least {MIN_SALES_POINTS} periods of history"
+            )
+        freq = infer_frequency(series.ds) or "D"
+        factors = self._factor_arrays(request.external_factors, len(series), request.forecast_horizon)
+        history_factors = {name: values[:len(series)] for name, values in factors.items()}
+
+        model, cached = await self._get_or_fit_model(request.business_id, series, freq, history_factors)
+
+        future_factors = (
+            np.column_stack([factors[name][len(series):] for name in model.factor_names])
+            if model.factor_names else None
+        )
+        forecast = await asyncio.to_thread(
+            model.forecast, request.forecast_horizon, future_factors, request.confidence_level
+        )
+
+        values = forecast[['yhat', 'yhat_lower', 'yhat_upper']].round(2)
+        return SalesForecastResponse(
+            business_id=request.business_id,
+            frequency=freq,
+            forecast=SalesForecastColumns(
+                date=forecast['ds'].dt.strftime('%Y-%m-%d').tolist(),
+                predicted_value=values['yhat'].tolist(),
+                lower_bound=values['yhat_lower'].tolist(),
+                upper_bound=values['yhat_upper'].tolist()
+            ),
+            total_predicted_sales=round(float(forecast['yhat'].sum()), 2),
+            feature_importance=model.feature_importance,
+            cached_model=cached
+        )
+
+    async def _get_or_fit_model(
+        self,
+        business_id: str,
+        series: Series,
+        freq: str,
+        factors: Dict[str, np.ndarray]
+    ) -> Tuple[SalesModel, bool]:
+        """Cached model for this business and exact history, else a fresh fit
+
+        Concurrent requests for the same key share a single fit.
+        """
+        params = {
+            **FOREST_PARAMS,
+            "business_id": business_id,
+            "factors": {name: hashlib.sha256(values.tobytes()).hexdigest() for name, values in factors.items()},
+        }
+        key = series_fingerprint(series.ds, series.y, params)
+
+        model = self.model_cache.get(key) if self.model_cache is not None else None
+        if model is not None:
+            return model, True
+
+        fit = self._pending_fits.get(key)
+        if fit is None:
+            fit = asyncio.ensure_future(self._fit_and_cache(key, series, freq, factors))
+            self._pending_fits[key] = fit
+            fit.add_done_callback(lambda _: self._pending_fits.pop(key, None))
+
+        # Shield so a disconnecting client doesn't cancel a fit others wait on
+        return await asyncio.shield(fit), False
+
+    async def _fit_and_cache(
+        self,
+        key: str,
+        series: Series,
+        freq: str,
+        factors: Dict[str, np.ndarray]
+    ) -> SalesModel:
+        args = (series.ds, series.y, freq, factors, self.n_jobs)
+        if self.fit_pool is not None:
+            model = await self.fit_pool.run(fit_sales_model, *args)
+        else:
+            model = await asyncio.to_thread(fit_sales_model, *args)
+        if self.model_cache is not None:
+            self.model_cache.put(key, model)
+        return model
+
+    @staticmethod
+    def _factor_arrays(external_factors: Optional[Dict[str, Any]], n_history: int, horizon: int) -> Dict[str, np.ndarray]:
+        total = n_history + horizon
+        factors = {}
+        for name, value in (external_factors or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                factors[name] = np.full(total, float(value))
+                continue
+            try:
+                values = np.asarray(value, dtype=np.float64)
+            except (TypeError, ValueError):
+                values = None
+            if values is None or values.shape != (total,) or not np.isfinite(values).all():
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"External factor '{name}' must be a number or {total} finite values "
+                           f"({n_history} history periods + {horizon} forecast periods)"
+                )
+            factors[name] = values
+        return factors
 
-            if abs(elasticity) > 1:  # Elastic demand
-                optimal_price = marginal_cost / (1 + 1/elasticity)
-            else:  # Inelastic demand
-                optimal_price = marginal_cost * 1.5  # Use markup pricing
 
-            # Adjust based on competition
-            if price_position > 1.2:  # We're significantly more expensive
-                optimal_price *= 0.95
-            elif price_position < 0.8:  # We're significantly cheaper
-                optimal_price *= 1.05
+class DynamicPricingEngine:
+    """ML-powered dynamic pricing optimization"""
 
-            # Ensure minimum margin
-            min_price = marginal_cost * 1.1
-            optimal_price = max(optimal_price, min_price)
+    def __init__(self, elasticity_store: Optional[ElasticityStore] = None):
+        # Precomputed per-product elasticity and mean demand; products not in
+        # the store are estimated from the request's demand history
+        self.elasticity_store = elasticity_store
+
+    async def optimize_price_async(self, request: PricingOptimizationRequest) -> PricingOptimizationResponse:
+        """optimize_price() with the product's stored estimate looked up first"""
+        stored = (
+            await self.elasticity_store.lookup(request.user_id, request.product_id)
+            if self.elasticity_store is not None else None
+        )
+        return self.optimize_price(request, stored)
+
+    async def optimize_catalog_async(self, request: PricingCatalogRequest) -> PricingCatalogResponse:
+        """optimize_catalog() on a thread, with the stored estimates looked up first"""
+        stored = (
+            await self.elasticity_store.lookup_many(request.user_id, request.product_id)
+            if self.elasticity_store is not None else None
+        )
+        return await asyncio.to_thread(self.optimize_catalog, request, stored)
+
+    def optimize_price(
+        self,
+        request: PricingOptimizationRequest,
+        stored: Optional[Tuple[float, float]] = None
+    ) -> PricingOptimizationResponse:
+        """Calculate optimal price using demand elasticity and competitive analysis
+
+        ``stored`` is the product's (elasticity, mean demand) from the store.
+        """
+        if stored is None and not request.historical_demand:
+            raise HTTPException(
+                status_code=400,
+                detail=f"No stored demand for product {request.product_id}; historical_demand is required"
+            )
 
-            # Predict demand at optimal price
-            price_change_pct = (optimal_price - request.current_price) / request.current_price
-            avg_demand = np.mean([d.value for d in request.historical_demand])
-            expected_units = avg_demand * (1 + elasticity * price_change_pct)
-            expected_revenue = optimal_price * expected_units
+        try:
+            # Known elasticity, then the store, then estimate from the payload
+            if request.elasticity is not None:
+                elasticity = request.elasticity
+            elif stored is not None:
+                elasticity = stored[0]
+            else:
+                elasticity = self._calculate_price_elasticity(request.historical_demand)
 
-            # Revenue impact
-            current_revenue = request.current_price * avg_demand
-            revenue_impact = ((expected_revenue - current_revenue) / current_revenue) * 100
+            competitor_price = np.mean(request.competitor_prices) if request.competitor_prices else np.nan
+            if request.historical_demand:
+                avg_demand = request.historical_demand.y.mean()
+            else:
+                avg_demand = stored[1]
+
+            result = self._run_strategy(
+                request,
+                current_price=np.array([request.current_price]),
+                cost=np.array([request.cost]),
+                competitor_price=np.array([competitor_price]),
+                avg_demand=np.array([avg_demand]),
+                elasticity=np.array([elasticity], dtype=np.float64),
+                include_curves=True
+            )
+            optimal_price = float(result["optimal_price"][0])
+            expected_units = float(result["expected_units_sold"][0])
+            expected_revenue = float(result["expected_revenue"][0])
+            revenue_impact = float(result["revenue_impact"][0])
+            price_change_pct = float(result["price_change_pct"][0])
+            price_position = float(result["price_position"][0])
 
             # Generate recommendations
             recommendations = []
@@ -325,91 +1004,167 @@ class DynamicPricingEngine:
                 price_elasticity=round(elasticity, 3),
                 revenue_impact=round(revenue_impact, 2),
                 confidence_score=0.85,
-                recommendations=recommendations
+                recommendations=recommendations,
+                strategy=request.strategy.value,
+                expected_profit=round(float(result["expected_profit"][0]), 2)
+                if "expected_profit" in result else None,
+                profit_curve=self._profit_curves(result)[0] if "profit_curve" in result else None
             )
 
         except Exception as e:
             logger.error(f"Pricing optimization error: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
 
-    def _calculate_price_elasticity(self, historical_demand: List[TimeSeriesData]) -> float:
-        """Estimate price elasticity from demand data"""
-        if len(historical_demand) < 3:
-            return -1.5  # Default elasticity
+    def optimize_catalog(
+        self,
+        request: PricingCatalogRequest,
+        stored: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    ) -> PricingCatalogResponse:
+        """Price a whole catalog in one vectorized pass
+
+        ``stored`` is the (elasticity, mean demand) arrays from the store, NaN
+        where a product has no estimate.
+        """
+        n = len(request.product_id)
+        strategy = request.strategy.value
+        with stage("pricing", "prepare", strategy, n):
+            demand = ragged_stats(request.demand_history or [[]] * n)
+
+            # Precedence per SKU: known elasticity, stored estimate, then an
+            # estimate from the request's own demand history
+            elasticity = volatility_elasticity(demand["count"], demand["mean"], demand["std"])
+            avg_demand = demand["mean"]
+            if stored is not None:
+                stored_elasticity, stored_demand = stored
+                elasticity = np.where(np.isnan(stored_elasticity), elasticity, stored_elasticity)
+                avg_demand = np.where((demand["count"] == 0) & ~np.isnan(stored_demand), stored_demand, avg_demand)
+            if request.elasticity is not None:
+                known = np.array(request.elasticity, dtype=np.float64)  # None -> NaN
+                elasticity = np.where(np.isnan(known), elasticity, known)
+
+            competitor_price = (
+                np.array(request.competitor_price, dtype=np.float64)
+                if request.competitor_price is not None else np.full(n, np.nan)
+            )
 
-        # Simple elasticity estimation
-        values = [d.value for d in historical_demand]
-        changes = np.diff(values)
-        avg_change = np.mean(changes)
-        volatility = np.std(values)
+        result = self._run_strategy(
+            request,
+            current_price=np.array(request.current_price, dtype=np.float64),
+            cost=np.array(request.cost, dtype=np.float64),
+            competitor_price=competitor_price,
+            avg_demand=avg_demand,
+            elasticity=elasticity,
+            include_curves=request.include_curves
+        )
+
+        current_revenue = float(result["current_revenue"].sum())
+        expected_revenue = float(result["expected_revenue"].sum())
+
+        with stage("pricing", "serialize", strategy, n):
+            return PricingCatalogResponse(
+                columns=PricingCatalogColumns(
+                    product_id=request.product_id,
+                    optimal_price=np.round(result["optimal_price"], 2).tolist(),
+                    expected_units_sold=np.round(result["expected_units_sold"], 2).tolist(),
+                    expected_revenue=np.round(result["expected_revenue"], 2).tolist(),
+                    price_elasticity=np.round(result["price_elasticity"], 3).tolist(),
+                    revenue_impact=np.round(result["revenue_impact"], 2).tolist(),
+                    recommendation_code=recommendation_codes(result).tolist(),
+                    expected_profit=np.round(result["expected_profit"], 2).tolist()
+                    if "expected_profit" in result else None,
+                ),
+                recommendation_legend=PRICING_RECOMMENDATION_RULES,
+                summary={
+                    "total_products": n,
+                    "price_increases": int((result["price_change_pct"] > 0).sum()),
+                    "price_decreases": int((result["price_change_pct"] < 0).sum()),
+                    "current_revenue": round(current_revenue, 2),
+                    "expected_revenue": round(expected_revenue, 2),
+                    "revenue_impact": round((expected_revenue - current_revenue) / current_revenue * 100, 2)
+                    if current_revenue else 0.0,
+                },
+                strategy=strategy,
+                profit_curves=self._profit_curves(result) if "profit_curve" in result else None
+            )
 
-        # Higher volatility suggests higher elasticity
-        elasticity = -1 - (volatility / (np.mean(values) + 1))
-        return max(elasticity, -5)  # Cap at -5
+    def _run_strategy(self, request: Any, include_curves: bool, **arrays: np.ndarray) -> Dict[str, np.ndarray]:
+        """Dispatch the price arrays to the requested strategy's kernel"""
+        with stage("pricing", "optimize", request.strategy.value, len(arrays["current_price"])):
+            if request.strategy == PricingStrategy.GRID:
+                return grid_search_prices(
+                    **arrays,
+                    grid_size=request.grid_size,
+                    competitor_band=request.competitor_band,
+                    include_curves=include_curves
+                )
+            return optimize_prices(**arrays)
+
+    @staticmethod
+    def _profit_curves(result: Dict[str, np.ndarray]) -> List[ProfitCurve]:
+        return [
+            ProfitCurve(price=prices, profit=profits)
+            for prices, profits in zip(
+                np.round(result["price_grid"], 2).tolist(),
+                np.round(result["profit_curve"], 2).tolist()
+            )
+        ]
+
+    def _calculate_price_elasticity(self, historical_demand: Series) -> float:
+        """Estimate price elasticity from demand data"""
+        values = historical_demand.y
+        elasticity = volatility_elasticity(
+            np.array([len(values)]),
+            np.array([values.mean() if len(values) else 0.0]),
+            np.array([values.std() if len(values) else 0.0]),
+        )
+        return float(elasticity[0])
 
 
 class InventoryOptimizer:
     """Advanced inventory optimization using EOQ and demand forecasting"""
 
+    def __init__(self, simulation_pool: Optional[FitPool] = None, chunk_size: int = 500):
+        # Monte Carlo chunks run on this pool; None runs them on a thread
+        self.simulation_pool = simulation_pool
+        self.chunk_size = chunk_size
+
     def optimize(self, request: InventoryOptimizationRequest) -> InventoryOptimizationResponse:
         """Calculate optimal inventory levels"""
         try:
             # Calculate average demand and standard deviation
-            demand_values = [d.value for d in request.historical_demand]
-            avg_demand_per_period = np.mean(demand_values)
-            std_demand = np.std(demand_values)
-
-            # Annual demand
-            annual_demand = avg_demand_per_period * 12
-
-            # Economic Order Quantity (EOQ)
-            # EOQ = sqrt((2 * D * S) / H)
-            # D = annual demand, S = ordering cost, H = holding cost
-            eoq = np.sqrt((2 * annual_demand * request.ordering_cost) / request.holding_cost_per_unit)
-
-            # Safety stock (using z-score for 95% service level)
-            z_score = 1.65  # 95% service level
-            safety_stock = z_score * std_demand * np.sqrt(request.lead_time_days / 30)
-
-            # Reorder point
-            avg_lead_time_demand = avg_demand_per_period * (request.lead_time_days / 30)
-            reorder_point = avg_lead_time_demand + safety_stock
-
-            # Optimal stock level
-            optimal_stock = reorder_point + (eoq / 2)
-
-            # Calculate costs
-            annual_holding_cost = (eoq / 2 + safety_stock) * request.holding_cost_per_unit
-            annual_ordering_cost = (annual_demand / eoq) * request.ordering_cost
-            total_cost = annual_holding_cost + annual_ordering_cost
-
-            # Add stockout cost if provided
-            if request.stockout_cost:
-                # Probability of stockout
-                stockout_probability = 0.05  # 5% with 95% service level
-                expected_stockout_cost = stockout_probability * request.stockout_cost * (annual_demand / eoq)
-                total_cost += expected_stockout_cost
+            demand_values = request.historical_demand.y
+            avg_demand_per_period = demand_values.mean()
+            std_demand = demand_values.std()
+
+            with stage("inventory", "optimize", "eoq", 1):
+                result = optimize_stock_levels(
+                    avg_demand=np.array([avg_demand_per_period]),
+                    std_demand=np.array([std_demand]),
+                    lead_time_days=np.array([request.lead_time_days], dtype=np.float64),
+                    holding_cost=np.array([request.holding_cost_per_unit]),
+                    ordering_cost=np.array([request.ordering_cost]),
+                    stockout_cost=np.array([request.stockout_cost or np.nan]),
+                )
+            values = {name: float(column[0]) for name, column in result.items()}
+            eoq = values["economic_order_quantity"]
+            reorder_point = values["reorder_point"]
+            code = int(inventory_recommendation_codes(result)[0])
 
             # Generate recommendations
-            recommendations = []
-
-            if safety_stock / avg_lead_time_demand > 0.5:
-                recommendations.append("High safety stock needed due to demand volatility - consider supplier diversification")
-
-            if eoq > avg_demand_per_period * 3:
-                recommendations.append("Large order quantities recommended - negotiate volume discounts")
-
-            recommendations.append(f"Order {int(eoq)} units every {int(365 * eoq / annual_demand)} days")
+            recommendations = [
+                text for bit, text in enumerate(INVENTORY_RECOMMENDATION_RULES) if code >> bit & 1
+            ]
+            recommendations.append(f"Order {int(eoq)} units every {int(values['order_interval_days'])} days")
             recommendations.append(f"Reorder when inventory reaches {int(reorder_point)} units")
 
             return InventoryOptimizationResponse(
                 economic_order_quantity=round(eoq, 2),
                 reorder_point=round(reorder_point, 2),
-                safety_stock=round(safety_stock, 2),
-                optimal_stock_level=round(optimal_stock, 2),
-                annual_holding_cost=round(annual_holding_cost, 2),
-                annual_ordering_cost=round(annual_ordering_cost, 2),
-                total_cost=round(total_cost, 2),
+                safety_stock=round(values["safety_stock"], 2),
+                optimal_stock_level=round(values["optimal_stock_level"], 2),
+                annual_holding_cost=round(values["annual_holding_cost"], 2),
+                annual_ordering_cost=round(values["annual_ordering_cost"], 2),
+                total_cost=round(values["total_cost"], 2),
                 recommendations=recommendations
             )
 
@@ -417,86 +1172,470 @@ class InventoryOptimizer:
             logger.error(f"Inventory optimization error: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
 
+    def optimize_catalog(
+        self,
+        product_id: List[str],
+        avg_demand: np.ndarray,
+        std_demand: np.ndarray,
+        lead_time_days: np.ndarray,
+        holding_cost: np.ndarray,
+        ordering_cost: np.ndarray,
+        stockout_cost: np.ndarray
+    ) -> InventoryCatalogResponse:
+        """Optimize a whole catalog in one vectorized pass"""
+        n = len(product_id)
+        with stage("inventory", "optimize", "eoq", n):
+            result = optimize_stock_levels(
+                avg_demand=avg_demand,
+                std_demand=std_demand,
+                lead_time_days=lead_time_days,
+                holding_cost=holding_cost,
+                ordering_cost=ordering_cost,
+                stockout_cost=stockout_cost,
+            )
+
+        def column(name: str) -> List[float]:
+            return np.round(result[name], 2).tolist()
+
+        with stage("inventory", "serialize", "eoq", n):
+            return InventoryCatalogResponse(
+                columns=InventoryCatalogColumns(
+                    product_id=list(product_id),
+                    economic_order_quantity=column("economic_order_quantity"),
+                    reorder_point=column("reorder_point"),
+                    safety_stock=column("safety_stock"),
+                    optimal_stock_level=column("optimal_stock_level"),
+                    annual_holding_cost=column("annual_holding_cost"),
+                    annual_ordering_cost=column("annual_ordering_cost"),
+                    total_cost=column("total_cost"),
+                    order_interval_days=column("order_interval_days"),
+                    recommendation_code=inventory_recommendation_codes(result).tolist(),
+                ),
+                recommendation_legend=INVENTORY_RECOMMENDATION_RULES,
+                summary={
+                    "total_products": n,
+                    "total_annual_cost": round(float(result["total_cost"].sum()), 2),
+                    "total_safety_stock": round(float(result["safety_stock"].sum()), 2),
+                    "total_optimal_stock": round(float(result["optimal_stock_level"].sum()), 2),
+                }
+            )
+
+    async def simulate(self, request: InventorySimulationRequest) -> InventorySimulationResponse:
+        """Monte Carlo safety stock for a catalog, chunked across the simulation pool
+
+        Raises FitPoolSaturated when the pool cannot take the chunks.
+        """
+        n = len(request.product_id)
+        with stage("inventory", "prepare", "monte_carlo", n):
+            demand = ragged_stats(request.demand_history)
+            arrays = [
+                demand["mean"],
+                demand["std"],
+                np.array(request.lead_time_days, dtype=np.float64),
+                np.array(request.lead_time_std_days or np.zeros(n), dtype=np.float64),
+                np.array(request.holding_cost_per_unit, dtype=np.float64),
+                np.array(request.ordering_cost, dtype=np.float64),
+                np.array(request.stockout_cost, dtype=np.float64)
+                if request.stockout_cost is not None else np.full(n, np.nan),
+            ]
+        service_level = request.service_level if request.objective == InventoryObjective.SERVICE_LEVEL else None
+
+        starts = range(0, n, self.chunk_size)
+        seeds = np.random.SeedSequence(request.seed).spawn(len(starts))
+
+        # Bound this request's in-flight chunks to the worker count so a big
+        # catalog queues behind itself instead of saturating the pool
+        workers = self.simulation_pool.workers if self.simulation_pool is not None else 1
+        semaphore = asyncio.Semaphore(max(workers, 1))
+
+        async def run_chunk(start: int, seed: np.random.SeedSequence) -> Dict[str, np.ndarray]:
+            args = [a[start:start + self.chunk_size] for a in arrays] + [service_level, request.n_scenarios, seed]
+            async with semaphore:
+                if self.simulation_pool is None:
+                    return await asyncio.to_thread(simulate_safety_stock, *args)
+                return await self.simulation_pool.run(simulate_safety_stock, *args)
+
+        with stage("inventory", "simulate", "monte_carlo", n):
+            chunks = await asyncio.gather(*(run_chunk(start, seed) for start, seed in zip(starts, seeds)))
+            result = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+        def column(name: str, decimals: int = 2) -> List[float]:
+            return np.round(result[name], decimals).tolist()
+
+        with stage("inventory", "serialize", "monte_carlo", n):
+            return InventorySimulationResponse(
+                columns=InventorySimulationColumns(
+                    product_id=request.product_id,
+                    economic_order_quantity=column("economic_order_quantity"),
+                    reorder_point=column("reorder_point"),
+                    safety_stock=column("safety_stock"),
+                    optimal_stock_level=column("optimal_stock_level"),
+                    service_level=column("service_level", 4),
+                    stockout_probability=column("stockout_probability", 4),
+                    total_cost=column("total_cost"),
+                ),
+                objective=request.objective.value,
+                n_scenarios=request.n_scenarios,
+                summary={
+                    "total_products": n,
+                    "avg_service_level": round(float(result["service_level"].mean()), 4),
+                    "total_safety_stock": round(float(result["safety_stock"].sum()), 2),
+                    "total_annual_cost": round(float(result["total_cost"].sum()), 2),
+                }
+            )
+
 
 class ChurnPredictor:
     """ML-based customer churn prediction"""
 
-    def __init__(self):
-        self.model = None
+    # Retention recommendations; rule i fires when bit i is set in a row's
+    # recommendation code (see _recommendation_codes)
+    RECOMMENDATION_RULES = [
+        ["Send personalized win-back email campaign", "Offer exclusive discount or loyalty reward"],
+        ["Trigger re-engagement workflow"],
+        ["Provide onboarding support to increase product adoption"],
+        ["Offer personalized product recommendations"],
+    ]
+
+    def __init__(
+        self,
+        model: Optional[ChurnModelArtifact] = None,
+        batch_size: int = 50000,
+        model_loader: Optional[Callable[[], Optional[ChurnModelArtifact]]] = None
+    ):
+        # Trained model artifact; None falls back to the rule-based score.
+        # With a model_loader the artifact is loaded on first use (or warm-up).
+        self._model = model
+        self._model_loader = model_loader
+        self._load_lock = threading.Lock()
+        self.batch_size = batch_size
+        # One shared recommendation list per combination of rule flags
+        self._recommendations_by_code = [
+            [text for bit, texts in enumerate(self.RECOMMENDATION_RULES) if code >> bit & 1 for text in texts]
+            for code in range(1 << len(self.RECOMMENDATION_RULES))
+        ]
 
     def predict_churn(self, customers: List[Dict[str, Any]]) -> List[CustomerChurnResponse]:
         """Predict customer churn probability and LTV"""
-        results = []
+        return [CustomerChurnResponse(**record) for record in self.to_records(self.score(customers))]
+
+    def score(self, customers: Any) -> pd.DataFrame:
+        """Score a batch of customers with whole-column operations
+
+        ``customers`` is a list of dicts or a DataFrame with one row per
+        customer. Returns a frame with customer_id, churn_probability (rounded),
+        risk_level, lifetime_value_prediction (rounded) and recommendation_code.
+        """
+        engine = self.engine
+        with stage("churn", "features", engine, len(customers)):
+            frame = customers if isinstance(customers, pd.DataFrame) else pd.DataFrame.from_records(customers)
+            n = len(frame)
+
+            features = extract_features(frame)
+            recency = features['days_since_last_purchase']
+            frequency = features['purchase_count']
+            engagement_score = features['engagement_score']
+
+        with stage("churn", "predict", engine, n):
+            if self.model is not None:
+                churn_probability = self.model.predict_proba(features, self.batch_size)
+            else:
+                churn_probability = self.rule_probability(features)
 
-        for customer in customers:
-            # Feature engineering
-            recency = customer.get('days_since_last_purchase', 30)
-            frequency = customer.get('purchase_count', 0)
-            monetary = customer.get('total_spent', 0)
-            avg_order_value = monetary / frequency if frequency > 0 else 0
+        with stage("churn", "postprocess", engine, n):
+            # Risk level
+            risk_level = np.select(
+                [churn_probability > 0.7, churn_probability > 0.4],
+                ["HIGH", "MEDIUM"],
+                default="LOW"
+            )
 
-            # Simple rule-based churn prediction (in production, use ML model)
-            churn_score = 0
+            # Predict lifetime value
+            # LTV = avg_order_value * purchase_frequency * customer_lifetime
+            avg_lifetime_months = 24 * (1 - churn_probability)
+            ltv = features['avg_order_value'] * features['monthly_frequency'] * avg_lifetime_months
 
-            if recency > 90:
-                churn_score += 0.4
-            elif recency > 60:
-                churn_score += 0.2
+            if 'customer_id' in frame:
+                customer_id = frame['customer_id'].fillna('unknown').astype(str).to_numpy()
+            else:
+                customer_id = np.full(n, 'unknown', dtype=object)
+
+            return pd.DataFrame({
+                'customer_id': customer_id,
+                'churn_probability': np.round(churn_probability, 3),
+                'risk_level': risk_level,
+                'lifetime_value_prediction': np.round(ltv, 2),
+                'recommendation_code': self._recommendation_codes(
+                    churn_probability, recency, frequency, engagement_score
+                ),
+            })
+
+    @staticmethod
+    def rule_probability(features: Dict[str, np.ndarray]) -> np.ndarray:
+        """Rule-based churn probability, used when no trained model is loaded"""
+        recency = features['days_since_last_purchase']
+        churn_score = np.where(recency > 90, 0.4, np.where(recency > 60, 0.2, 0.0))
+        churn_score += np.where(features['purchase_count'] < 2, 0.3, 0.0)
+        churn_score += np.where(features['total_spent'] < 100, 0.2, 0.0)
+        churn_score += np.where(features['engagement_score'] < 30, 0.3, 0.0)
+        return np.minimum(churn_score, 0.95)
+
+    @property
+    def model(self) -> Optional[ChurnModelArtifact]:
+        if self._model_loader is not None:
+            with self._load_lock:
+                if self._model_loader is not None:
+                    self._model = self._model_loader()
+                    self._model_loader = None
+        return self._model
+
+    @property
+    def model_version(self) -> str:
+        if self._model_loader is not None:
+            return "not loaded"
+        return self._model.version if self._model is not None else "rules"
+
+    @property
+    def engine(self) -> str:
+        """Metric label: "model" or "rules" (versions would grow label cardinality)"""
+        return "model" if self.model is not None else "rules"
+
+    def _recommendation_codes(self, churn_probability, recency, frequency, engagement_score) -> np.ndarray:
+        """Bitmask of the retention rules that fire for each customer"""
+        flags = [
+            churn_probability > 0.5,
+            recency > 60,
+            frequency < 3,
+            engagement_score < 40,
+        ]
+        codes = np.zeros(len(churn_probability), dtype=np.int64)
+        for bit, flag in enumerate(flags):
+            codes |= flag.astype(np.int64) << bit
+        return codes
+
+    def to_records(self, scores: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Expand scored columns into CustomerChurnResponse-shaped dicts"""
+        recommendations = self._recommendations_by_code
+        with stage("churn", "serialize", self.engine, len(scores)):
+            return [
+                {
+                    'customer_id': customer_id,
+                    'churn_probability': probability,
+                    'risk_level': risk_level,
+                    'retention_recommendations': recommendations[code],
+                    'lifetime_value_prediction': ltv,
+                }
+                for customer_id, probability, risk_level, ltv, code in zip(
+                    scores['customer_id'].tolist(),
+                    scores['churn_probability'].tolist(),
+                    scores['risk_level'].tolist(),
+                    scores['lifetime_value_prediction'].tolist(),
+                    scores['recommendation_code'].tolist(),
+                )
+            ]
+
+    def summarize(self, scores: pd.DataFrame) -> Dict[str, Any]:
+        """Portfolio summary computed from the scored columns"""
+        return self.summary_from_totals(self.summary_totals(scores))
+
+    def summary_totals(self, scores: pd.DataFrame) -> Dict[str, float]:
+        """Additive per-batch totals; sum them across chunks for streamed scoring"""
+        risk_level = scores['risk_level'].to_numpy()
+        at_risk = risk_level != "LOW"
+
+        return {
+            "total_customers": len(scores),
+            "high_risk": int((risk_level == "HIGH").sum()),
+            "medium_risk": int((risk_level == "MEDIUM").sum()),
+            "low_risk": int((~at_risk).sum()),
+            "churn_probability_sum": float(scores['churn_probability'].to_numpy().sum()),
+            "at_risk_ltv": float(scores['lifetime_value_prediction'].to_numpy()[at_risk].sum()),
+        }
 
-            if frequency < 2:
-                churn_score += 0.3
+    def summary_from_totals(self, totals: Dict[str, float]) -> Dict[str, Any]:
+        total = totals["total_customers"]
+        return {
+            "total_customers": total,
+            "high_risk": totals["high_risk"],
+            "medium_risk": totals["medium_risk"],
+            "low_risk": totals["low_risk"],
+            "avg_churn_probability": round(totals["churn_probability_sum"] / total, 3) if total else 0.0,
+            "total_at_risk_ltv": round(totals["at_risk_ltv"], 2),
+            "model_version": self.model_version
+        }
 
-            if monetary < 100:
-                churn_score += 0.2
 
-            engagement_score = customer.get('engagement_score', 50)
-            if engagement_score < 30:
-                churn_score += 0.3
+class MarketScorer:
+    """Deterministic market trend and business risk scoring
 
-            churn_probability = min(churn_score, 0.95)
+    Scores come from the reference table; responses are cached on the
+    normalized inputs (plus the table version), so repeat queries are a dict
+    lookup and identical inputs always get identical answers.
+    """
 
-            # Risk level
-            if churn_probability > 0.7:
-                risk_level = "HIGH"
-            elif churn_probability > 0.4:
-                risk_level = "MEDIUM"
-            else:
-                risk_level = "LOW"
+    MITIGATION_STRATEGIES = [
+        "Improve working capital management",
+        "Diversify revenue streams",
+        "Implement cost control measures",
+        "Build strategic cash reserves"
+    ]
+
+    def __init__(self, reference: MarketReference, cache: Optional[ModelCache] = None):
+        self.reference = reference
+        self.cache = cache
+
+    def analyze_trends(self, request: MarketTrendRequest) -> MarketTrendResponse:
+        key = (normalize_key(request.industry), normalize_key(request.region), normalize_keywords(request.keywords))
+        return self._cached(
+            ["trend", *key],
+            lambda: MarketTrendResponse(**score_market_trend(self.reference, *key))
+        )
+
+    def assess_risk(self, request: RiskAssessmentRequest) -> RiskAssessmentResponse:
+        try:
+            ratios = financial_inputs(request.financial_data)
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid financial_data: {str(e)}")
+        market_data = request.market_data or {}
+        segment = (normalize_key(str(market_data.get("industry", ""))), normalize_key(str(market_data.get("region", ""))))
+
+        return self._cached(
+            ["risk", *ratios, *segment],
+            lambda: RiskAssessmentResponse(
+                **score_business_risk(self.reference, *ratios, *segment),
+                mitigation_strategies=self.MITIGATION_STRATEGIES
+            )
+        )
+
+    def _cached(self, key: List[Any], compute: Callable[[], BaseModel]) -> Any:
+        if self.cache is None:
+            return compute()
+        cache_key = json.dumps([self.reference.version, *key])
+        response = self.cache.get(cache_key)
+        if response is None:
+            response = compute()
+            self.cache.put(cache_key, response)
+        return response
+
+
+# Request models accepted as JSON, Arrow IPC or .npz (see app.core.binary)
+NEGOTIATED_REQUEST_MODELS = [
+    CashFlowForecastRequest,
+    SalesForecastRequest,
+    PricingOptimizationRequest,
+    PricingCatalogRequest,
+    InventoryOptimizationRequest,
+    InventoryCatalogRequest,
+    InventorySimulationRequest,
+]
+
+# Shared between uvicorn workers; None keeps that state per process
+shared_redis = create_redis(settings)
+if shared_redis is None and settings.WEB_CONCURRENCY > 1:
+    logger.warning(
+        f"REDIS_HOST is not set: job status, uploaded demand history and warm starts are per process, "
+        f"so with {settings.WEB_CONCURRENCY} workers a request can miss state held by another worker"
+    )
 
-            # Predict lifetime value
-            # LTV = avg_order_value * purchase_frequency * customer_lifetime
-            avg_lifetime_months = 24 * (1 - churn_probability)
-            monthly_frequency = frequency / max(customer.get('customer_age_days', 365) / 30, 1)
-            ltv = avg_order_value * monthly_frequency * avg_lifetime_months
+# Initialize ML models
+fit_pool = FitPool(
+    workers=settings.FIT_POOL_WORKERS,
+    max_queue=settings.FIT_POOL_MAX_QUEUE,
+    retry_after=settings.FIT_POOL_RETRY_AFTER
+)
+model_cache = ModelCache(
+    max_entries=settings.MODEL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.MODEL_CACHE_TTL,
+    max_bytes=settings.MODEL_CACHE_MAX_MB * 1024 * 1024
+)
+warm_start_cache = WarmStartStore(
+    ModelCache(
+        max_entries=settings.WARM_START_MAX_ENTRIES,
+        ttl_seconds=settings.WARM_START_TTL,
+        max_bytes=settings.WARM_START_MAX_MB * 1024 * 1024
+    ),
+    redis=shared_redis
+)
+cash_flow_predictor = CashFlowPredictor(
+    fit_pool=fit_pool,
+    model_cache=model_cache,
+    warm_starts=warm_start_cache
+)
+sales_model_cache = ModelCache(
+    max_entries=settings.SALES_MODEL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.MODEL_CACHE_TTL,
+    max_bytes=settings.SALES_MODEL_CACHE_MAX_MB * 1024 * 1024
+)
+sales_forecaster = SalesForecaster(
+    fit_pool=fit_pool,
+    model_cache=sales_model_cache,
+    n_jobs=settings.SALES_MODEL_N_JOBS
+)
+if shared_redis is not None:
+    elasticity_store: ElasticityStore = RedisElasticityStore(
+        shared_redis,
+        max_history=settings.ELASTICITY_MAX_HISTORY,
+        max_products=settings.ELASTICITY_MAX_PRODUCTS
+    )
+else:
+    elasticity_store = MemoryElasticityStore(
+        max_history=settings.ELASTICITY_MAX_HISTORY,
+        max_products=settings.ELASTICITY_MAX_PRODUCTS
+    )
+pricing_engine = DynamicPricingEngine(elasticity_store=elasticity_store)
+simulation_pool = FitPool(
+    workers=settings.SIMULATION_POOL_WORKERS,
+    max_queue=settings.SIMULATION_POOL_MAX_QUEUE,
+    retry_after=settings.FIT_POOL_RETRY_AFTER
+)
+inventory_optimizer = InventoryOptimizer(
+    simulation_pool=simulation_pool,
+    chunk_size=settings.SIMULATION_CHUNK_SIZE
+)
+churn_predictor = ChurnPredictor(
+    model_loader=partial(load_artifact, settings.CHURN_MODEL_DIR, settings.CHURN_MODEL_VERSION),
+    batch_size=settings.CHURN_INFERENCE_BATCH
+)
+market_scorer = MarketScorer(
+    reference=MarketReference.load(settings.MARKET_REFERENCE_PATH),
+    cache=ModelCache(
+        max_entries=settings.MARKET_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.MARKET_CACHE_TTL,
+        max_bytes=settings.MARKET_CACHE_MAX_MB * 1024 * 1024
+    )
+)
+job_manager = JobManager(
+    workers=settings.JOB_WORKERS,
+    max_queue=settings.JOB_QUEUE_MAX,
+    result_ttl=settings.JOB_RESULT_TTL,
+    retry_after=settings.FIT_POOL_RETRY_AFTER,
+    webhook_timeout=settings.JOB_WEBHOOK_TIMEOUT,
+    webhook_allowed_hosts=settings.JOB_WEBHOOK_ALLOWED_HOSTS,
+    store=RedisJobStore(shared_redis) if shared_redis is not None else MemoryJobStore(),
+    pending_ttl=settings.JOB_PENDING_TTL
+)
 
-            # Retention recommendations
-            recommendations = []
-            if churn_probability > 0.5:
-                recommendations.append("Send personalized win-back email campaign")
-                recommendations.append("Offer exclusive discount or loyalty reward")
-            if recency > 60:
-                recommendations.append("Trigger re-engagement workflow")
-            if frequency < 3:
-                recommendations.append("Provide onboarding support to increase product adoption")
-            if engagement_score < 40:
-                recommendations.append("Offer personalized product recommendations")
-
-            results.append(CustomerChurnResponse(
-                customer_id=customer.get('customer_id', 'unknown'),
-                churn_probability=round(churn_probability, 3),
-                risk_level=risk_level,
-                retention_recommendations=recommendations,
-                lifetime_value_prediction=round(ltv, 2)
-            ))
-
-        return results
+warmup = Warmup()
 
 
-# Initialize ML models
-cash_flow_predictor = CashFlowPredictor()
-pricing_engine = DynamicPricingEngine()
-inventory_optimizer = InventoryOptimizer()
-churn_predictor = ChurnPredictor()
+def warmup_steps() -> Dict[str, WarmupStep]:
+    """Import heavy libraries and fit tiny models before real traffic arrives"""
+
+    async def on_every_fit_worker(fn) -> None:
+        # One call per worker; concurrent submissions start every process
+        await asyncio.gather(*(fit_pool.run(fn) for _ in range(max(fit_pool.workers, 1))))
+
+    async def prophet() -> None:
+        await on_every_fit_worker(warm_up_forecasting)
+
+    async def sales() -> None:
+        # Sales forests are fitted on the pool too (SalesForecaster._fit_and_cache)
+        await on_every_fit_worker(warm_up_sales)
+
+    async def churn_model() -> None:
+        await asyncio.to_thread(lambda: churn_predictor.model)
+
+    return {"prophet": prophet, "sales": sales, "churn_model": churn_model}
 
 # ============================================================================
 # API ENDPOINTS
@@ -508,20 +1647,34 @@ async def health_check():
         "status": "healthy",
         "service": "ml-engine",
         "version": "2.0.0",
+        "fit_pool": fit_pool.stats(),
+        "simulation_pool": simulation_pool.stats(),
+        "model_cache": model_cache.stats(),
+        "sales_model_cache": sales_model_cache.stats(),
+        "warm_starts": warm_start_cache.stats(),
+        "churn_model": churn_predictor.model_version,
+        "elasticity_store": await elasticity_store.stats(),
+        "market_cache": market_scorer.cache.stats(),
+        "warmup": warmup.stats(),
+        "jobs": job_manager.stats(),
         "timestamp": datetime.now().isoformat()
     }
 
-@app.post("/api/v1/ml/forecast/cashflow", response_model=CashFlowForecastResponse)
-async def forecast_cash_flow(request: CashFlowForecastRequest):
-    """
-    Advanced cash flow forecasting using Prophet and ensemble methods
-    Provides confidence intervals, trend analysis, and actionable insights
-    """
-    logger.info(f"Cash flow forecast request for business: {request.business_id}")
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 503 until the background warm-up has finished"""
+    body = {"status": "ready" if warmup.ready else "warming_up", "warmup": warmup.stats()}
+    return JSONResponse(status_code=200 if warmup.ready else 503, content=body)
 
-    result = cash_flow_predictor.forecast(request.historical_data, request.forecast_periods)
+def build_cash_flow_response(
+    result: Dict[str, Any],
+    response_format: ForecastFormat = ForecastFormat.RECORDS
+) -> CashFlowForecastResponse:
+    """Attach risk-based recommended actions to a CashFlowPredictor result
 
-    # Generate recommended actions based on risk score
+    ``result['forecast']`` is columnar; it is returned as-is in ``columns`` for
+    the columnar format, or expanded into one dict per period for records.
+    """
     recommended_actions = []
     if result['risk_score'] > 70:
         recommended_actions.extend([
@@ -542,28 +1695,172 @@ async def forecast_cash_flow(request: CashFlowForecastRequest):
             "Maintain current financial discipline"
         ])
 
-    return CashFlowForecastResponse(
-        forecast=result['forecast'],
-        trend=result['trend'],
-        seasonality_detected=result['seasonality_detected'],
-        confidence_intervals=result['forecast'],
-        insights=result['insights'],
-        risk_score=result['risk_score'],
-        recommended_actions=recommended_actions
-    )
+    columns = result['forecast']
+    with stage("cash_flow", "serialize", result['engine'], len(columns['date'])):
+        if response_format == ForecastFormat.COLUMNAR:
+            forecast_data = []
+            forecast_columns = ForecastColumns(**columns)
+        else:
+            forecast_data = [dict(zip(columns, row)) for row in zip(*columns.values())]
+            forecast_columns = None
+
+        return CashFlowForecastResponse(
+            forecast=forecast_data,
+            trend=result['trend'],
+            seasonality_detected=result['seasonality_detected'],
+            confidence_intervals=forecast_data,
+            insights=result['insights'],
+            risk_score=result['risk_score'],
+            recommended_actions=recommended_actions,
+            engine=result['engine'],
+            columns=forecast_columns
+        )
+
+@app.post(
+    "/api/v1/ml/forecast/cashflow",
+    response_model=CashFlowForecastResponse,
+    openapi_extra=negotiated_openapi(CashFlowForecastRequest)
+)
+async def forecast_cash_flow(request: CashFlowForecastRequest = Depends(negotiated_body(CashFlowForecastRequest))):
+    """
+    Advanced cash flow forecasting using Prophet and ensemble methods
+    Provides confidence intervals, trend analysis, and actionable insights
+    """
+    logger.info(f"Cash flow forecast request for business: {request.business_id}")
 
-@app.post("/api/v1/ml/pricing/optimize", response_model=PricingOptimizationResponse)
-async def optimize_pricing(request: PricingOptimizationRequest):
+    try:
+        result = await cash_flow_predictor.forecast_async(
+            request.historical_data,
+            request.forecast_periods,
+            request.confidence_level,
+            request.engine,
+            request.business_id
+        )
+    except FitPoolSaturated as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Forecasting capacity exhausted, please retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    return build_cash_flow_response(result, request.response_format)
+
+@app.post(
+    "/api/v1/ml/forecast/sales",
+    response_model=SalesForecastResponse,
+    openapi_extra=negotiated_openapi(SalesForecastRequest)
+)
+async def forecast_sales(request: SalesForecastRequest = Depends(negotiated_body(SalesForecastRequest))):
+    """
+    Sales forecasting with a random forest over lag, calendar and external-factor features
+    Forecasts recursively up to 365 periods ahead; models are cached per business
+    """
+    logger.info(f"Sales forecast for business: {request.business_id}")
+
+    try:
+        return await sales_forecaster.forecast(request)
+    except FitPoolSaturated as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Forecasting capacity exhausted, please retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Sales forecasting error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Forecasting failed: {str(e)}")
+
+@app.post("/api/v1/ml/forecast/cashflow/batch")
+async def forecast_cash_flow_batch(request: CashFlowBatchRequest):
+    """
+    Batch cash flow forecasting for many businesses in one call
+    Streams one NDJSON record per business as soon as its forecast is ready,
+    followed by a summary record; failed items are reported individually
+    """
+    logger.info(f"Batch cash flow forecast for {len(request.items)} businesses")
+
+    async def stream_results():
+        succeeded = 0
+        failed = 0
+
+        async for index, outcome in cash_flow_predictor.forecast_batch(
+            request.items, max_concurrency=max(settings.FIT_POOL_WORKERS, 1)
+        ):
+            record = {"index": index, "business_id": request.items[index].business_id}
+
+            if isinstance(outcome, Exception):
+                failed += 1
+                detail = outcome.detail if isinstance(outcome, HTTPException) else str(outcome)
+                record.update(status="error", error=detail)
+            else:
+                succeeded += 1
+                record.update(
+                    status="ok",
+                    result=build_cash_flow_response(outcome, request.response_format).model_dump()
+                )
+
+            yield ndjson_line(record)
+
+        summary = {"total": len(request.items), "succeeded": succeeded, "failed": failed}
+        yield ndjson_line({"summary": summary})
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@app.post(
+    "/api/v1/ml/pricing/optimize",
+    response_model=PricingOptimizationResponse,
+    openapi_extra=negotiated_openapi(PricingOptimizationRequest)
+)
+async def optimize_pricing(request: PricingOptimizationRequest = Depends(negotiated_body(PricingOptimizationRequest))):
     """
     ML-powered dynamic pricing optimization
     Calculates optimal price based on elasticity, competition, and profit maximization
     """
     logger.info(f"Pricing optimization for product: {request.product_id}")
 
-    return pricing_engine.optimize_price(request)
+    return await pricing_engine.optimize_price_async(request)
 
-@app.post("/api/v1/ml/inventory/optimize", response_model=InventoryOptimizationResponse)
-async def optimize_inventory(request: InventoryOptimizationRequest):
+@app.post("/api/v1/ml/pricing/demand")
+async def record_demand_history(request: DemandHistoryUpload):
+    """
+    Append demand observations to the elasticity store
+    Elasticities are re-estimated by the background refresh (or now, with refresh=true)
+    """
+    await elasticity_store.record(request.user_id, zip(request.product_id, request.demand_history))
+
+    refreshed = await elasticity_store.refresh() if request.refresh else 0
+
+    return {
+        "recorded": len(request.product_id),
+        "refreshed": refreshed,
+        **await elasticity_store.stats()
+    }
+
+@app.post(
+    "/api/v1/ml/pricing/optimize/batch",
+    response_model=PricingCatalogResponse,
+    openapi_extra=negotiated_openapi(PricingCatalogRequest)
+)
+async def optimize_pricing_batch(request: PricingCatalogRequest = Depends(negotiated_body(PricingCatalogRequest))):
+    """
+    Catalog-wide pricing optimization
+    Takes the catalog as parallel arrays and returns columnar results
+    """
+    logger.info(f"Catalog pricing optimization for {len(request.product_id)} products")
+
+    try:
+        return await pricing_engine.optimize_catalog_async(request)
+    except Exception as e:
+        logger.error(f"Catalog pricing error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post(
+    "/api/v1/ml/inventory/optimize",
+    response_model=InventoryOptimizationResponse,
+    openapi_extra=negotiated_openapi(InventoryOptimizationRequest)
+)
+async def optimize_inventory(request: InventoryOptimizationRequest = Depends(negotiated_body(InventoryOptimizationRequest))):
     """
     Advanced inventory optimization using EOQ and demand forecasting
     Calculates optimal order quantities, reorder points, and safety stock
@@ -572,6 +1869,97 @@ async def optimize_inventory(request: InventoryOptimizationRequest):
 
     return inventory_optimizer.optimize(request)
 
+@app.post(
+    "/api/v1/ml/inventory/optimize/batch",
+    response_model=InventoryCatalogResponse,
+    openapi_extra=negotiated_openapi(InventoryCatalogRequest)
+)
+async def optimize_inventory_batch(request: InventoryCatalogRequest = Depends(negotiated_body(InventoryCatalogRequest))):
+    """
+    Catalog-wide inventory optimization
+    Takes the catalog as parallel arrays and returns columnar results
+    """
+    logger.info(f"Catalog inventory optimization for {len(request.product_id)} products")
+
+    with stage("inventory", "prepare", "eoq", len(request.product_id)):
+        demand = ragged_stats(request.demand_history)
+        stockout_cost = (
+            np.array(request.stockout_cost, dtype=np.float64)
+            if request.stockout_cost is not None else np.full(len(request.product_id), np.nan)
+        )
+
+    try:
+        return await asyncio.to_thread(
+            inventory_optimizer.optimize_catalog,
+            product_id=request.product_id,
+            avg_demand=demand["mean"],
+            std_demand=demand["std"],
+            lead_time_days=np.array(request.lead_time_days, dtype=np.float64),
+            holding_cost=np.array(request.holding_cost_per_unit, dtype=np.float64),
+            ordering_cost=np.array(request.ordering_cost, dtype=np.float64),
+            stockout_cost=stockout_cost
+        )
+    except Exception as e:
+        logger.error(f"Catalog inventory error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post(
+    "/api/v1/ml/inventory/simulate",
+    response_model=InventorySimulationResponse,
+    openapi_extra=negotiated_openapi(InventorySimulationRequest)
+)
+async def simulate_inventory(request: InventorySimulationRequest = Depends(negotiated_body(InventorySimulationRequest))):
+    """
+    Monte Carlo safety stock optimization for a catalog
+    Simulates lead-time demand scenarios per SKU to hit a service level or minimize cost
+    """
+    logger.info(
+        f"Inventory simulation for {len(request.product_id)} products, "
+        f"{request.n_scenarios} scenarios, objective {request.objective.value}"
+    )
+
+    try:
+        return await inventory_optimizer.simulate(request)
+    except FitPoolSaturated as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Simulation capacity exhausted, please retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+@app.post("/api/v1/ml/inventory/optimize/upload", response_model=InventoryCatalogResponse)
+async def optimize_inventory_upload(user_id: str = Form(...), file: UploadFile = File(...)):
+    """
+    Catalog-wide inventory optimization from an ERP export
+    CSV or Parquet, one row per SKU: product_id, lead_time_days,
+    holding_cost_per_unit, ordering_cost, optional stockout_cost, and one
+    demand_<period> column per period of history
+    """
+    filename = (file.filename or "").lower()
+    if filename.endswith(".parquet") or file.content_type == "application/vnd.apache.parquet":
+        reader = pd.read_parquet
+    elif filename.endswith(".csv") or file.content_type in ("text/csv", "application/csv"):
+        reader = pd.read_csv
+    else:
+        raise HTTPException(status_code=415, detail="Upload a .csv or .parquet catalog export")
+
+    try:
+        frame = await asyncio.to_thread(reader, file.file)
+        arrays = catalog_frame_arrays(frame)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not read catalog: {str(e)}")
+
+    if not np.all(arrays["holding_cost"] > 0):
+        raise HTTPException(status_code=400, detail="holding_cost_per_unit must be positive")
+
+    logger.info(f"Catalog inventory upload for user {user_id}: {len(frame)} products")
+
+    try:
+        return await asyncio.to_thread(inventory_optimizer.optimize_catalog, **arrays)
+    except Exception as e:
+        logger.error(f"Catalog inventory error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/v1/ml/churn/predict")
 async def predict_customer_churn(request: CustomerChurnRequest):
     """
@@ -580,116 +1968,188 @@ async def predict_customer_churn(request: CustomerChurnRequest):
     """
     logger.info(f"Churn prediction for {len(request.customers)} customers")
 
-    results = churn_predictor.predict_churn(request.customers)
+    scores = churn_predictor.score(request.customers)
 
     return {
-        "predictions": results,
-        "summary": {
-            "total_customers": len(results),
-            "high_risk": sum(1 for r in results if r.risk_level == "HIGH"),
-            "medium_risk": sum(1 for r in results if r.risk_level == "MEDIUM"),
-            "low_risk": sum(1 for r in results if r.risk_level == "LOW"),
-            "avg_churn_probability": round(np.mean([r.churn_probability for r in results]), 3),
-            "total_at_risk_ltv": round(sum(r.lifetime_value_prediction for r in results if r.risk_level in ["HIGH", "MEDIUM"]), 2)
-        }
+        "predictions": churn_predictor.to_records(scores),
+        "summary": churn_predictor.summarize(scores)
     }
 
+@app.post("/api/v1/ml/churn/predict/stream")
+async def predict_customer_churn_stream(request: Request):
+    """
+    Streaming churn prediction for very large customer files
+    Accepts an NDJSON (one customer object per line) or CSV (header row) body,
+    spools it to disk, scores it in fixed-size chunks and streams NDJSON
+    predictions back, ending with a summary record. Memory stays flat
+    regardless of file size.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in STREAMING_CHURN_FORMATS:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported content type, use one of: {', '.join(STREAMING_CHURN_FORMATS)}"
+        )
+
+    logger.info(f"Streaming churn prediction ({content_type})")
+
+    body = await spool_body(request.stream(), settings.CHURN_STREAM_SPOOL_BYTES)
+    chunk_size = settings.CHURN_STREAM_CHUNK_SIZE
+
+    def read_csv_chunks() -> Iterator[Tuple[Any, Optional[Dict[str, Any]]]]:
+        try:
+            for customers in pd.read_csv(body, chunksize=chunk_size, dtype={"customer_id": str}):
+                yield customers, None
+        except pd.errors.EmptyDataError:
+            return
+        except Exception as e:
+            # The CSV reader cannot resync after a malformed row
+            yield None, {"status": "error", "error": f"CSV parsing stopped: {str(e)}"}
+
+    def read_ndjson_chunks() -> Iterator[Tuple[Any, Optional[Dict[str, Any]]]]:
+        line_number = 0
+        for lines in iter_line_batches(body, chunk_size):
+            customers = []
+            for line in lines:
+                line_number += 1
+                try:
+                    customer = json.loads(line)
+                    if not isinstance(customer, dict):
+                        raise ValueError("expected a JSON object")
+                except ValueError as e:
+                    yield None, {"line": line_number, "status": "error", "error": str(e)}
+                    continue
+                customers.append(customer)
+            yield customers, None
+
+    # Sync generator: Starlette iterates it in a worker thread, so parsing and
+    # scoring stay off the event loop
+    def stream_predictions() -> Iterator[str]:
+        totals = churn_predictor.summary_totals(churn_predictor.score([]))
+        errors = 0
+
+        try:
+            chunks = read_csv_chunks() if content_type == "text/csv" else read_ndjson_chunks()
+            for customers, error in chunks:
+                if error is not None:
+                    errors += 1
+                    yield ndjson_line(error)
+                    continue
+
+                scores = churn_predictor.score(customers)
+                yield "".join(ndjson_line(record) for record in churn_predictor.to_records(scores))
+
+                chunk_totals = churn_predictor.summary_totals(scores)
+                totals = {key: totals[key] + chunk_totals[key] for key in totals}
+        finally:
+            body.close()
+
+        summary = churn_predictor.summary_from_totals(totals)
+        summary["errors"] = errors
+        yield ndjson_line({"summary": summary})
+
+    return StreamingResponse(stream_predictions(), media_type="application/x-ndjson")
+
 @app.post("/api/v1/ml/market/trends", response_model=MarketTrendResponse)
 async def analyze_market_trends(request: MarketTrendRequest):
     """
-    AI-powered market trend analysis and opportunity identification
+    Market trend analysis and opportunity identification
+    Deterministic scores from the industry/region/keyword reference table
     """
     logger.info(f"Market trend analysis for {request.industry} in {request.region}")
 
-    # Mock implementation (in production, integrate with real data sources)
-    trend_score = np.random.uniform(60, 95)
-    growth_rate = np.random.uniform(-5, 25)
-
-    return MarketTrendResponse(
-        trend_score=round(trend_score, 2),
-        growth_rate=round(growth_rate, 2),
-        sentiment="positive" if growth_rate > 5 else "neutral" if growth_rate > 0 else "negative",
-        opportunities=[
-            "Growing demand for sustainable products",
-            "Digital transformation acceleration",
-            "Emerging middle class in developing markets"
-        ],
-        threats=[
-            "Increasing competition from low-cost providers",
-            "Regulatory changes impacting operations",
-            "Supply chain disruptions"
-        ],
-        emerging_trends=[
-            "AI-powered personalization",
-            "Direct-to-consumer models",
-            "Subscription-based revenue streams"
-        ]
-    )
+    return market_scorer.analyze_trends(request)
 
 @app.post("/api/v1/ml/risk/assess", response_model=RiskAssessmentResponse)
 async def assess_business_risk(request: RiskAssessmentRequest):
     """
-    Comprehensive business risk assessment using ML
-    Analyzes financial, market, and operational risks
+    Comprehensive business risk assessment
+    Analyzes financial ratios plus market and operational risk baselines for
+    the industry and region given in market_data
     """
     logger.info(f"Risk assessment for business: {request.business_id}")
 
-    financial_data = request.financial_data
-
-    # Financial health score
-    current_ratio = financial_data.get('current_ratio', 1.5)
-    debt_to_equity = financial_data.get('debt_to_equity', 0.5)
-    profit_margin = financial_data.get('profit_margin', 0.1)
-
-    financial_score = 100
-    if current_ratio < 1:
-        financial_score -= 30
-    if debt_to_equity > 2:
-        financial_score -= 25
-    if profit_margin < 0:
-        financial_score -= 40
-
-    financial_score = max(financial_score, 0)
-
-    # Market risk (mock)
-    market_score = np.random.uniform(60, 90)
-
-    # Operational risk (mock)
-    operational_score = np.random.uniform(70, 95)
-
-    # Overall risk
-    overall_risk = 100 - ((financial_score + market_score + operational_score) / 3)
-
-    # Risk factors
-    risk_factors = []
-    if current_ratio < 1.5:
-        risk_factors.append({
-            "factor": "Liquidity Risk",
-            "severity": "HIGH" if current_ratio < 1 else "MEDIUM",
-            "description": "Current ratio below recommended threshold"
-        })
-
-    if debt_to_equity > 1.5:
-        risk_factors.append({
-            "factor": "Leverage Risk",
-            "severity": "HIGH",
-            "description": "High debt-to-equity ratio indicates financial stress"
-        })
-
-    return RiskAssessmentResponse(
-        overall_risk_score=round(overall_risk, 2),
-        financial_health_score=round(financial_score, 2),
-        market_risk_score=round(100 - market_score, 2),
-        operational_risk_score=round(100 - operational_score, 2),
-        risk_factors=risk_factors,
-        mitigation_strategies=[
-            "Improve working capital management",
-            "Diversify revenue streams",
-            "Implement cost control measures",
-            "Build strategic cash reserves"
-        ]
-    )
+    return market_scorer.assess_risk(request)
+
+async def predict_customer_churn_job(request: CustomerChurnRequest) -> Dict[str, Any]:
+    scores = await asyncio.to_thread(churn_predictor.score, request.customers)
+    return {
+        "predictions": churn_predictor.to_records(scores),
+        "summary": churn_predictor.summarize(scores)
+    }
+
+# Job kind -> (request model, coroutine computing the endpoint's response)
+JOB_HANDLERS: Dict[JobKind, Tuple[Type[BaseModel], Callable[[Any], Awaitable[Any]]]] = {
+    JobKind.CASHFLOW_FORECAST: (CashFlowForecastRequest, forecast_cash_flow),
+    JobKind.SALES_FORECAST: (SalesForecastRequest, forecast_sales),
+    JobKind.CHURN_PREDICT: (CustomerChurnRequest, predict_customer_churn_job),
+    JobKind.PRICING_CATALOG: (PricingCatalogRequest, optimize_pricing_batch),
+    JobKind.INVENTORY_CATALOG: (InventoryCatalogRequest, optimize_inventory_batch),
+    JobKind.INVENTORY_SIMULATION: (InventorySimulationRequest, simulate_inventory),
+}
+
+def job_runner(handler: Callable[[Any], Awaitable[Any]], request: BaseModel) -> Callable[[], Awaitable[Any]]:
+    """Job body: run the endpoint logic, waiting out 429s from saturated pools"""
+
+    async def run() -> Any:
+        while True:
+            try:
+                return jsonable_encoder(await handler(request))
+            except HTTPException as e:
+                if e.status_code != 429:
+                    raise RuntimeError(f"{e.status_code}: {e.detail}")
+                retry_after = float((e.headers or {}).get("Retry-After", settings.FIT_POOL_RETRY_AFTER))
+                await asyncio.sleep(retry_after)
+
+    return run
+
+@app.post("/api/v1/ml/jobs", response_model=JobAccepted, status_code=202)
+async def submit_job(submission: JobSubmission):
+    """
+    Submit a long-running computation as an asynchronous job
+    Returns a job id immediately; poll /api/v1/ml/jobs/{job_id} or pass a webhook_url
+    """
+    model, handler = JOB_HANDLERS[submission.kind]
+    try:
+        request = model.model_validate(submission.payload)
+    except ValidationError as e:
+        raise RequestValidationError([
+            {**detail, "loc": ("body", "payload", *detail["loc"])}
+            for detail in e.errors(include_url=False, include_input=False)
+        ])
+
+    webhook_url = str(submission.webhook_url) if submission.webhook_url else None
+    if webhook_url is not None:
+        try:
+            await job_manager.check_webhook(webhook_url)
+        except WebhookRejected as e:
+            raise RequestValidationError([{
+                "type": "value_error", "loc": ("body", "webhook_url"), "msg": str(e)
+            }])
+
+    try:
+        job = await job_manager.submit(submission.kind.value, job_runner(handler, request), webhook_url)
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Job queue is full, please retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    logger.info(f"Queued {submission.kind.value} job {job.id}")
+    return JobAccepted(job_id=job.id, status=job.status, status_url=f"/api/v1/ml/jobs/{job.id}")
+
+@app.get("/api/v1/ml/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    """
+    Status of an asynchronous job, with its result once it has succeeded
+    Finished jobs are kept for JOB_RESULT_TTL seconds
+    """
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found or expired")
+    return job
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001, workers=4)
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8001, workers=settings.WEB_CONCURRENCY)
@@ -0,0 +1,178 @@
+"""
+Market trend and business risk scoring
+
+Scores are looked up in a precomputed reference table (per industry, region
+and keyword signal) rather than drawn at random, so identical inputs always
+score identically and responses can be cached on the normalized inputs.
+"""
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+DEFAULT_REFERENCE_PATH = Path(__file__).parent / "data" / "market_reference.json"
+DEFAULT_KEY = "default"
+
+# Combined keyword adjustments are capped so a long keyword list cannot
+# dominate the industry baseline
+MAX_KEYWORD_TREND_ADJUSTMENT = 15.0
+MAX_KEYWORD_GROWTH_ADJUSTMENT = 8.0
+MAX_EMERGING_TRENDS = 5
+
+# Financial inputs used by the risk score, with the values assumed when absent
+FINANCIAL_DEFAULTS = {
+    "current_ratio": 1.5,
+    "debt_to_equity": 0.5,
+    "profit_margin": 0.1,
+}
+
+
+def normalize_key(value: str) -> str:
+    """'Food & Beverage ' -> 'food_and_beverage'"""
+    value = value.strip().lower().replace("&", " and ")
+    return re.sub(r"[^a-z0-9]+", "_", value).strip("_")
+
+
+def _lookup_key(key: str) -> str:
+    """Separator-free form the tables are indexed by: 'e_commerce' finds 'ecommerce'"""
+    return key.replace("_", "")
+
+
+def normalize_keywords(keywords: Iterable[str]) -> Tuple[str, ...]:
+    """Sorted, de-duplicated keyword keys; order and casing don't change the score"""
+    return tuple(sorted({key for key in map(normalize_key, keywords) if key}))
+
+
+def _clip(value: float, low: float = 0.0, high: float = 100.0) -> float:
+    return min(max(value, low), high)
+
+
+class MarketReference:
+    """Reference table of industry baselines and region/keyword adjustments"""
+
+    def __init__(self, table: Dict[str, Any]):
+        self.version = str(table.get("version", ""))
+        self.industries = self._index(table["industries"])
+        self.regions = self._index(table["regions"])
+        self.keywords = self._index(table.get("keywords", {}))
+        if DEFAULT_KEY not in self.industries or DEFAULT_KEY not in self.regions:
+            raise ValueError("Market reference needs 'default' industry and region entries")
+
+    @staticmethod
+    def _index(entries: Dict[str, Any]) -> Dict[str, Any]:
+        return {_lookup_key(normalize_key(k)): v for k, v in entries.items()}
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "MarketReference":
+        with open(path or DEFAULT_REFERENCE_PATH, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def industry(self, key: str) -> Dict[str, Any]:
+        return self.industries.get(_lookup_key(key), self.industries[DEFAULT_KEY])
+
+    def region(self, key: str) -> Dict[str, Any]:
+        return self.regions.get(_lookup_key(key), self.regions[DEFAULT_KEY])
+
+    def keyword(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.keywords.get(_lookup_key(key))
+
+
+def score_market_trend(
+    reference: MarketReference,
+    industry: str,
+    region: str,
+    keywords: Tuple[str, ...]
+) -> Dict[str, Any]:
+    """Trend score, growth rate and narrative for normalized inputs"""
+    baseline = reference.industry(industry)
+    adjustment = reference.region(region)
+    signals = [signal for signal in map(reference.keyword, keywords) if signal is not None]
+
+    keyword_trend = _clip(
+        sum(s["trend_adjustment"] for s in signals), -MAX_KEYWORD_TREND_ADJUSTMENT, MAX_KEYWORD_TREND_ADJUSTMENT
+    )
+    keyword_growth = _clip(
+        sum(s["growth_adjustment"] for s in signals), -MAX_KEYWORD_GROWTH_ADJUSTMENT, MAX_KEYWORD_GROWTH_ADJUSTMENT
+    )
+    trend_score = _clip(baseline["trend_score"] + adjustment["trend_adjustment"] + keyword_trend)
+    growth_rate = baseline["growth_rate"] + adjustment["growth_adjustment"] + keyword_growth
+
+    # Keyword-specific trends first, then the industry's own
+    emerging = list(dict.fromkeys(
+        [s["trend"] for s in signals if s.get("trend")] + baseline["emerging_trends"]
+    ))[:MAX_EMERGING_TRENDS]
+
+    return {
+        "trend_score": round(trend_score, 2),
+        "growth_rate": round(growth_rate, 2),
+        "sentiment": "positive" if growth_rate > 5 else "neutral" if growth_rate > 0 else "negative",
+        "opportunities": list(baseline["opportunities"]),
+        "threats": list(baseline["threats"]),
+        "emerging_trends": emerging,
+    }
+
+
+def financial_inputs(financial_data: Dict[str, Any]) -> Tuple[float, float, float]:
+    """(current_ratio, debt_to_equity, profit_margin) with defaults filled in"""
+    values = []
+    for name, default in FINANCIAL_DEFAULTS.items():
+        value = financial_data.get(name)
+        values.append(float(default if value is None else value))
+    return tuple(values)
+
+
+def score_business_risk(
+    reference: MarketReference,
+    current_ratio: float,
+    debt_to_equity: float,
+    profit_margin: float,
+    industry: str,
+    region: str
+) -> Dict[str, Any]:
+    """Risk scores from financial ratios plus the industry/region stability baselines"""
+    # Financial health score
+    financial_score = 100
+    if current_ratio < 1:
+        financial_score -= 30
+    if debt_to_equity > 2:
+        financial_score -= 25
+    if profit_margin < 0:
+        financial_score -= 40
+    financial_score = max(financial_score, 0)
+
+    baseline = reference.industry(industry)
+    stability = reference.region(region)["stability_adjustment"]
+    market_score = _clip(baseline["market_stability"] + stability)
+    operational_score = _clip(baseline["operational_stability"])
+
+    overall_risk = 100 - ((financial_score + market_score + operational_score) / 3)
+
+    risk_factors = []
+    if current_ratio < 1.5:
+        risk_factors.append({
+            "factor": "Liquidity Risk",
+            "severity": "HIGH" if current_ratio < 1 else "MEDIUM",
+            "description": "Current ratio below recommended threshold"
+        })
+
+    if debt_to_equity > 1.5:
+        risk_factors.append({
+            "factor": "Leverage Risk",
+            "severity": "HIGH",
+            "description": "High debt-to-equity ratio indicates financial stress"
+        })
+
+    if market_score < 60:
+        risk_factors.append({
+            "factor": "Market Volatility",
+            "severity": "MEDIUM",
+            "description": "Industry and region show below-average market stability"
+        })
+
+    return {
+        "overall_risk_score": round(overall_risk, 2),
+        "financial_health_score": round(financial_score, 2),
+        "market_risk_score": round(100 - market_score, 2),
+        "operational_risk_score": round(100 - operational_score, 2),
+        "risk_factors": risk_factors,
+    }
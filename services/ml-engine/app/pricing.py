@@ -0,0 +1,205 @@
+"""
+Pricing kernels
+
+Vectorized pricing math over whole catalogs. Every function takes and returns
+NumPy arrays with one entry per SKU; the single-product endpoint runs the same
+code on length-1 arrays.
+"""
+from typing import Dict, Sequence
+
+import numpy as np
+
+# Elasticity used when a SKU has fewer than this many demand observations
+MIN_POINTS_FOR_ELASTICITY = 3
+DEFAULT_ELASTICITY = -1.5
+MIN_ELASTICITY = -5.0
+
+MIN_MARGIN = 1.1  # optimal price never goes below cost * MIN_MARGIN
+INELASTIC_MARKUP = 1.5
+
+# Grid search: candidates stay within +/- band of the mean competitor price
+# (or of the current price when no competitor data), above the margin floor
+DEFAULT_GRID_SIZE = 201
+DEFAULT_COMPETITOR_BAND = 0.2
+GRID_CHUNK_CELLS = 2_000_000  # SKUs x candidates evaluated per chunk
+
+# Catalog recommendations; rule i fires when bit i is set in a SKU's
+# recommendation code (see recommendation_codes)
+RECOMMENDATION_RULES = [
+    "Recommended to increase price by more than 10%",
+    "Recommended to decrease price by more than 10%",
+    "Demand is elastic - small price decreases can significantly boost volume",
+    "You're priced below market - consider premium positioning",
+]
+
+
+def ragged_stats(histories: Sequence[Sequence[float]]) -> Dict[str, np.ndarray]:
+    """Per-row count, mean and population std of a ragged list of series
+
+    Flattens once and reduces with np.add.reduceat instead of looping over rows.
+    """
+    counts = np.fromiter((len(h) for h in histories), dtype=np.int64, count=len(histories))
+    flat = np.fromiter((v for h in histories for v in h), dtype=np.float64, count=int(counts.sum()))
+
+    sums = np.zeros(len(counts))
+    sq_sums = np.zeros(len(counts))
+    nonempty = counts > 0
+    if flat.size:
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+        sums[nonempty] = np.add.reduceat(flat, starts)
+        sq_sums[nonempty] = np.add.reduceat(flat * flat, starts)
+
+    safe_counts = np.maximum(counts, 1)
+    mean = sums / safe_counts
+    variance = np.maximum(sq_sums / safe_counts - mean * mean, 0.0)
+    return {"count": counts, "mean": mean, "std": np.sqrt(variance)}
+
+
+def volatility_elasticity(count: np.ndarray, mean: np.ndarray, std: np.ndarray) -> np.ndarray:
+    """Elasticity estimate from demand volatility: -1 - std / (mean + 1), capped
+
+    Higher volatility suggests higher elasticity.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        elasticity = np.maximum(-1 - std / (mean + 1), MIN_ELASTICITY)
+    return np.where(count < MIN_POINTS_FOR_ELASTICITY, DEFAULT_ELASTICITY, elasticity)
+
+
+def optimize_prices(
+    current_price: np.ndarray,
+    cost: np.ndarray,
+    competitor_price: np.ndarray,
+    avg_demand: np.ndarray,
+    elasticity: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """Markup-based optimal price, expected units and revenue impact per SKU
+
+    ``competitor_price`` is the mean competitor price, NaN where unknown.
+    """
+    avg_competitor = np.where(np.isnan(competitor_price), current_price, competitor_price)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price_position = np.where(avg_competitor > 0, current_price / avg_competitor, 1.0)
+
+        # Profit maximization: P* = MC / (1 + 1/e) for elastic demand,
+        # markup pricing otherwise
+        optimal_price = np.where(
+            np.abs(elasticity) > 1,
+            cost / (1 + 1 / elasticity),
+            cost * INELASTIC_MARKUP
+        )
+
+    # Adjust based on competition
+    optimal_price = optimal_price * np.select(
+        [price_position > 1.2, price_position < 0.8], [0.95, 1.05], default=1.0
+    )
+    optimal_price = np.maximum(optimal_price, cost * MIN_MARGIN)
+
+    price_change_pct = (optimal_price - current_price) / current_price
+    expected_units = avg_demand * (1 + elasticity * price_change_pct)
+    expected_revenue = optimal_price * expected_units
+
+    current_revenue = current_price * avg_demand
+    revenue_impact = np.divide(
+        (expected_revenue - current_revenue) * 100, current_revenue,
+        out=np.zeros_like(current_revenue), where=current_revenue != 0
+    )
+
+    return {
+        "optimal_price": optimal_price,
+        "expected_units_sold": expected_units,
+        "expected_revenue": expected_revenue,
+        "price_elasticity": elasticity,
+        "price_change_pct": price_change_pct,
+        "revenue_impact": revenue_impact,
+        "price_position": price_position,
+        "current_revenue": current_revenue,
+    }
+
+
+def grid_search_prices(
+    current_price: np.ndarray,
+    cost: np.ndarray,
+    competitor_price: np.ndarray,
+    avg_demand: np.ndarray,
+    elasticity: np.ndarray,
+    grid_size: int = DEFAULT_GRID_SIZE,
+    competitor_band: float = DEFAULT_COMPETITOR_BAND,
+    include_curves: bool = False,
+) -> Dict[str, np.ndarray]:
+    """Profit-maximizing price per SKU from a constrained candidate grid
+
+    Demand follows a constant-elasticity curve through the current operating
+    point, q(p) = avg_demand * (p / current_price) ** elasticity, and profit
+    (p - cost) * q(p) is evaluated for ``grid_size`` candidates per SKU at
+    once. Candidates span the competitor band, floored at cost * MIN_MARGIN.
+    Returns the same keys as optimize_prices plus ``expected_profit``, and
+    ``price_grid``/``profit_curve`` (SKUs x candidates) with include_curves.
+    """
+    n = len(current_price)
+    reference = np.where(np.isnan(competitor_price), current_price, competitor_price)
+    floor = cost * MIN_MARGIN
+    lower = np.maximum(reference * (1 - competitor_band), floor)
+    upper = np.maximum(reference * (1 + competitor_band), lower)
+
+    steps = np.linspace(0.0, 1.0, grid_size)
+    best = np.zeros(n, dtype=np.int64)
+    optimal_price = np.empty(n)
+    expected_units = np.empty(n)
+    if include_curves:
+        price_grid = np.empty((n, grid_size))
+        profit_curve = np.empty((n, grid_size))
+
+    chunk = max(GRID_CHUNK_CELLS // grid_size, 1)
+    for start in range(0, n, chunk):
+        rows = slice(start, start + chunk)
+        prices = lower[rows, None] + (upper - lower)[rows, None] * steps
+        units = avg_demand[rows, None] * (prices / current_price[rows, None]) ** elasticity[rows, None]
+        profit = (prices - cost[rows, None]) * units
+
+        best[rows] = np.argmax(profit, axis=1)
+        picked = best[rows, None]
+        optimal_price[rows] = np.take_along_axis(prices, picked, axis=1)[:, 0]
+        expected_units[rows] = np.take_along_axis(units, picked, axis=1)[:, 0]
+        if include_curves:
+            price_grid[rows] = prices
+            profit_curve[rows] = profit
+
+    expected_revenue = optimal_price * expected_units
+    current_revenue = current_price * avg_demand
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price_position = np.where(reference > 0, current_price / reference, 1.0)
+
+    result = {
+        "optimal_price": optimal_price,
+        "expected_units_sold": expected_units,
+        "expected_revenue": expected_revenue,
+        "expected_profit": (optimal_price - cost) * expected_units,
+        "price_elasticity": elasticity,
+        "price_change_pct": (optimal_price - current_price) / current_price,
+        "revenue_impact": np.divide(
+            (expected_revenue - current_revenue) * 100, current_revenue,
+            out=np.zeros_like(current_revenue), where=current_revenue != 0
+        ),
+        "price_position": price_position,
+        "current_revenue": current_revenue,
+    }
+    if include_curves:
+        result["price_grid"] = price_grid
+        result["profit_curve"] = profit_curve
+    return result
+
+
+def recommendation_codes(result: Dict[str, np.ndarray]) -> np.ndarray:
+    """Bitmask of RECOMMENDATION_RULES that fire for each SKU"""
+    change = result["price_change_pct"]
+    flags = [
+        change > 0.1,
+        change < -0.1,
+        result["price_elasticity"] < -1,
+        result["price_position"] < 0.9,
+    ]
+    codes = np.zeros(len(change), dtype=np.int64)
+    for bit, flag in enumerate(flags):
+        codes |= flag.astype(np.int64) << bit
+    return codes
+
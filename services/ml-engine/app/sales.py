@@ -0,0 +1,198 @@
+"""
+Sales forecasting kernels
+
+A random forest over lag, rolling-mean, calendar and external-factor features,
+forecasting recursively one period at a time. The fitted trees are flattened
+into padded NumPy arrays (StackedForest) so each recursive step walks all
+trees at once instead of calling sklearn's per-tree predict, which keeps
+365-step horizons fast.
+"""
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from sklearn.ensemble import RandomForestRegressor
+
+# Lags (in periods) and trailing mean windows; lags longer than a third of
+# the history are dropped so short series still leave enough training rows
+SALES_LAGS = (1, 2, 3, 7, 14, 28)
+ROLLING_WINDOWS = (7, 28)
+MIN_SALES_POINTS = 10
+
+FOREST_PARAMS = {
+    "n_estimators": 200,
+    "min_samples_leaf": 2,
+    "max_features": 0.7,
+    "random_state": 42,
+}
+
+CALENDAR_FEATURES = ["day_of_week", "day_of_month", "month", "day_of_year"]
+
+# infer_frequency codes -> pandas offsets for future dates
+_FUTURE_FREQUENCIES = {"D": "D", "W": "W", "M": "ME", "Q": "QE", "Y": "YE"}
+
+
+def calendar_features(ds: np.ndarray) -> np.ndarray:
+    index = pd.DatetimeIndex(ds)
+    return np.column_stack([index.dayofweek, index.day, index.month, index.dayofyear]).astype(np.float64)
+
+
+class StackedForest:
+    """Fitted regression trees as padded (n_trees, n_nodes) arrays"""
+
+    def __init__(self, forest: "RandomForestRegressor"):
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        n_nodes = max(tree.node_count for tree in trees)
+
+        def stack(attribute: str, fill: float, dtype) -> np.ndarray:
+            out = np.full((len(trees), n_nodes), fill, dtype=dtype)
+            for i, tree in enumerate(trees):
+                values = getattr(tree, attribute)
+                out[i, :len(values)] = values.reshape(len(values))
+            return out
+
+        self.left = stack("children_left", -1, np.int64)
+        self.right = stack("children_right", -1, np.int64)
+        self.feature = np.maximum(stack("feature", 0, np.int64), 0)
+        self.threshold = stack("threshold", 0.0, np.float64)
+        self.value = stack("value", 0.0, np.float64)
+        self.depth = max(estimator.get_depth() for estimator in forest.estimators_)
+        self._rows = np.arange(len(trees))
+
+    def predict_trees(self, x: np.ndarray) -> np.ndarray:
+        """Per-tree predictions for one feature row"""
+        # sklearn compares float32 features against the split thresholds
+        x = x.astype(np.float32).astype(np.float64)
+        node = np.zeros(len(self._rows), dtype=np.int64)
+        for _ in range(self.depth):
+            left = self.left[self._rows, node]
+            go_left = x[self.feature[self._rows, node]] <= self.threshold[self._rows, node]
+            node = np.where(left < 0, node, np.where(go_left, left, self.right[self._rows, node]))
+        return self.value[self._rows, node]
+
+
+class SalesModel:
+    """A fitted sales forest plus the state needed to continue the series"""
+
+    def __init__(
+        self,
+        forest: "RandomForestRegressor",
+        lags: List[int],
+        windows: List[int],
+        factor_names: List[str],
+        freq: str,
+        ds: np.ndarray,
+        y: np.ndarray,
+    ):
+        self.trees = StackedForest(forest)
+        self.lags = lags
+        self.windows = windows
+        self.factor_names = factor_names
+        self.freq = freq
+        self.last_date = pd.Timestamp(ds[-1])
+        self.history = y[-max(lags + windows):].copy()
+        self.feature_names = (
+            [f"lag_{lag}" for lag in lags] + [f"rolling_mean_{w}" for w in windows]
+            + CALENDAR_FEATURES + factor_names
+        )
+        self.feature_importance = dict(zip(self.feature_names, forest.feature_importances_.round(4).tolist()))
+
+    def forecast(
+        self,
+        horizon: int,
+        future_factors: Optional[np.ndarray] = None,
+        interval_width: float = 0.9
+    ) -> pd.DataFrame:
+        """Recursive multi-step forecast; each prediction feeds the next step's lags
+
+        ``future_factors`` is (horizon, n_factors). Bounds are quantiles of the
+        per-tree predictions.
+        """
+        future_ds = pd.date_range(
+            self.last_date, periods=horizon + 1, freq=_FUTURE_FREQUENCIES.get(self.freq, "D")
+        )[1:]
+        calendar = calendar_features(future_ds.values)
+        factors = future_factors if future_factors is not None else np.zeros((horizon, 0))
+
+        buffer = np.concatenate([self.history, np.zeros(horizon)])
+        offset = len(self.history)
+        lags = np.array(self.lags)
+        predicted = np.empty(horizon)
+        lower = np.empty(horizon)
+        upper = np.empty(horizon)
+        tail = (1 - interval_width) / 2 * 100
+
+        for step in range(horizon):
+            t = offset + step
+            row = np.concatenate([
+                buffer[t - lags],
+                [buffer[t - w:t].mean() for w in self.windows],
+                calendar[step],
+                factors[step],
+            ])
+            per_tree = self.trees.predict_trees(row)
+            predicted[step] = max(per_tree.mean(), 0.0)
+            lower[step], upper[step] = np.maximum(np.percentile(per_tree, [tail, 100 - tail]), 0.0)
+            buffer[t] = predicted[step]
+
+        return pd.DataFrame({"ds": future_ds, "yhat": predicted, "yhat_lower": lower, "yhat_upper": upper})
+
+
+def sales_lags(n_points: int) -> List[int]:
+    return [lag for lag in SALES_LAGS if lag <= max(n_points // 3, 1)]
+
+
+def sales_windows(n_points: int) -> List[int]:
+    return [w for w in ROLLING_WINDOWS if w <= max(n_points // 3, 1)]
+
+
+def training_matrix(
+    y: np.ndarray,
+    calendar: np.ndarray,
+    factors: np.ndarray,
+    lags: Sequence[int],
+    windows: Sequence[int],
+) -> np.ndarray:
+    """Feature rows for every period with a full lag/window history, built column-wise"""
+    start = max(list(lags) + list(windows))
+    t = np.arange(start, len(y))
+    cumsum = np.concatenate([[0.0], np.cumsum(y)])
+    columns = [y[t - lag] for lag in lags]
+    columns += [(cumsum[t] - cumsum[t - w]) / w for w in windows]
+    return np.column_stack(columns + [calendar[start:], factors[start:]])
+
+
+def fit_sales_model(
+    ds: np.ndarray,
+    y: np.ndarray,
+    freq: str,
+    factors: Optional[Dict[str, np.ndarray]] = None,
+    n_jobs: int = -1,
+) -> SalesModel:
+    """Train the sales forest on a regular series
+
+    ``factors`` maps external regressor name -> values aligned with ``y``.
+    """
+    factors = factors or {}
+    factor_names = sorted(factors)
+    factor_matrix = (
+        np.column_stack([factors[name] for name in factor_names]) if factor_names else np.zeros((len(y), 0))
+    )
+    lags, windows = sales_lags(len(y)), sales_windows(len(y))
+
+    X = training_matrix(y, calendar_features(ds), factor_matrix, lags, windows)
+    target = y[max(lags + windows):]
+
+    from sklearn.ensemble import RandomForestRegressor
+
+    forest = RandomForestRegressor(**FOREST_PARAMS, n_jobs=n_jobs).fit(X, target)
+    return SalesModel(forest, lags, windows, factor_names, freq, ds, y)
+
+
+def warm_up() -> None:
+    """Import sklearn's forest and run one tiny fit/forecast ahead of the first request"""
+    ds = pd.date_range("2020-01-01", periods=4 * MIN_SALES_POINTS, freq="D").values
+    y = 10 + np.arange(len(ds), dtype=np.float64) % 7
+    fit_sales_model(ds, y, "D", n_jobs=1).forecast(2)
@@ -0,0 +1,37 @@
+"""
+Train and save the churn model
+
+Usage:
+    python -m app.train_churn history.csv [--model-dir models/churn] [--version V]
+
+history.csv is a CRM export with one row per customer, the churn feature
+columns (days_since_last_purchase, purchase_count, total_spent,
+engagement_score, customer_age_days) and a 0/1 ``churned`` label.
+"""
+import argparse
+import logging
+
+import pandas as pd
+
+from app.churn_model import save_artifact, train_churn_model
+from app.core.config import settings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the ml-engine churn model")
+    parser.add_argument("history", help="CSV of labelled customer history")
+    parser.add_argument("--model-dir", default=settings.CHURN_MODEL_DIR)
+    parser.add_argument("--version", default=None, help="artifact version (default: UTC timestamp)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    history = pd.read_csv(args.history)
+    model, metrics = train_churn_model(history)
+    path = save_artifact(model, metrics, args.model_dir, args.version)
+
+    print(f"Saved {path} ({metrics})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Churn scoring latency: rule-based score vs trained model
+
+Trains a model on synthetic labelled history, then reports scoring latency per
+1k customers for both paths at a few batch sizes.
+
+Usage (from services/ml-engine):
+    python -m benchmarks.churn_latency [--rows 20000] [--repeats 5]
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from app.churn_model import ChurnModelArtifact, synthetic_history, train_churn_model
+from app.main import ChurnPredictor
+
+
+def per_1k_ms(predictor: ChurnPredictor, customers: pd.DataFrame, repeats: int) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predictor.score(customers)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000 / (len(customers) / 1000)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000, help="training rows")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    model, metrics = train_churn_model(synthetic_history(args.rows))
+    print(f"trained on {args.rows} rows: {metrics}")
+
+    rules = ChurnPredictor()
+    trained = ChurnPredictor(model=ChurnModelArtifact("bench", model, {}))
+
+    print(f"{'batch':>8} {'rules ms/1k':>12} {'model ms/1k':>12}")
+    for size in (1000, 10000, 100000):
+        customers = synthetic_history(size, seed=1).drop(columns='churned')
+        print(
+            f"{size:>8} {per_1k_ms(rules, customers, args.repeats):>12.2f} "
+            f"{per_1k_ms(trained, customers, args.repeats):>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Cold start: import time, time to /health and time to /ready
+
+Starts the service in a fresh uvicorn process and polls it, reporting how long
+until the process answers /health (liveness) and until /ready reports the
+background warm-up done. Also times a bare ``import app.main`` and, for
+comparison, importing the heavy libraries that are now loaded lazily.
+
+Usage (from services/ml-engine):
+    python -m benchmarks.cold_start [--port 8765] [--repeats 3] [--timeout 120]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def import_seconds(statement: str) -> float:
+    """Wall time of a fresh interpreter running ``statement``"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", statement], check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def wait_for(client: httpx.Client, path: str, deadline: float) -> bool:
+    while time.perf_counter() < deadline:
+        try:
+            if client.get(path).status_code == 200:
+                return True
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+    return False
+
+
+def serve_once(port: int, timeout: float) -> dict:
+    env = {**os.environ, "WARMUP_ENABLED": "true"}
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = start + timeout
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5) as client:
+            healthy = wait_for(client, "/health", deadline)
+            health_s = time.perf_counter() - start
+            ready = healthy and wait_for(client, "/ready", deadline)
+            ready_s = time.perf_counter() - start
+            warmup = client.get("/ready").json()["warmup"] if ready else {}
+    finally:
+        server.terminate()
+        server.wait()
+
+    if not ready:
+        raise RuntimeError(f"Service not ready within {timeout}s")
+    return {"health": health_s, "ready": ready_s, "warmup": warmup}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    print(f"{'import':<40} {'best s':>8}")
+    for label, statement in [
+        ("app.main", "import app.main"),
+        ("prophet + sklearn.ensemble (lazy)", "import prophet, sklearn.ensemble"),
+    ]:
+        best = min(import_seconds(statement) for _ in range(args.repeats))
+        print(f"{label:<40} {best:>8.2f}")
+
+    print(f"\n{'run':<6} {'/health s':>10} {'/ready s':>10}  warm-up steps (s)")
+    for run in range(args.repeats):
+        result = serve_once(args.port, args.timeout)
+        print(f"{run:<6} {result['health']:>10.2f} {result['ready']:>10.2f}  {result['warmup'].get('steps')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmark suite configuration and shared fixtures
+
+Run from services/ml-engine:
+
+    python -m pytest benchmarks                   # compare with benchmarks/baseline.json
+    python -m pytest benchmarks --save-baseline   # record a new baseline
+
+Each round of a benchmark is divided by the best time of a fixed reference
+workload measured right before that round and the best ratio is kept, so a
+uniformly slower (or busier) machine does not read as a regression. A benchmark fails when that ratio, or its peak
+traced memory, is more than --regression-tolerance (default 30%) above the
+baseline. Throughput and peak memory are also written to pytest-benchmark's
+extra_info, so --benchmark-json/--benchmark-autosave keep them.
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("WARMUP_ENABLED", "false")
+
+from app.core.timeseries import Series  # noqa: E402
+
+SIZES = [10, 1_000, 100_000]
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+# Memory is compared with this much absolute slack on top of the tolerance,
+# so sub-megabyte benchmarks don't fail on allocator noise
+MEMORY_SLACK_MB = 1.0
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("ml-engine benchmarks")
+    group.addoption("--save-baseline", action="store_true", help="Write results to benchmarks/baseline.json")
+    group.addoption("--regression-tolerance", type=float, default=0.3, help="Allowed slowdown vs baseline")
+
+
+def rounds_for(rows: int) -> int:
+    return 5 if rows >= 100_000 else 20
+
+
+def _reference_workload(values: np.ndarray) -> None:
+    np.sort(values)
+    pd.Series(values).rolling(7).mean()
+    total = 0.0
+    for v in values[:20_000].tolist():
+        total += v
+
+
+def reference_seconds(rounds: int = 3) -> float:
+    """Best time of a fixed numpy/pandas/pure-Python workload on this machine, now"""
+    values = np.random.default_rng(0).random(100_000)
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        _reference_workload(values)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+_RESULTS = pytest.StashKey[dict]()
+
+
+def pytest_configure(config):
+    config.stash[_RESULTS] = {}
+
+
+def pytest_sessionfinish(session):
+    results = session.config.stash[_RESULTS]
+    if session.config.getoption("save_baseline") and results:
+        # Merge, so re-recording a subset (-k ...) keeps the other entries
+        saved = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        saved.update(results)
+        BASELINE_PATH.write_text(json.dumps(dict(sorted(saved.items())), indent=2) + "\n")
+
+
+@pytest.fixture(scope="session")
+def baseline(request):
+    if request.config.getoption("save_baseline") or not BASELINE_PATH.exists():
+        return {}
+    return json.loads(BASELINE_PATH.read_text())
+
+
+@pytest.fixture
+def measure(benchmark, baseline, request):
+    """Benchmark ``fn(*args)`` over a fixed number of rounds and check it
+    against the baseline; records throughput and peak traced memory"""
+
+    def run(fn, rows, *args, rounds=None):
+        rounds = rounds or rounds_for(rows)
+        references = []
+        result = benchmark.pedantic(
+            fn, args=args, setup=lambda: references.append(reference_seconds()),
+            rounds=rounds, iterations=1, warmup_rounds=1
+        )
+        if benchmark.disabled:
+            return result
+
+        tracemalloc.start()
+        try:
+            fn(*args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        # Each round against the reference timed right before it; setup also
+        # runs for the warm-up round, hence the last ``rounds`` references
+        times = benchmark.stats.stats.data
+        relative = min(t / r for t, r in zip(times, references[-len(times):]))
+        best = benchmark.stats.stats.min
+        measured = {
+            "rows": rows,
+            "rows_per_second": round(rows / benchmark.stats.stats.mean, 1),
+            "peak_memory_mb": round(peak / 2**20, 2),
+            "min_seconds": round(best, 6),
+            "relative_time": round(relative, 4),
+        }
+        benchmark.extra_info.update(measured)
+        request.config.stash[_RESULTS][request.node.name] = measured
+
+        expected = baseline.get(request.node.name)
+        if expected is not None:
+            tolerance = request.config.getoption("regression_tolerance")
+            slowdown = measured["relative_time"] / expected["relative_time"] - 1
+            if slowdown > tolerance:
+                pytest.fail(
+                    f"{request.node.name} is {slowdown:.0%} slower than baseline "
+                    f"(relative time {measured['relative_time']} vs {expected['relative_time']})"
+                )
+            memory_limit = expected["peak_memory_mb"] * (1 + tolerance) + MEMORY_SLACK_MB
+            if measured["peak_memory_mb"] > memory_limit:
+                pytest.fail(
+                    f"{request.node.name} peak memory {measured['peak_memory_mb']} MB "
+                    f"exceeds baseline {expected['peak_memory_mb']} MB"
+                )
+        return result
+
+    return run
+
+
+def daily_series(n: int, seed: int = 0) -> Series:
+    rng = np.random.default_rng(seed)
+    ds = pd.date_range("1800-01-01", periods=n, freq="D").values
+    y = 1000 + 50 * np.sin(np.arange(n) / 58.0) + rng.normal(0, 20, n)
+    return Series(ds, y)
+
+
+def customers(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "customer_id": [f"c{i}" for i in range(n)],
+        "days_since_last_purchase": rng.integers(0, 180, n),
+        "purchase_count": rng.poisson(4, n),
+        "total_spent": rng.gamma(2.0, 150.0, n).round(2),
+        "engagement_score": rng.integers(0, 100, n),
+        "customer_age_days": rng.integers(30, 1500, n),
+    }).to_dict("records")
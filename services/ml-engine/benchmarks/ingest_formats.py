@@ -0,0 +1,68 @@
+"""
+Request ingest: JSON vs Arrow IPC vs .npz
+
+Times decoding a cash flow request with an N-point daily series into a
+validated CashFlowForecastRequest, for each body format, plus the body size.
+
+Usage (from services/ml-engine):
+    python -m benchmarks.ingest_formats [--points 100000] [--repeats 5]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from starlette.requests import Request
+
+from app.core.binary import ARROW_STREAM, JSON, NPZ, encode_arrow, encode_npz, negotiated_body
+from app.main import CashFlowForecastRequest
+
+FIELDS = {"user_id": "bench", "business_id": "bench", "forecast_periods": 12}
+
+
+def bodies(points: int):
+    ds = pd.date_range("1800-01-01", periods=points, freq="D")
+    y = np.random.default_rng(0).normal(1000, 50, points).round(2)
+    columns = {"historical_data.dates": ds.to_numpy(), "historical_data.values": y}
+
+    as_json = json.dumps({
+        **FIELDS,
+        "historical_data": [{"date": d, "value": v} for d, v in zip(ds.strftime("%Y-%m-%d"), y.tolist())],
+    }).encode()
+    return {
+        JSON: as_json,
+        ARROW_STREAM: encode_arrow(FIELDS, columns),
+        NPZ: encode_npz(FIELDS, columns),
+    }
+
+
+def request_for(body: bytes, content_type: str) -> Request:
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    scope = {"type": "http", "method": "POST", "headers": [(b"content-type", content_type.encode())]}
+    return Request(scope, receive)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    parse = negotiated_body(CashFlowForecastRequest)
+    print(f"{'format':<40} {'body KB':>10} {'best ms':>10}")
+    for content_type, body in bodies(args.points).items():
+        best = float("inf")
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            parsed = asyncio.run(parse(request_for(body, content_type)))
+            best = min(best, time.perf_counter() - start)
+        assert len(parsed.historical_data) == args.points
+        print(f"{content_type:<40} {len(body) / 1024:>10.0f} {best * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Hot-path benchmarks at 10, 1k and 100k rows
+
+Rows are history points for the forecasting, single-product pricing and
+inventory paths, customers for churn, and SKUs for the catalog paths. Inputs
+are seeded, so every run measures the same work.
+"""
+import numpy as np
+import pytest
+
+from app.main import (
+    CashFlowPredictor,
+    ChurnPredictor,
+    DynamicPricingEngine,
+    InventoryOptimizationRequest,
+    InventoryOptimizer,
+    PricingCatalogRequest,
+    PricingOptimizationRequest,
+)
+from benchmarks.conftest import SIZES, customers, daily_series
+
+
+@pytest.mark.parametrize("rows", SIZES)
+def test_cash_flow_forecast_ets(measure, rows):
+    series = daily_series(rows)
+    result = measure(CashFlowPredictor().forecast, rows, series, 12, 0.95, "ets")
+    assert result["engine"] == "ets"
+
+
+def test_cash_flow_forecast_prophet(measure):
+    # Uncached Prophet fit; 100k daily points would take minutes per round
+    rows = 1_000
+    series = daily_series(rows)
+    result = measure(CashFlowPredictor().forecast, rows, series, 12, 0.95, "prophet", rounds=3)
+    assert result["engine"] == "prophet"
+
+
+@pytest.mark.parametrize("rows", SIZES)
+def test_churn_predict(measure, rows):
+    batch = customers(rows)
+    result = measure(ChurnPredictor().predict_churn, rows, batch)
+    assert len(result) == rows
+
+
+@pytest.mark.parametrize("rows", SIZES)
+def test_pricing_optimize_price(measure, rows):
+    request = PricingOptimizationRequest(
+        user_id="bench",
+        product_id="sku",
+        current_price=20.0,
+        cost=12.0,
+        competitor_prices=[19.5, 21.0, 22.5],
+        historical_demand=daily_series(rows),
+    )
+    result = measure(DynamicPricingEngine().optimize_price, rows, request)
+    assert result.optimal_price > 0
+
+
+@pytest.mark.parametrize("rows", SIZES)
+def test_pricing_optimize_catalog(measure, rows):
+    rng = np.random.default_rng(0)
+    price = rng.uniform(5, 100, rows).round(2)
+    request = PricingCatalogRequest(
+        user_id="bench",
+        product_id=[f"sku-{i}" for i in range(rows)],
+        current_price=price.tolist(),
+        cost=(price * rng.uniform(0.4, 0.8, rows)).round(2).tolist(),
+        competitor_price=(price * rng.uniform(0.9, 1.1, rows)).round(2).tolist(),
+        demand_history=rng.gamma(4.0, 25.0, (rows, 12)).round(1).tolist(),
+    )
+    result = measure(DynamicPricingEngine().optimize_catalog, rows, request)
+    assert len(result.columns.optimal_price) == rows
+
+
+@pytest.mark.parametrize("rows", SIZES)
+def test_inventory_optimize(measure, rows):
+    request = InventoryOptimizationRequest(
+        user_id="bench",
+        product_id="sku",
+        historical_demand=daily_series(rows),
+        lead_time_days=14,
+        holding_cost_per_unit=2.5,
+        ordering_cost=80.0,
+        stockout_cost=30.0,
+    )
+    result = measure(InventoryOptimizer().optimize, rows, request)
+    assert result.economic_order_quantity > 0
+
+
+@pytest.mark.parametrize("rows", SIZES)
+def test_inventory_optimize_catalog(measure, rows):
+    rng = np.random.default_rng(0)
+    demand = rng.gamma(4.0, 25.0, (rows, 12))
+    arrays = dict(
+        product_id=[f"sku-{i}" for i in range(rows)],
+        avg_demand=demand.mean(axis=1),
+        std_demand=demand.std(axis=1),
+        lead_time_days=rng.integers(3, 45, rows).astype(np.float64),
+        holding_cost=rng.uniform(0.5, 5, rows),
+        ordering_cost=rng.uniform(20, 200, rows),
+        stockout_cost=np.full(rows, np.nan),
+    )
+    result = measure(lambda: InventoryOptimizer().optimize_catalog(**arrays), rows)
+    assert len(result.columns.product_id) == rows
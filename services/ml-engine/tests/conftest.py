@@ -0,0 +1,12 @@
+"""
+Pytest configuration and shared fixtures
+"""
+import os
+import sys
+from pathlib import Path
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Tests entering the app lifespan shouldn't start a Prophet warm-up fit
+os.environ.setdefault("WARMUP_ENABLED", "false")
@@ -0,0 +1,89 @@
+"""
+Tests for Arrow IPC / .npz request bodies
+"""
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.binary import ARROW_STREAM, NPZ, encode_arrow, encode_npz
+from app.main import app
+
+INVENTORY_FIELDS = {
+    "user_id": "u1",
+    "product_id": "p1",
+    "lead_time_days": 14,
+    "holding_cost_per_unit": 2.0,
+    "ordering_cost": 50.0,
+}
+DEMAND = {"dates": ["2024-01-01", "2024-02-01", "2024-03-01", "2024-04-01"], "values": [100.0, 120.0, 80.0, 95.0]}
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def encode(content_type, fields, columns, ragged=None):
+    if content_type == ARROW_STREAM:
+        return encode_arrow(fields, {**columns, **(ragged or {})})
+    return encode_npz(fields, columns, ragged)
+
+
+@pytest.mark.parametrize("content_type", [ARROW_STREAM, NPZ])
+def test_series_body_matches_json(client, content_type):
+    expected = client.post(
+        "/api/v1/ml/inventory/optimize", json={**INVENTORY_FIELDS, "historical_demand": DEMAND}
+    ).json()
+
+    body = encode(content_type, INVENTORY_FIELDS, {
+        "historical_demand.dates": np.array(DEMAND["dates"], dtype="datetime64[ns]"),
+        "historical_demand.values": np.array(DEMAND["values"]),
+    })
+    response = client.post("/api/v1/ml/inventory/optimize", content=body, headers={"Content-Type": content_type})
+    assert response.status_code == 200
+    assert response.json() == expected
+
+
+@pytest.mark.parametrize("content_type", [ARROW_STREAM, NPZ])
+def test_catalog_body_with_ragged_history(client, content_type):
+    catalog = {
+        "product_id": ["a", "b", "c"],
+        "current_price": [10.0, 20.0, 30.0],
+        "cost": [4.0, 9.0, 12.0],
+    }
+    history = [[10.0, 12.0, 9.0], [], [30.0, 31.0]]
+    expected = client.post(
+        "/api/v1/ml/pricing/optimize/batch", json={"user_id": "u1", **catalog, "demand_history": history}
+    ).json()
+
+    body = encode(content_type, {"user_id": "u1"}, {k: np.array(v) for k, v in catalog.items()},
+                  ragged={"demand_history": history})
+    response = client.post(
+        "/api/v1/ml/pricing/optimize/batch", content=body, headers={"Content-Type": content_type}
+    )
+    assert response.status_code == 200
+    assert response.json() == expected
+
+
+def test_invalid_binary_fields_are_422(client):
+    body = encode_npz(INVENTORY_FIELDS, {
+        "historical_demand.dates": np.array(DEMAND["dates"][:2], dtype="datetime64[ns]"),
+        "historical_demand.values": np.array(DEMAND["values"]),
+    })
+    response = client.post("/api/v1/ml/inventory/optimize", content=body, headers={"Content-Type": NPZ})
+    assert response.status_code == 422
+
+
+def test_undecodable_and_unsupported_bodies(client):
+    response = client.post("/api/v1/ml/inventory/optimize", content=b"garbage", headers={"Content-Type": NPZ})
+    assert response.status_code == 400
+
+    response = client.post("/api/v1/ml/inventory/optimize", content=b"a,b", headers={"Content-Type": "text/csv"})
+    assert response.status_code == 415
+
+
+def test_openapi_documents_negotiated_bodies():
+    schema = app.openapi()
+    content = schema["paths"]["/api/v1/ml/forecast/cashflow"]["post"]["requestBody"]["content"]
+    assert set(content) == {"application/json", ARROW_STREAM, NPZ}
+    assert "CashFlowForecastRequest" in schema["components"]["schemas"]
@@ -0,0 +1,185 @@
+"""
+Tests for ChurnPredictor
+"""
+import json
+
+import pandas as pd
+import pytest
+
+from app.main import ChurnPredictor
+
+
+@pytest.fixture
+def predictor():
+    return ChurnPredictor()
+
+
+@pytest.fixture
+def customers():
+    return [
+        {
+            "customer_id": "loyal",
+            "days_since_last_purchase": 5,
+            "purchase_count": 12,
+            "total_spent": 1200,
+            "engagement_score": 80,
+            "customer_age_days": 360
+        },
+        {
+            "customer_id": "lapsing",
+            "days_since_last_purchase": 75,
+            "purchase_count": 1,
+            "total_spent": 150,
+            "engagement_score": 45
+        },
+        {
+            "customer_id": "gone",
+            "days_since_last_purchase": 120,
+            "purchase_count": 1,
+            "total_spent": 40,
+            "engagement_score": 10
+        },
+        {"customer_id": 42},
+    ]
+
+
+class TestChurnPredictor:
+    """Test cases for vectorized churn scoring"""
+
+    def test_scores_and_risk_levels(self, predictor, customers):
+        scores = predictor.score(customers)
+
+        assert scores["customer_id"].tolist() == ["loyal", "lapsing", "gone", "42"]
+        assert scores["churn_probability"].tolist() == [0.0, 0.5, 0.95, 0.5]
+        assert scores["risk_level"].tolist() == ["LOW", "MEDIUM", "HIGH", "MEDIUM"]
+        assert scores["lifetime_value_prediction"].iloc[0] == 2400.0
+
+    def test_recommendations(self, predictor, customers):
+        records = predictor.to_records(predictor.score(customers))
+
+        assert records[0]["retention_recommendations"] == []
+        assert records[2]["retention_recommendations"] == [
+            "Send personalized win-back email campaign",
+            "Offer exclusive discount or loyalty reward",
+            "Trigger re-engagement workflow",
+            "Provide onboarding support to increase product adoption",
+            "Offer personalized product recommendations",
+        ]
+
+    def test_summary(self, predictor, customers):
+        summary = predictor.summarize(predictor.score(customers))
+
+        assert summary["total_customers"] == 4
+        assert (summary["high_risk"], summary["medium_risk"], summary["low_risk"]) == (1, 2, 1)
+        assert summary["avg_churn_probability"] == 0.487
+
+    def test_accepts_dataframe_and_empty_batch(self, predictor, customers):
+        assert predictor.score(pd.DataFrame(customers))["risk_level"].tolist() == ["LOW", "MEDIUM", "HIGH", "MEDIUM"]
+        assert predictor.summarize(predictor.score([]))["avg_churn_probability"] == 0.0
+
+    def test_predict_churn_returns_responses(self, predictor, customers):
+        results = predictor.predict_churn(customers)
+
+        assert results[2].risk_level == "HIGH"
+        assert results[2].lifetime_value_prediction == 3.95
+
+
+class TestChurnStreamEndpoint:
+    """Test cases for /api/v1/ml/churn/predict/stream"""
+
+    @pytest.fixture
+    def client(self):
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        return TestClient(app)
+
+    def test_ndjson_with_bad_line(self, client, customers):
+        body = "\n".join([json.dumps(customers[0]), "{broken", json.dumps(customers[2])]) + "\n"
+        response = client.post(
+            "/api/v1/ml/churn/predict/stream",
+            content=body,
+            headers={"content-type": "application/x-ndjson"}
+        )
+        records = [json.loads(line) for line in response.text.splitlines()]
+
+        assert response.status_code == 200
+        assert records[0] == {"line": 2, "status": "error", "error": records[0]["error"]}
+        assert [r["customer_id"] for r in records[1:3]] == ["loyal", "gone"]
+        assert records[-1]["summary"]["total_customers"] == 2
+        assert records[-1]["summary"]["errors"] == 1
+
+    def test_csv_in_chunks(self, client, monkeypatch):
+        monkeypatch.setattr("app.main.settings.CHURN_STREAM_CHUNK_SIZE", 2)
+        body = "customer_id,days_since_last_purchase,purchase_count,total_spent\n" + "".join(
+            f"00{i},120,1,40\n" for i in range(5)
+        )
+        response = client.post("/api/v1/ml/churn/predict/stream", content=body, headers={"content-type": "text/csv"})
+        records = [json.loads(line) for line in response.text.splitlines()]
+
+        assert [r["customer_id"] for r in records[:5]] == ["000", "001", "002", "003", "004"]
+        assert records[-1]["summary"]["high_risk"] == 5
+
+    def test_rejects_unknown_content_type(self, client):
+        response = client.post("/api/v1/ml/churn/predict/stream", json={"customers": []})
+
+        assert response.status_code == 415
+
+
+class TestTrainedModel:
+    @pytest.fixture(scope="class")
+    def history(self):
+        from app.churn_model import synthetic_history
+        return synthetic_history(2000)
+
+    def test_train_save_load_roundtrip(self, history, tmp_path):
+        from app.churn_model import load_artifact, save_artifact, train_churn_model
+
+        model, metrics = train_churn_model(history)
+        assert metrics["rows"] == 2000
+        assert metrics["holdout_auc"] > 0.7
+
+        save_artifact(model, metrics, str(tmp_path), version="20240101T000000Z")
+        save_artifact(model, metrics, str(tmp_path), version="20240201T000000Z")
+
+        latest = load_artifact(str(tmp_path))
+        assert latest.version == "20240201T000000Z"
+        assert latest.metadata["metrics"] == metrics
+        assert load_artifact(str(tmp_path), "20240101T000000Z").version == "20240101T000000Z"
+        assert load_artifact(str(tmp_path / "missing")) is None
+
+    def test_pinned_version_must_exist(self, history, tmp_path, monkeypatch):
+        from fastapi.testclient import TestClient
+
+        from app import main
+        from app.churn_model import load_artifact, save_artifact, train_churn_model
+
+        with pytest.raises(FileNotFoundError):
+            load_artifact(str(tmp_path), "20240101T000000Z")
+
+        model, metrics = train_churn_model(history)
+        path = save_artifact(model, metrics, str(tmp_path), version="20240101T000000Z")
+        metadata = json.loads(path.with_suffix(".json").read_text())
+        path.with_suffix(".json").write_text(json.dumps({**metadata, "features": ["recency"]}))
+        with pytest.raises(ValueError):
+            load_artifact(str(tmp_path), "20240101T000000Z")
+
+        # The service refuses to start instead of scoring with rules
+        monkeypatch.setattr(main.settings, "CHURN_MODEL_DIR", str(tmp_path))
+        monkeypatch.setattr(main.settings, "CHURN_MODEL_VERSION", "20990101T000000Z")
+        with pytest.raises(FileNotFoundError):
+            with TestClient(main.app):
+                pass
+
+    def test_model_scores_replace_rules(self, history, customers):
+        from app.churn_model import ChurnModelArtifact, extract_features, feature_matrix, train_churn_model
+
+        model, _ = train_churn_model(history)
+        predictor = ChurnPredictor(model=ChurnModelArtifact("test", model, {}), batch_size=2)
+        scores = predictor.score(customers)
+
+        features = feature_matrix(extract_features(pd.DataFrame(customers)))
+        expected = model.predict_proba(features)[:, 1]
+        assert scores["churn_probability"].tolist() == pytest.approx(expected.round(3).tolist())
+        assert predictor.summarize(scores)["model_version"] == "test"
+        assert ChurnPredictor().summarize(scores)["model_version"] == "rules"
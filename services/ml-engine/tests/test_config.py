@@ -0,0 +1,39 @@
+"""
+Tests for settings defaults
+"""
+import os
+
+from app.core.config import Settings
+
+
+class TestSimulationPoolWorkers:
+    """Test cases for the per-worker simulation pool size"""
+
+    def test_cores_split_between_uvicorn_workers(self, monkeypatch):
+        monkeypatch.setattr(os, "cpu_count", lambda: 8)
+
+        assert Settings(WEB_CONCURRENCY=1).SIMULATION_POOL_WORKERS == 8
+        assert Settings(WEB_CONCURRENCY=4).SIMULATION_POOL_WORKERS == 2
+        assert Settings(WEB_CONCURRENCY=16).SIMULATION_POOL_WORKERS == 1
+
+    def test_explicit_value_wins(self, monkeypatch):
+        monkeypatch.setattr(os, "cpu_count", lambda: 8)
+
+        assert Settings(WEB_CONCURRENCY=4, SIMULATION_POOL_WORKERS=3).SIMULATION_POOL_WORKERS == 3
+
+
+class TestFitPoolWorkers:
+    """Test cases for the per-worker fit pool size"""
+
+    def test_cores_split_between_uvicorn_workers(self, monkeypatch):
+        monkeypatch.setattr(os, "cpu_count", lambda: 4)
+
+        assert Settings(WEB_CONCURRENCY=1).FIT_POOL_WORKERS == 2
+        assert Settings(WEB_CONCURRENCY=4).FIT_POOL_WORKERS == 1
+        assert Settings(WEB_CONCURRENCY=8).FIT_POOL_WORKERS == 1
+
+    def test_explicit_value_wins(self, monkeypatch):
+        monkeypatch.setattr(os, "cpu_count", lambda: 4)
+
+        assert Settings(WEB_CONCURRENCY=4, FIT_POOL_WORKERS=3).FIT_POOL_WORKERS == 3
+        assert Settings(WEB_CONCURRENCY=4, FIT_POOL_WORKERS=0).FIT_POOL_WORKERS == 0
@@ -0,0 +1,56 @@
+"""
+Tests for the model fitting pool
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.core.fit_pool import FitPool, FitPoolSaturated
+
+
+def _slow_square(x: int, delay: float) -> int:
+    time.sleep(delay)
+    return x * x
+
+
+class TestFitPool:
+    """Test cases for FitPool"""
+
+    @pytest.mark.asyncio
+    async def test_runs_in_worker_process(self):
+        """Results come back from the process pool"""
+        pool = FitPool(workers=2, max_queue=2, retry_after=3)
+        try:
+            results = await asyncio.gather(*(pool.run(_slow_square, i, 0.01) for i in range(4)))
+        finally:
+            pool.shutdown()
+
+        assert results == [0, 1, 4, 9]
+        assert pool.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_saturated(self):
+        """Work beyond workers + max_queue is rejected with retry hint"""
+        pool = FitPool(workers=1, max_queue=1, retry_after=7)
+        try:
+            running = [asyncio.create_task(pool.run(_slow_square, i, 0.5)) for i in range(2)]
+            await asyncio.sleep(0.05)
+
+            with pytest.raises(FitPoolSaturated) as exc_info:
+                await pool.run(_slow_square, 3, 0.0)
+            assert exc_info.value.retry_after == 7
+
+            assert await asyncio.gather(*running) == [0, 1]
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_inline_mode(self):
+        """workers=0 runs fits on a background thread"""
+        pool = FitPool(workers=0, max_queue=0, retry_after=1)
+        try:
+            assert await pool.run(_slow_square, 5, 0.0) == 25
+            assert pool.capacity == 1
+        finally:
+            pool.shutdown()
@@ -0,0 +1,157 @@
+"""
+Tests for the forecasting kernels
+"""
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.forecasting import (
+    MIN_POINTS_FOR_SEASONALITY,
+    PROPHET_PARAMS,
+    _resize_init,
+    ets_forecast,
+    linear_forecast,
+    select_engine,
+)
+
+FORECAST_COLUMNS = ["ds", "yhat", "yhat_lower", "yhat_upper", "trend", "yearly"]
+
+
+@pytest.fixture
+def monthly_series():
+    """12 months of noisy, upward-trending cash flow"""
+    ds = pd.date_range("2023-01-31", periods=12, freq="ME").values
+    y = 1000 + np.arange(12) * 25 + np.random.default_rng(42).normal(0, 20, 12)
+    return ds, y
+
+
+class TestSelectEngine:
+    """Test cases for select_engine"""
+
+    @staticmethod
+    def dates(periods, freq):
+        return pd.date_range("2022-01-31", periods=periods, freq=freq).values
+
+    def test_auto_uses_prophet_with_two_years_of_history(self):
+        assert select_engine("auto", self.dates(MIN_POINTS_FOR_SEASONALITY, "ME")) == "prophet"
+        assert select_engine("auto", self.dates(730, "D")) == "prophet"
+        assert select_engine("auto", self.dates(8, "QE")) == "ets"  # too few points
+
+    def test_auto_uses_fast_engines_for_short_history(self):
+        assert select_engine("auto", self.dates(12, "ME")) == "ets"
+        assert select_engine("auto", self.dates(3, "ME")) == "linear"
+
+    def test_auto_decides_on_time_span_not_point_count(self):
+        # Plenty of points, but only a few months of them
+        assert select_engine("auto", self.dates(90, "D")) == "ets"
+        assert select_engine("auto", self.dates(MIN_POINTS_FOR_SEASONALITY - 1, "ME")) == "ets"
+
+    def test_explicit_engine_is_kept(self):
+        assert select_engine("linear", self.dates(100, "ME")) == "linear"
+
+
+class TestFastEngines:
+    """Test cases for the NumPy forecasting engines"""
+
+    @pytest.mark.parametrize("engine", [ets_forecast, linear_forecast])
+    def test_frame_shape(self, engine, monthly_series):
+        ds, y = monthly_series
+        forecast = engine(ds, y, 6, 0.95)
+
+        assert list(forecast.columns) == FORECAST_COLUMNS
+        assert len(forecast) == 18
+        assert forecast["ds"].iloc[12] == pd.Timestamp("2024-01-31")
+        assert (forecast["yhat_lower"] <= forecast["yhat"]).all()
+        assert (forecast["yhat"] <= forecast["yhat_upper"]).all()
+
+    @pytest.mark.parametrize("engine", [ets_forecast, linear_forecast])
+    def test_follows_trend(self, engine, monthly_series):
+        ds, y = monthly_series
+        future = engine(ds, y, 6, 0.95)["yhat"].tail(6)
+
+        assert future.is_monotonic_increasing
+        assert 1250 < future.iloc[-1] < 1550
+
+    def test_wider_interval_for_higher_confidence(self, monthly_series):
+        ds, y = monthly_series
+        narrow = linear_forecast(ds, y, 6, 0.8)
+        wide = linear_forecast(ds, y, 6, 0.99)
+
+        assert ((wide["yhat_upper"] - wide["yhat_lower"]) > (narrow["yhat_upper"] - narrow["yhat_lower"])).all()
+
+    @pytest.mark.parametrize("engine", [ets_forecast, linear_forecast])
+    def test_daily_history_forecasts_month_ends(self, engine):
+        # Rising 1/day up to 299 on 2024-10-26: 5, 35 and 66 days to the next month-ends
+        ds = pd.date_range("2024-01-01", periods=300, freq="D").values
+        y = np.arange(300, dtype=np.float64)
+
+        future = engine(ds, y, 3, 0.95).tail(3)
+
+        assert list(future["ds"]) == list(pd.to_datetime(["2024-10-31", "2024-11-30", "2024-12-31"]))
+        assert future["yhat"].to_numpy() == pytest.approx([304, 334, 365], abs=1)
+
+    def test_ets_monthly_horizon_does_not_drift(self, monthly_series):
+        ds, y = monthly_series
+        future = ets_forecast(ds, 1000 + np.arange(12) * 25.0, 36, 0.95)["yhat"].tail(36)
+
+        assert future.to_numpy() == pytest.approx(1300 + np.arange(36) * 25.0, abs=1)
+
+    def test_ets_falls_back_for_tiny_series(self, monthly_series):
+        ds, y = monthly_series
+        forecast = ets_forecast(ds[:2], y[:2], 3, 0.95)
+
+        assert len(forecast) == 5
+
+    def test_ets_memory_does_not_scale_with_grid(self):
+        # The parameter grid has 216 cells; keeping a path per cell for 50k
+        # points would take ~170 MB
+        n = 50_000
+        ds = pd.date_range("1900-01-01", periods=n, freq="D").values
+        y = 100 + np.random.default_rng(0).normal(0, 5, n).cumsum()
+
+        tracemalloc.start()
+        try:
+            ets_forecast(ds, y, 12, 0.95)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert peak < 30 * 2**20
+
+    def test_linear_memory_does_not_scale_with_pairs(self):
+        # Every pair of 20k points is 200M pairs, several GB of index arrays
+        n = 20_000
+        ds = pd.date_range("1970-01-01", periods=n, freq="D").values
+        y = 50 + 0.5 * np.arange(n) + np.random.default_rng(0).normal(0, 5, n)
+
+        tracemalloc.start()
+        try:
+            forecast = linear_forecast(ds, y, 3, 0.95)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert peak < 50 * 2**20
+        # Sampled pairs still recover the trend (0.5 per day)
+        fitted = forecast["yhat"].to_numpy()[:n]
+        assert (fitted[-1] - fitted[0]) / (n - 1) == pytest.approx(0.5, rel=0.01)
+
+
+class TestWarmStart:
+    """Test cases for warm-start parameter handling"""
+
+    @pytest.fixture
+    def model(self):
+        prophet = pytest.importorskip("prophet")
+        return prophet.Prophet(**PROPHET_PARAMS)
+
+    @pytest.mark.parametrize("n_points,expected", [(24, 18), (25, 19), (40, 25), (2, 1)])
+    def test_resize_matches_prophet_changepoints(self, model, n_points, expected):
+        init = {"k": 0.1, "m": 0.5, "sigma_obs": 0.05, "delta": np.arange(18, dtype=float), "beta": np.zeros(20)}
+        resized = _resize_init(init, n_points, model)
+
+        assert resized["delta"].shape == (expected,)
+        assert resized["delta"][0] == 0.0
+        assert resized["k"] == 0.1
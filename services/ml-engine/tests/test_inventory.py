@@ -0,0 +1,176 @@
+"""
+Tests for the inventory kernels and InventoryOptimizer
+"""
+import asyncio
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.fit_pool import FitPool
+from app.main import (
+    InventoryOptimizationRequest,
+    InventoryOptimizer,
+    InventorySimulationRequest,
+    TimeSeriesData,
+    app,
+)
+from app.pricing import ragged_stats
+
+
+@pytest.fixture
+def catalog():
+    rng = np.random.default_rng(11)
+    n = 30
+    return {
+        "user_id": "u1",
+        "product_id": [f"sku-{i}" for i in range(n)],
+        "demand_history": [rng.gamma(4.0, 25.0, 12).round(1).tolist() for _ in range(n)],
+        "lead_time_days": rng.integers(3, 45, n).tolist(),
+        "holding_cost_per_unit": rng.uniform(0.5, 5, n).round(2).tolist(),
+        "ordering_cost": rng.uniform(20, 200, n).round(2).tolist(),
+        "stockout_cost": [None if i % 3 else 25.0 for i in range(n)],
+    }
+
+
+def single_results(catalog):
+    optimizer = InventoryOptimizer()
+    for i, product_id in enumerate(catalog["product_id"]):
+        yield optimizer.optimize(InventoryOptimizationRequest(
+            user_id="u1",
+            product_id=product_id,
+            historical_demand=[
+                TimeSeriesData(date=f"2024-{m + 1:02d}-01", value=v)
+                for m, v in enumerate(catalog["demand_history"][i])
+            ],
+            lead_time_days=catalog["lead_time_days"][i],
+            holding_cost_per_unit=catalog["holding_cost_per_unit"][i],
+            ordering_cost=catalog["ordering_cost"][i],
+            stockout_cost=catalog["stockout_cost"][i],
+        ))
+
+
+def test_batch_endpoint_matches_single_product_path(catalog):
+    response = TestClient(app).post("/api/v1/ml/inventory/optimize/batch", json=catalog)
+    assert response.status_code == 200
+    columns = response.json()["columns"]
+
+    for i, single in enumerate(single_results(catalog)):
+        for name in ("economic_order_quantity", "reorder_point", "safety_stock", "total_cost"):
+            assert columns[name][i] == pytest.approx(getattr(single, name), abs=0.01)
+
+
+def test_single_product_recommendations_unchanged():
+    response = InventoryOptimizer().optimize(InventoryOptimizationRequest(
+        user_id="u1",
+        product_id="p1",
+        historical_demand=[TimeSeriesData(date="2024-01-01", value=v) for v in (100, 20, 180, 60)],
+        lead_time_days=30,
+        holding_cost_per_unit=2.0,
+        ordering_cost=50.0,
+    ))
+    # EOQ = sqrt(2 * 1080 * 50 / 2) = 232.4; safety stock / lead-time demand > 0.5
+    assert response.economic_order_quantity == pytest.approx(232.38, abs=0.01)
+    assert response.recommendations == [
+        "High safety stock needed due to demand volatility - consider supplier diversification",
+        "Order 232 units every 78 days",
+        f"Reorder when inventory reaches {int(response.reorder_point)} units",
+    ]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_upload_matches_json_batch(catalog, fmt):
+    frame = pd.DataFrame({
+        "product_id": catalog["product_id"],
+        "lead_time_days": catalog["lead_time_days"],
+        "holding_cost_per_unit": catalog["holding_cost_per_unit"],
+        "ordering_cost": catalog["ordering_cost"],
+        "stockout_cost": catalog["stockout_cost"],
+    })
+    demand = pd.DataFrame(catalog["demand_history"]).add_prefix("demand_")
+    frame = pd.concat([frame, demand], axis=1)
+
+    buffer = io.BytesIO()
+    if fmt == "csv":
+        frame.to_csv(buffer, index=False)
+    else:
+        frame.to_parquet(buffer, index=False)
+
+    client = TestClient(app)
+    uploaded = client.post(
+        "/api/v1/ml/inventory/optimize/upload",
+        data={"user_id": "u1"},
+        files={"file": (f"catalog.{fmt}", buffer.getvalue())},
+    )
+    assert uploaded.status_code == 200
+    expected = client.post("/api/v1/ml/inventory/optimize/batch", json=catalog).json()
+    for name in ("economic_order_quantity", "reorder_point", "total_cost"):
+        assert uploaded.json()["columns"][name] == pytest.approx(expected["columns"][name], abs=0.01)
+
+
+def test_upload_rejects_unknown_format_and_missing_columns():
+    client = TestClient(app)
+    response = client.post(
+        "/api/v1/ml/inventory/optimize/upload",
+        data={"user_id": "u1"},
+        files={"file": ("catalog.xlsx", b"junk")},
+    )
+    assert response.status_code == 415
+
+    response = client.post(
+        "/api/v1/ml/inventory/optimize/upload",
+        data={"user_id": "u1"},
+        files={"file": ("catalog.csv", b"product_id,demand_1\na,3\n")},
+    )
+    assert response.status_code == 400
+
+
+class TestSimulation:
+    @pytest.fixture
+    def request_body(self, catalog):
+        return dict(catalog, seed=42, n_scenarios=4000)
+
+    def simulate(self, body, pool=None, chunk_size=500):
+        optimizer = InventoryOptimizer(simulation_pool=pool, chunk_size=chunk_size)
+        return asyncio.run(optimizer.simulate(InventorySimulationRequest(**body)))
+
+    def test_fixed_lead_time_matches_normal_safety_stock(self, request_body):
+        columns = self.simulate(request_body).columns
+        stats = ragged_stats(request_body["demand_history"])
+        expected = 1.645 * stats["std"] * np.sqrt(np.array(request_body["lead_time_days"]) / 30)
+
+        # Demand is truncated at zero, so allow some sampling/shape slack
+        np.testing.assert_allclose(columns.safety_stock, expected, rtol=0.15, atol=1.0)
+        assert min(columns.service_level) >= 0.95
+
+    def test_lead_time_variability_raises_safety_stock(self, request_body):
+        fixed = self.simulate(request_body).columns
+        request_body["lead_time_std_days"] = [5.0] * len(request_body["product_id"])
+        variable = self.simulate(request_body).columns
+        assert sum(variable.safety_stock) > sum(fixed.safety_stock)
+
+    def test_cost_objective(self, request_body):
+        request_body["objective"] = "cost"
+        request_body["stockout_cost"] = None
+        columns = self.simulate(request_body).columns
+        assert max(columns.safety_stock) == 0.0  # stockouts are free
+
+        request_body["stockout_cost"] = [1e6] * len(request_body["product_id"])
+        columns = self.simulate(request_body).columns
+        assert min(columns.service_level) > 0.99
+
+    def test_results_independent_of_pool(self, request_body):
+        inline = self.simulate(request_body, chunk_size=7)
+        pool = FitPool(workers=2, max_queue=8, retry_after=1)
+        try:
+            pooled = self.simulate(request_body, pool=pool, chunk_size=7)
+        finally:
+            pool.shutdown()
+        assert pooled.columns == inline.columns
+
+    def test_endpoint_rejects_mismatched_lead_time_std(self, catalog):
+        catalog["lead_time_std_days"] = [1.0]
+        response = TestClient(app).post("/api/v1/ml/inventory/simulate", json=catalog)
+        assert response.status_code == 422
@@ -0,0 +1,363 @@
+"""
+Tests for the asynchronous job subsystem
+"""
+import asyncio
+import json
+import time
+
+import fakeredis
+import fakeredis.aioredis
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import jobs
+from app.core.jobs import JobManager, JobQueueFull, RedisJobStore
+from app.main import app
+
+
+@pytest.fixture
+def public_dns(monkeypatch):
+    """Resolve hosts named *.example.com to a public address and everything else to loopback"""
+    async def resolve(host, port):
+        return ["93.184.216.34"] if host.endswith("example.com") else ["127.0.0.1"]
+
+    monkeypatch.setattr(jobs, "resolve_host", resolve)
+
+
+async def wait_finished(manager, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = await manager.get(job_id)
+        if job is not None and job["finished_at"] is not None:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+class TestJobManager:
+    """Test cases for JobManager"""
+
+    @pytest.mark.asyncio
+    async def test_runs_job_and_keeps_result(self):
+        manager = JobManager(workers=2, max_queue=4, result_ttl=60)
+        await manager.start()
+        try:
+            async def work():
+                return {"answer": 42}
+
+            job = await manager.submit("test", work)
+            assert job.status == jobs.QUEUED
+            finished = await wait_finished(manager, job.id)
+        finally:
+            await manager.stop()
+
+        assert finished["status"] == jobs.SUCCEEDED
+        assert finished["result"] == {"answer": 42}
+        assert finished["started_at"] >= finished["created_at"]
+
+    @pytest.mark.asyncio
+    async def test_failure_is_recorded(self):
+        manager = JobManager(workers=1, max_queue=4, result_ttl=60)
+        await manager.start()
+        try:
+            async def work():
+                raise ValueError("bad input")
+
+            job = await manager.submit("test", work)
+            finished = await wait_finished(manager, job.id)
+        finally:
+            await manager.stop()
+
+        assert finished["status"] == jobs.FAILED
+        assert finished["error"] == "bad input"
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_full(self):
+        manager = JobManager(workers=1, max_queue=1, result_ttl=60, retry_after=9)
+        await manager.start()
+        release = asyncio.Event()
+        try:
+            async def work():
+                await release.wait()
+
+            await manager.submit("test", work)
+            await asyncio.sleep(0.01)  # first job is picked up by the worker
+            await manager.submit("test", work)
+
+            with pytest.raises(JobQueueFull) as exc_info:
+                await manager.submit("test", work)
+            assert exc_info.value.retry_after == 9
+        finally:
+            release.set()
+            await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_results_expire(self):
+        manager = JobManager(workers=1, max_queue=4, result_ttl=0.05)
+        await manager.start()
+        try:
+            async def work():
+                return 1
+
+            job = await manager.submit("test", work)
+            await wait_finished(manager, job.id)
+            await asyncio.sleep(0.1)
+            assert await manager.get(job.id) is None
+        finally:
+            await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_webhook_receives_finished_job(self, monkeypatch, public_dns):
+        received = []
+
+        def handler(request):
+            received.append(request)
+            return httpx.Response(200)
+
+        client = httpx.AsyncClient
+        monkeypatch.setattr(
+            jobs.httpx, "AsyncClient",
+            lambda **kwargs: client(transport=httpx.MockTransport(handler), **kwargs)
+        )
+
+        manager = JobManager(workers=1, max_queue=4, result_ttl=60)
+        await manager.start()
+        try:
+            async def work():
+                return [1, 2, 3]
+
+            job = await manager.submit("test", work, webhook_url="https://hooks.example.com/done")
+            await wait_finished(manager, job.id)
+            for _ in range(100):
+                if received:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await manager.stop()
+
+        assert len(received) == 1
+        assert str(received[0].url) == "https://hooks.example.com/done"
+        body = json.loads(received[0].content)
+        assert body["job_id"] == job.id
+        assert body["result"] == [1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_webhook_retries_without_trailing_sleep(self, monkeypatch, public_dns):
+        attempts, sleeps = [], []
+
+        def handler(request):
+            attempts.append(request)
+            return httpx.Response(503)
+
+        async def sleep(seconds):
+            sleeps.append(seconds)
+
+        client = httpx.AsyncClient
+        monkeypatch.setattr(
+            jobs.httpx, "AsyncClient",
+            lambda **kwargs: client(transport=httpx.MockTransport(handler), **kwargs)
+        )
+        monkeypatch.setattr(jobs.asyncio, "sleep", sleep)
+
+        job = jobs.Job("test", None, "https://hooks.example.com/done")
+        await JobManager(workers=1, max_queue=1, result_ttl=60)._notify(job)
+
+        assert len(attempts) == jobs.WEBHOOK_ATTEMPTS
+        assert sleeps == [2 ** attempt for attempt in range(jobs.WEBHOOK_ATTEMPTS - 1)]
+
+
+
+class TestRedisJobStore:
+    """Job status shared between worker processes through Redis"""
+
+    @pytest.fixture
+    def server(self):
+        return fakeredis.FakeServer()
+
+    def worker(self, server, **kwargs):
+        """A JobManager as another uvicorn worker would build it"""
+        redis = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+        return JobManager(workers=1, max_queue=4, store=RedisJobStore(redis), **kwargs)
+
+    @pytest.mark.asyncio
+    async def test_any_worker_sees_the_job(self, server):
+        submitter = self.worker(server, result_ttl=60)
+        poller = self.worker(server, result_ttl=60)
+        await submitter.start()
+        release = asyncio.Event()
+        try:
+            async def work():
+                await release.wait()
+                return {"answer": 42}
+
+            job = await submitter.submit("test", work)
+            await asyncio.sleep(0.01)
+            assert (await poller.get(job.id))["status"] == jobs.RUNNING
+
+            release.set()
+            finished = await wait_finished(poller, job.id)
+        finally:
+            await submitter.stop()
+
+        assert finished["status"] == jobs.SUCCEEDED
+        assert finished["result"] == {"answer": 42}
+        assert await poller.get("unknown") is None
+
+    @pytest.mark.asyncio
+    async def test_results_expire(self, server):
+        manager = self.worker(server, result_ttl=0.05)
+        await manager.start()
+        try:
+            async def work():
+                return 1
+
+            job = await manager.submit("test", work)
+            await wait_finished(manager, job.id)
+            await asyncio.sleep(0.1)
+            assert await manager.get(job.id) is None
+        finally:
+            await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_store_errors_do_not_kill_workers(self, server, monkeypatch):
+        manager = self.worker(server, result_ttl=60)
+        await manager.start()
+        try:
+            async def work():
+                return 1
+
+            job = await manager.submit("test", work)
+
+            async def broken(record, ttl):
+                raise ConnectionError("redis went away")
+
+            monkeypatch.setattr(manager.store, "put", broken)
+            await asyncio.sleep(0.05)
+            monkeypatch.undo()
+
+            second = await manager.submit("test", work)
+            assert (await wait_finished(manager, second.id))["status"] == jobs.SUCCEEDED
+            assert (await manager.get(job.id))["status"] == jobs.QUEUED
+        finally:
+            await manager.stop()
+
+
+class TestWebhookUrls:
+    """Test cases for check_webhook_url"""
+
+    @pytest.mark.asyncio
+    async def test_public_https_url_is_accepted(self, public_dns):
+        await jobs.check_webhook_url("https://hooks.example.com/done")
+        await jobs.check_webhook_url("https://hooks.example.com/done", ["HOOKS.example.com"])
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("url", [
+        "http://hooks.example.com/done",  # not https
+        "https://metadata.internal/latest",  # resolves to loopback
+        "https://127.0.0.1/admin",
+        "https://10.0.0.5/hook",
+        "https://169.254.169.254/latest/meta-data",
+        "https://[::1]/hook",
+        "https://[::ffff:127.0.0.1]/hook",
+    ])
+    async def test_private_or_plain_urls_are_rejected(self, monkeypatch, url):
+        async def resolve(host, port):
+            # IP literals resolve to themselves
+            return [host] if host[0].isdigit() or ":" in host else ["127.0.0.1"]
+
+        monkeypatch.setattr(jobs, "resolve_host", resolve)
+        with pytest.raises(jobs.WebhookRejected):
+            await jobs.check_webhook_url(url)
+
+    @pytest.mark.asyncio
+    async def test_allowlist(self, public_dns):
+        with pytest.raises(jobs.WebhookRejected, match="not allowed"):
+            await jobs.check_webhook_url("https://other.example.com/done", ["hooks.example.com"])
+
+    @pytest.mark.asyncio
+    async def test_rejected_at_delivery_time(self, monkeypatch, public_dns):
+        """A host that resolves privately by the time the job finishes is not called"""
+        received = []
+        client = httpx.AsyncClient
+        monkeypatch.setattr(
+            jobs.httpx, "AsyncClient",
+            lambda **kwargs: client(transport=httpx.MockTransport(received.append), **kwargs)
+        )
+
+        job = jobs.Job("test", None, "https://rebound.test/done")
+        await JobManager(workers=1, max_queue=1, result_ttl=60)._notify(job)
+
+        assert received == []
+
+class TestJobEndpoints:
+    """Submitting and polling jobs through the API"""
+
+    @pytest.fixture
+    def client(self):
+        with TestClient(app) as client:
+            yield client
+
+    def poll(self, client, job_id, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            body = client.get(f"/api/v1/ml/jobs/{job_id}").json()
+            if body["status"] in (jobs.SUCCEEDED, jobs.FAILED):
+                return body
+            time.sleep(0.02)
+        raise AssertionError(f"Job {job_id} did not finish")
+
+    def test_inventory_catalog_job(self, client):
+        payload = {
+            "user_id": "u1",
+            "product_id": ["a", "b"],
+            "demand_history": [[100, 120, 90], [10, 12, 8]],
+            "lead_time_days": [7, 14],
+            "holding_cost_per_unit": [1.0, 2.0],
+            "ordering_cost": [50.0, 40.0],
+        }
+        response = client.post("/api/v1/ml/jobs", json={"kind": "inventory_catalog", "payload": payload})
+        assert response.status_code == 202
+        accepted = response.json()
+        assert accepted["status_url"] == f"/api/v1/ml/jobs/{accepted['job_id']}"
+
+        body = self.poll(client, accepted["job_id"])
+        assert body["status"] == jobs.SUCCEEDED
+        assert body["kind"] == "inventory_catalog"
+
+        direct = client.post("/api/v1/ml/inventory/optimize/batch", json=payload).json()
+        assert body["result"] == direct
+
+    def test_invalid_payload_is_rejected_up_front(self, client):
+        response = client.post("/api/v1/ml/jobs", json={
+            "kind": "inventory_catalog",
+            "payload": {"user_id": "u1"},
+        })
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"][:2] == ["body", "payload"]
+
+    def test_endpoint_errors_fail_the_job(self, client):
+        response = client.post("/api/v1/ml/jobs", json={
+            "kind": "sales_forecast",
+            "payload": {
+                "user_id": "u1",
+                "business_id": "b1",
+                "historical_sales": [{"date": "2024-01-01", "value": 1.0}],
+            },
+        })
+        body = self.poll(client, response.json()["job_id"])
+        assert body["status"] == jobs.FAILED
+        assert body["error"].startswith("400")
+
+    @pytest.mark.parametrize("url", ["https://127.0.0.1/internal", "http://localhost:8001/health"])
+    def test_private_webhook_is_rejected(self, client, url):
+        response = client.post("/api/v1/ml/jobs", json={
+            "kind": "sales_forecast",
+            "payload": {"user_id": "u1", "business_id": "b1", "historical_sales": []},
+            "webhook_url": url,
+        })
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "webhook_url"]
+
+    def test_unknown_job(self, client):
+        assert client.get("/api/v1/ml/jobs/nope").status_code == 404
@@ -0,0 +1,108 @@
+"""
+Tests for deterministic market trend and risk scoring
+"""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.model_cache import ModelCache
+from app.main import MarketScorer, MarketTrendRequest, RiskAssessmentRequest, app
+from app.market import DEFAULT_REFERENCE_PATH, MarketReference, normalize_key, normalize_keywords, score_market_trend
+
+
+@pytest.fixture(scope="module")
+def reference():
+    return MarketReference.load()
+
+
+@pytest.fixture(scope="module")
+def table():
+    with open(DEFAULT_REFERENCE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def scorer(reference):
+    return MarketScorer(reference, ModelCache(max_entries=100, ttl_seconds=60, max_bytes=1024 * 1024))
+
+
+def test_normalization():
+    assert normalize_key("  Food & Beverage ") == "food_and_beverage"
+    assert normalize_keywords(["AI", "ai ", "Sustainability", ""]) == ("ai", "sustainability")
+
+
+@pytest.mark.parametrize("name, key", [
+    ("Food & Beverage", "food_and_beverage"),
+    ("Food and Beverage", "food_and_beverage"),
+    ("E-commerce", "ecommerce"),
+    ("E-Commerce", "ecommerce"),
+    ("Retail", "retail"),
+    ("Technology", "technology"),
+    ("Healthcare", "healthcare"),
+])
+def test_display_names_resolve_to_their_industry(reference, table, name, key):
+    assert reference.industry(normalize_key(name)) == table["industries"][key]
+
+
+def test_display_names_resolve_to_their_region_and_keyword(reference, table):
+    assert reference.region(normalize_key("Asia-Pacific")) == table["regions"]["asia_pacific"]
+    assert reference.region(normalize_key("Latin America")) == table["regions"]["latin_america"]
+    assert reference.keyword(normalize_key("E-commerce")) == table["keywords"]["ecommerce"]
+
+
+def test_unknown_segment_uses_defaults(reference):
+    scored = score_market_trend(reference, "underwater_basket_weaving", "atlantis", ())
+    default = reference.industries["default"]
+    assert scored["trend_score"] == default["trend_score"]
+    assert scored["growth_rate"] == default["growth_rate"]
+
+
+def test_keywords_shift_scores(reference):
+    base = score_market_trend(reference, "retail", "mexico", ())
+    boosted = score_market_trend(reference, "retail", "mexico", ("ai", "ecommerce"))
+    assert boosted["trend_score"] > base["trend_score"]
+    assert boosted["emerging_trends"][0] == "AI-powered personalization"
+
+
+def test_trends_are_deterministic_and_cached(scorer):
+    first = scorer.analyze_trends(MarketTrendRequest(industry="Retail", region="Mexico", keywords=["AI", "delivery"]))
+    second = scorer.analyze_trends(MarketTrendRequest(industry="retail ", region="mexico", keywords=["delivery", "ai"]))
+
+    assert first == second
+    stats = scorer.cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_risk_uses_financial_ratios_and_segment(scorer):
+    healthy = scorer.assess_risk(RiskAssessmentRequest(
+        user_id="u1", business_id="b1",
+        financial_data={"current_ratio": 2.0, "debt_to_equity": 0.4, "profit_margin": 0.15},
+        market_data={"industry": "services", "region": "europe"}
+    ))
+    stressed = scorer.assess_risk(RiskAssessmentRequest(
+        user_id="u1", business_id="b1",
+        financial_data={"current_ratio": 0.8, "debt_to_equity": 2.5, "profit_margin": -0.05},
+        market_data={"industry": "services", "region": "europe"}
+    ))
+
+    assert stressed.overall_risk_score > healthy.overall_risk_score
+    assert healthy.market_risk_score == stressed.market_risk_score
+    assert {f["factor"] for f in stressed.risk_factors} == {"Liquidity Risk", "Leverage Risk"}
+
+
+def test_risk_endpoint_rejects_non_numeric_ratios():
+    response = TestClient(app).post("/api/v1/ml/risk/assess", json={
+        "user_id": "u1",
+        "business_id": "b1",
+        "financial_data": {"current_ratio": "high"},
+    })
+    assert response.status_code == 400
+
+
+def test_trend_endpoint_is_stable():
+    client = TestClient(app)
+    payload = {"industry": "technology", "region": "colombia", "keywords": ["fintech"]}
+    assert client.post("/api/v1/ml/market/trends", json=payload).json() == \
+        client.post("/api/v1/ml/market/trends", json=payload).json()
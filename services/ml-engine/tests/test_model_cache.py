@@ -0,0 +1,81 @@
+"""
+Tests for the fitted model cache
+"""
+import numpy as np
+
+from app.core.model_cache import ModelCache, series_fingerprint
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_cache(**overrides):
+    options = dict(max_entries=3, ttl_seconds=60, max_bytes=1000, sizeof=lambda value: 100)
+    options.update(overrides)
+    return ModelCache(**options)
+
+
+class TestSeriesFingerprint:
+    """Test cases for series_fingerprint"""
+
+    def test_same_series_same_key(self):
+        ds = np.array(["2024-01-31", "2024-02-29"], dtype="datetime64[ns]")
+        y = np.array([1.0, 2.0])
+
+        assert series_fingerprint(ds, y, {"a": 1}) == series_fingerprint(ds.copy(), y.copy(), {"a": 1})
+
+    def test_values_and_params_change_key(self):
+        ds = np.array(["2024-01-31", "2024-02-29"], dtype="datetime64[ns]")
+        y = np.array([1.0, 2.0])
+        base = series_fingerprint(ds, y, {"a": 1})
+
+        assert series_fingerprint(ds, y + 1, {"a": 1}) != base
+        assert series_fingerprint(ds, y, {"a": 2}) != base
+
+
+class TestModelCache:
+    """Test cases for ModelCache"""
+
+    def test_lru_eviction(self):
+        cache = make_cache()
+        for key in ("a", "b", "c"):
+            cache.put(key, key)
+
+        cache.get("a")
+        cache.put("d", "d")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "a"
+        assert len(cache) == 3
+
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        cache = make_cache(clock=clock)
+        cache.put("a", "model")
+
+        clock.now = 59
+        assert cache.get("a") == "model"
+
+        clock.now = 60
+        assert cache.get("a") is None
+        assert cache.stats()["bytes"] == 0
+
+    def test_memory_ceiling(self):
+        cache = make_cache(max_entries=10, max_bytes=250)
+        for key in ("a", "b", "c"):
+            cache.put(key, key)
+
+        assert cache.stats()["bytes"] == 200
+        assert cache.get("a") is None
+
+    def test_oversized_value_not_cached(self):
+        cache = make_cache(sizeof=lambda value: 5000)
+        cache.put("a", "huge")
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
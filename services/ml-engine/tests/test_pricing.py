@@ -0,0 +1,256 @@
+"""
+Tests for the pricing kernels and DynamicPricingEngine
+"""
+import fakeredis
+import fakeredis.aioredis
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import (
+    DynamicPricingEngine,
+    PricingCatalogRequest,
+    PricingOptimizationRequest,
+    TimeSeriesData,
+    app,
+)
+from app import pricing
+from app.elasticity_store import MemoryElasticityStore, RedisElasticityStore
+from app.pricing import DEFAULT_GRID_SIZE, MIN_MARGIN, grid_search_prices, ragged_stats
+
+
+@pytest.fixture
+def catalog():
+    rng = np.random.default_rng(7)
+    n = 40
+    histories = [rng.gamma(3.0, 20.0, rng.integers(0, 12)).round(1).tolist() for _ in range(n)]
+    histories[0] = []
+    return {
+        "user_id": "u1",
+        "product_id": [f"sku-{i}" for i in range(n)],
+        "current_price": rng.uniform(5, 100, n).round(2).tolist(),
+        "cost": rng.uniform(2, 60, n).round(2).tolist(),
+        "competitor_price": [None if i % 5 == 0 else float(p) for i, p in enumerate(rng.uniform(5, 120, n).round(2))],
+        "demand_history": histories,
+        "elasticity": [-0.8 if i % 7 == 0 else None for i in range(n)],
+    }
+
+
+def test_ragged_stats_matches_numpy():
+    histories = [[1.0, 2.0, 4.0], [], [5.0], [3.0, 3.0, 9.0, 1.0]]
+    stats = ragged_stats(histories)
+
+    assert stats["count"].tolist() == [3, 0, 1, 4]
+    for i, h in enumerate(histories):
+        if h:
+            assert stats["mean"][i] == pytest.approx(np.mean(h))
+            assert stats["std"][i] == pytest.approx(np.std(h))
+
+
+def test_catalog_matches_single_product_path(catalog):
+    engine = DynamicPricingEngine()
+    columns = engine.optimize_catalog(PricingCatalogRequest(**catalog)).columns
+
+    for i, product_id in enumerate(catalog["product_id"]):
+        if not catalog["demand_history"][i]:
+            continue  # the single-product path has no defined demand here
+        competitor = catalog["competitor_price"][i]
+        single = engine.optimize_price(PricingOptimizationRequest(
+            user_id="u1",
+            product_id=product_id,
+            current_price=catalog["current_price"][i],
+            cost=catalog["cost"][i],
+            competitor_prices=[] if competitor is None else [competitor],
+            historical_demand=[
+                TimeSeriesData(date=f"2024-01-{d + 1:02d}", value=v)
+                for d, v in enumerate(catalog["demand_history"][i])
+            ],
+            elasticity=catalog["elasticity"][i],
+        ))
+        assert columns.optimal_price[i] == pytest.approx(single.optimal_price)
+        assert columns.expected_units_sold[i] == pytest.approx(single.expected_units_sold, abs=0.01)
+        assert columns.price_elasticity[i] == pytest.approx(single.price_elasticity)
+        assert columns.revenue_impact[i] == pytest.approx(single.revenue_impact, abs=0.01)
+
+
+def test_batch_endpoint_rejects_ragged_columns(catalog):
+    catalog["cost"] = catalog["cost"][:-1]
+    response = TestClient(app).post("/api/v1/ml/pricing/optimize/batch", json=catalog)
+    assert response.status_code == 422
+
+
+def test_batch_endpoint_returns_columns(catalog):
+    response = TestClient(app).post("/api/v1/ml/pricing/optimize/batch", json=catalog)
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["columns"]["optimal_price"]) == len(catalog["product_id"])
+    assert body["summary"]["total_products"] == len(catalog["product_id"])
+    assert len(body["recommendation_legend"]) == 4
+
+
+class TestGridSearch:
+    def test_matches_analytic_optimum_inside_band(self):
+        # Constant elasticity e < -1 has its profit optimum at cost * e / (1 + e)
+        cost = np.array([10.0, 4.0])
+        elasticity = np.array([-2.0, -3.0])
+        analytic = cost * elasticity / (1 + elasticity)  # 20.0, 6.0
+
+        result = grid_search_prices(
+            current_price=analytic * 1.1,
+            cost=cost,
+            competitor_price=analytic,
+            avg_demand=np.array([100.0, 50.0]),
+            elasticity=elasticity,
+            grid_size=801,
+            competitor_band=0.5,
+        )
+        assert result["optimal_price"] == pytest.approx(analytic, rel=2e-3)
+        assert "profit_curve" not in result
+
+    def test_constraints_bound_the_optimum(self):
+        result = grid_search_prices(
+            current_price=np.array([10.0, 10.0]),
+            cost=np.array([5.0, 12.0]),
+            competitor_price=np.array([10.0, 10.0]),
+            avg_demand=np.array([100.0, 100.0]),
+            elasticity=np.array([-0.5, -2.0]),  # inelastic: profit rises with price
+            competitor_band=0.2,
+            include_curves=True,
+        )
+        # Inelastic SKU hits the top of the competitor band; the second SKU's
+        # cost floor sits above the band, so the floor wins
+        assert result["optimal_price"][0] == pytest.approx(12.0)
+        assert result["optimal_price"][1] == pytest.approx(12.0 * MIN_MARGIN)
+        assert result["profit_curve"].shape == (2, DEFAULT_GRID_SIZE)
+        assert result["expected_profit"][0] == pytest.approx(result["profit_curve"][0].max())
+
+    def test_chunking_does_not_change_results(self, monkeypatch):
+        rng = np.random.default_rng(3)
+        n = 500
+        arrays = dict(
+            current_price=rng.uniform(10, 50, n),
+            cost=rng.uniform(2, 20, n),
+            competitor_price=rng.uniform(10, 50, n),
+            avg_demand=rng.uniform(10, 100, n),
+            elasticity=rng.uniform(-4, -0.5, n),
+        )
+        whole = grid_search_prices(**arrays)
+        monkeypatch.setattr(pricing, "GRID_CHUNK_CELLS", 7 * DEFAULT_GRID_SIZE)
+        chunked = grid_search_prices(**arrays)
+        np.testing.assert_array_equal(whole["optimal_price"], chunked["optimal_price"])
+
+    def test_single_product_grid_returns_curve(self):
+        response = DynamicPricingEngine().optimize_price(PricingOptimizationRequest(
+            user_id="u1",
+            product_id="p1",
+            current_price=20.0,
+            cost=8.0,
+            competitor_prices=[18.0, 22.0],
+            historical_demand=[TimeSeriesData(date="2024-01-01", value=v) for v in (40, 42, 38, 41)],
+            elasticity=-2.5,
+            strategy="grid",
+            grid_size=101,
+        ))
+        assert response.strategy == "grid"
+        assert len(response.profit_curve.price) == 101
+        assert response.expected_profit == pytest.approx(max(response.profit_curve.profit), abs=0.01)
+
+
+@pytest.fixture(params=["memory", "redis"])
+def make_store(request):
+    """Factory for an elasticity store on each backend"""
+    def make(**kwargs):
+        if request.param == "memory":
+            return MemoryElasticityStore(**kwargs)
+        return RedisElasticityStore(fakeredis.aioredis.FakeRedis(decode_responses=True), **kwargs)
+    return make
+
+
+class TestElasticityStore:
+    @pytest.mark.asyncio
+    async def test_refresh_only_recomputes_dirty_products(self, make_store):
+        store = make_store(max_history=4)
+        await store.record("u1", [("a", [10, 12, 8, 30, 10]), ("b", [5])])  # oldest "a" value dropped
+        assert await store.lookup("u1", "a") is None
+
+        assert await store.refresh() == 2
+        elasticity, mean = await store.lookup("u1", "a")
+        assert mean == pytest.approx(np.mean([12, 8, 30, 10]))
+        assert elasticity == pytest.approx(-1 - np.std([12, 8, 30, 10]) / (mean + 1))
+        assert (await store.lookup("u1", "b"))[0] == -1.5  # too few points
+        assert await store.lookup("u2", "a") is None
+
+        assert await store.refresh() == 0
+        await store.record("u1", [("b", [6, 7])])
+        assert await store.refresh() == 1
+        assert await store.stats() == {"backend": store.name, "products": 2, "pending": 0, "refreshes": 2}
+
+    @pytest.mark.asyncio
+    async def test_lookup_many_marks_unknown_as_nan(self, make_store):
+        store = make_store()
+        await store.record("u1", [("a", [1, 2, 3])])
+        await store.refresh()
+        elasticity, mean = await store.lookup_many("u1", ["x", "a"])
+        assert np.isnan(elasticity[0]) and np.isnan(mean[0])
+        assert mean[1] == pytest.approx(2.0)
+
+    @pytest.mark.asyncio
+    async def test_least_recently_updated_products_are_evicted(self, make_store):
+        store = make_store(max_products=2)
+        await store.record("u1", [("a", [1, 2]), ("b", [3, 4])])
+        await store.refresh()
+        await store.record("u1", [("a", [5])])  # "b" is now the oldest
+        await store.record("u1", [("c", [6, 7])])
+        await store.refresh()
+
+        assert await store.lookup("u1", "b") is None
+        assert await store.lookup("u1", "a") is not None
+        assert await store.lookup("u1", "c") is not None
+        assert (await store.stats())["products"] == 2
+
+    @pytest.mark.asyncio
+    async def test_redis_store_is_shared_between_workers(self):
+        server = fakeredis.FakeServer()
+        uploader, pricer = (
+            RedisElasticityStore(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True))
+            for _ in range(2)
+        )
+        await uploader.record("u1", [("a", [1, 2, 3])])
+        assert await pricer.refresh() == 1  # any worker's refresher picks it up
+        assert await uploader.refresh() == 0
+        assert (await uploader.lookup("u1", "a"))[1] == pytest.approx(2.0)
+
+    @pytest.mark.asyncio
+    async def test_pricing_uses_stored_demand(self, make_store, catalog):
+        store = make_store()
+        engine = DynamicPricingEngine(elasticity_store=store)
+        with_history = (await engine.optimize_catalog_async(PricingCatalogRequest(**catalog))).columns
+
+        await store.record("u1", zip(catalog["product_id"], catalog["demand_history"]))
+        await store.refresh()
+        catalog["demand_history"] = None
+        from_store = (await engine.optimize_catalog_async(PricingCatalogRequest(**catalog))).columns
+
+        assert from_store.optimal_price == with_history.optimal_price
+        assert from_store.expected_units_sold == pytest.approx(with_history.expected_units_sold, abs=0.01)
+
+        single = await engine.optimize_price_async(PricingOptimizationRequest(
+            user_id="u1", product_id="sku-3", current_price=catalog["current_price"][3],
+            cost=catalog["cost"][3], competitor_prices=[],
+        ))
+        assert single.price_elasticity == pytest.approx(from_store.price_elasticity[3], abs=1e-3)
+
+    def test_unknown_product_without_history_is_rejected(self):
+        response = TestClient(app).post("/api/v1/ml/pricing/optimize", json={
+            "user_id": "u1", "product_id": "never-seen", "current_price": 10,
+            "cost": 5, "competitor_prices": [],
+        })
+        assert response.status_code == 400
+
+    def test_demand_upload_endpoint(self):
+        response = TestClient(app).post("/api/v1/ml/pricing/demand", json={
+            "user_id": "upload-test", "product_id": ["a", "b"],
+            "demand_history": [[1, 2, 3], [4, 5, 6]], "refresh": True,
+        })
+        assert response.status_code == 200
+        assert response.json()["refreshed"] == 2
@@ -0,0 +1,112 @@
+"""
+Tests for sales forecasting
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.ensemble import RandomForestRegressor
+
+from app import main
+from app.core.fit_pool import FitPool
+from app.main import app
+from app.sales import FOREST_PARAMS, StackedForest, calendar_features, fit_sales_model, training_matrix
+
+
+def weekly_pattern(n=200, promo=None):
+    ds = pd.date_range("2023-01-01", periods=n, freq="D")
+    t = np.arange(n)
+    y = 100 + 30 * (ds.dayofweek >= 5) + 0.1 * t + np.random.default_rng(0).normal(0, 3, n)
+    if promo is not None:
+        y = y + 50 * promo[:n]
+    return ds, y
+
+
+def test_stacked_forest_matches_sklearn():
+    ds, y = weekly_pattern()
+    X = training_matrix(y, calendar_features(ds.values), np.zeros((len(y), 0)), [1, 7], [7])
+    forest = RandomForestRegressor(**FOREST_PARAMS).fit(X, y[7:])
+
+    stacked = StackedForest(forest)
+    ours = np.array([stacked.predict_trees(row).mean() for row in X[:40]])
+    np.testing.assert_allclose(ours, forest.predict(X[:40]))
+
+
+def test_training_matrix_lags_and_windows():
+    y = np.arange(10, dtype=np.float64)
+    X = training_matrix(y, np.zeros((10, 0)), np.zeros((10, 0)), [1, 3], [2])
+    # First row is t=3: y[2], y[0], mean(y[1:3])
+    np.testing.assert_allclose(X[0], [2.0, 0.0, 1.5])
+    assert X.shape == (7, 3)
+
+
+def test_recursive_forecast_keeps_weekly_shape():
+    ds, y = weekly_pattern()
+    model = fit_sales_model(ds.values, y, "D", n_jobs=1)
+    forecast = model.forecast(28)
+
+    assert len(forecast) == 28
+    assert forecast["ds"].iloc[0] == ds[-1] + pd.Timedelta(days=1)
+    weekend = forecast["ds"].dt.dayofweek >= 5
+    assert forecast["yhat"][weekend].mean() > forecast["yhat"][~weekend].mean() + 15
+    assert (forecast["yhat_lower"] <= forecast["yhat"]).all()
+    assert (forecast["yhat"] <= forecast["yhat_upper"]).all()
+
+
+class TestEndpoint:
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+
+    def body(self, horizon=14, **extra):
+        ds, y = weekly_pattern(120)
+        return {
+            "user_id": "u1",
+            "business_id": "sales-test",
+            "historical_sales": {"dates": ds.strftime("%Y-%m-%d").tolist(), "values": y.round(2).tolist()},
+            "forecast_horizon": horizon,
+            **extra,
+        }
+
+    def test_forecast_and_cache(self, client):
+        first = client.post("/api/v1/ml/forecast/sales", json=self.body())
+        assert first.status_code == 200
+        result = first.json()
+        assert len(result["forecast"]["predicted_value"]) == 14
+        assert result["frequency"] == "D"
+        assert result["cached_model"] is False
+
+        second = client.post("/api/v1/ml/forecast/sales", json=self.body(horizon=60))
+        assert second.json()["cached_model"] is True
+        assert second.json()["forecast"]["predicted_value"][:14] == result["forecast"]["predicted_value"]
+
+    def test_external_factors(self, client):
+        promo = (np.arange(120 + 14) % 10 == 0).astype(float)
+        response = client.post(
+            "/api/v1/ml/forecast/sales",
+            json=self.body(external_factors={"promo": promo.tolist(), "store_count": 3})
+        )
+        assert response.status_code == 200
+        assert set(response.json()["feature_importance"]) >= {"promo", "store_count"}
+
+        response = client.post("/api/v1/ml/forecast/sales", json=self.body(external_factors={"promo": [1, 0]}))
+        assert response.status_code == 400
+
+    def test_short_history_is_rejected(self, client):
+        body = self.body()
+        body["historical_sales"] = {"dates": body["historical_sales"]["dates"][:5],
+                                    "values": body["historical_sales"]["values"][:5]}
+        assert client.post("/api/v1/ml/forecast/sales", json=body).status_code == 400
+
+    def test_saturated_fit_pool_returns_429(self, client, monkeypatch):
+        pool = FitPool(workers=0, max_queue=0, retry_after=9)
+        monkeypatch.setattr(main.sales_forecaster, "fit_pool", pool)
+        pool._acquire()  # the only slot is busy
+        try:
+            response = client.post("/api/v1/ml/forecast/sales", json=self.body(horizon=7) | {"business_id": "busy"})
+        finally:
+            pool._release()
+            pool.shutdown()
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "9"
@@ -0,0 +1,51 @@
+"""
+Tests for per-stage latency instrumentation
+"""
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.core.stages import size_bucket, stage
+from app.main import app
+
+
+def stage_count(component, name, engine, size):
+    return REGISTRY.get_sample_value(
+        "ml_stage_duration_seconds_count",
+        {"component": component, "stage": name, "engine": engine, "size": size},
+    ) or 0.0
+
+
+@pytest.mark.parametrize("n, label", [
+    (0, "<=10"), (10, "<=10"), (11, "<=100"), (1000, "<=1k"), (50_000, "<=100k"), (100_001, ">100k"),
+])
+def test_size_bucket(n, label):
+    assert size_bucket(n) == label
+
+
+def test_stage_observes_even_on_error():
+    before = stage_count("test", "boom", "x", "<=100")
+    with pytest.raises(ValueError):
+        with stage("test", "boom", "x", 50):
+            raise ValueError("boom")
+    assert stage_count("test", "boom", "x", "<=100") == before + 1
+
+
+def test_catalog_stages_on_metrics_endpoint():
+    client = TestClient(app)
+    before = {name: stage_count("inventory", name, "eoq", "<=10") for name in ("prepare", "optimize", "serialize")}
+
+    response = client.post("/api/v1/ml/inventory/optimize/batch", json={
+        "user_id": "u1",
+        "product_id": ["a", "b"],
+        "demand_history": [[100, 120, 90], [10, 12, 8]],
+        "lead_time_days": [7, 14],
+        "holding_cost_per_unit": [1.0, 2.0],
+        "ordering_cost": [50.0, 40.0],
+    })
+    assert response.status_code == 200
+
+    for name, count in before.items():
+        assert stage_count("inventory", name, "eoq", "<=10") == count + 1
+    metrics = client.get("/metrics").text
+    assert 'ml_stage_duration_seconds_count{component="inventory",engine="eoq",size="<=10",stage="optimize"}' in metrics
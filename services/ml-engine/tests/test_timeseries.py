@@ -0,0 +1,123 @@
+"""
+Tests for time-series ingestion
+"""
+from typing import Annotated
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, ValidationError
+
+from app.core.timeseries import Series, find_gaps, infer_frequency, min_points, regularize
+from app.main import app
+
+
+class Payload(BaseModel):
+    series: Series
+
+
+def dates(*values):
+    return np.array(values, dtype="datetime64[ns]")
+
+
+class TestParsing:
+    def test_points_and_columns_parse_to_the_same_arrays(self):
+        points = Payload(series=[{"date": "2024-02-01", "value": 2}, {"date": "2024-01-01", "value": 1}])
+        columns = Payload(series={"dates": ["2024-02-01", "2024-01-01"], "values": [2, 1]})
+
+        for parsed in (points.series, columns.series):
+            assert parsed.ds.dtype == np.dtype("datetime64[ns]")
+            assert parsed.y.dtype == np.float64
+            # Out-of-order input is sorted by date
+            np.testing.assert_array_equal(parsed.ds, dates("2024-01-01", "2024-02-01"))
+            np.testing.assert_array_equal(parsed.y, [1.0, 2.0])
+
+    def test_mixed_date_formats(self):
+        series = Series.coerce({"dates": ["2024-01-01", "2024-01-02T12:00:00"], "values": [1, 2]})
+        assert series.ds[1] == np.datetime64("2024-01-02T12:00:00")
+
+    @pytest.mark.parametrize("payload", [
+        {"dates": ["2024-01-01"], "values": [1, 2]},
+        {"dates": ["not a date"], "values": [1]},
+        {"dates": ["2024-01-01"], "values": [float("nan")]},
+        [{"date": "2024-01-01"}],
+        [{"date": "2024-01-01", "value": "ten"}],
+        "2024-01-01",
+    ])
+    def test_invalid_payloads_are_rejected(self, payload):
+        with pytest.raises(ValidationError):
+            Payload(series=payload)
+
+    def test_min_points(self):
+        class History(BaseModel):
+            series: Annotated[Series, min_points(2)]
+
+        assert len(History(series={"dates": ["2024-01-01", "2024-02-01"], "values": [1, 2]}).series) == 2
+        for payload in ([], {"dates": [], "values": []}, [{"date": "2024-01-01", "value": 1}]):
+            with pytest.raises(ValidationError, match="at least 2 points"):
+                History(series=payload)
+
+    def test_serializes_as_columns(self):
+        payload = Payload(series=[{"date": "2024-01-01", "value": 1.5}])
+        assert payload.model_dump() == {"series": {"dates": ["2024-01-01"], "values": [1.5]}}
+
+
+class TestGaps:
+    def test_infer_frequency(self):
+        assert infer_frequency(dates("2024-01-01", "2024-01-02", "2024-01-03")) == "D"
+        assert infer_frequency(dates("2024-01-31", "2024-02-29", "2024-03-31")) == "M"
+        assert infer_frequency(dates("2024-01-01", "2024-01-01", "2024-01-02")) is None
+        assert infer_frequency(dates("2024-01-01", "2024-01-04", "2024-01-07")) is None
+
+    def test_regularize_interpolates_missing_months(self):
+        series = Series(dates("2024-01-31", "2024-02-29", "2024-04-30", "2024-05-31"), np.array([1.0, 2.0, 4.0, 5.0]))
+        assert find_gaps(series) == 1
+
+        filled = regularize(series)
+        np.testing.assert_array_equal(
+            filled.ds, dates("2024-01-31", "2024-02-29", "2024-03-31", "2024-04-30", "2024-05-31")
+        )
+        np.testing.assert_allclose(filled.y, [1, 2, 3, 4, 5])
+
+    def test_regularize_sum_fills_zero(self):
+        series = Series(dates("2024-01-01", "2024-01-02", "2024-01-05"), np.array([1.0, 3.0, 4.0]))
+        filled = regularize(series, freq="D", how="sum")
+        np.testing.assert_allclose(filled.y, [1, 3, 0, 0, 4])
+
+    def test_regular_series_is_returned_unchanged(self):
+        series = Series(dates("2024-01-01", "2024-01-02", "2024-01-03"), np.array([1.0, 2.0, 3.0]))
+        assert regularize(series) is series
+
+
+def test_endpoints_accept_columnar_series():
+    client = TestClient(app)
+    response = client.post("/api/v1/ml/inventory/optimize", json={
+        "user_id": "u1",
+        "product_id": "p1",
+        "historical_demand": {"dates": ["2024-01-01", "2024-02-01", "2024-03-01"], "values": [100, 120, 80]},
+        "lead_time_days": 14,
+        "holding_cost_per_unit": 2.0,
+        "ordering_cost": 50.0,
+    })
+    assert response.status_code == 200
+
+    schema = app.openapi()["components"]["schemas"]["InventoryOptimizationRequest"]
+    assert "anyOf" in schema["properties"]["historical_demand"]
+
+
+@pytest.mark.parametrize("path, field", [
+    ("/api/v1/ml/forecast/cashflow", "historical_data"),
+    ("/api/v1/ml/inventory/optimize", "historical_demand"),
+])
+def test_endpoints_reject_empty_series(path, field):
+    response = TestClient(app).post(path, json={
+        "user_id": "u1",
+        "business_id": "b1",
+        "product_id": "p1",
+        field: [],
+        "lead_time_days": 14,
+        "holding_cost_per_unit": 2.0,
+        "ordering_cost": 50.0,
+    })
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", field]
@@ -0,0 +1,100 @@
+"""
+Tests for warm-start parameter storage
+"""
+import fakeredis
+import fakeredis.aioredis
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.model_cache import ModelCache
+from app.core.warm_starts import WarmStartStore, dump_params, load_params
+from app.main import CashFlowPredictor
+
+
+@pytest.fixture
+def params():
+    return {"k": 0.1, "m": 0.5, "sigma_obs": 0.05, "delta": np.linspace(0, 1, 18), "beta": np.zeros(20)}
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def worker_store(server):
+    """A WarmStartStore as another uvicorn worker would build it"""
+    local = ModelCache(max_entries=16, ttl_seconds=60, max_bytes=2**20)
+    return WarmStartStore(local, redis=fakeredis.aioredis.FakeRedis(server=server, decode_responses=True))
+
+
+def assert_same_params(actual, expected):
+    assert actual.keys() == expected.keys()
+    for name, value in expected.items():
+        np.testing.assert_array_equal(actual[name], value)
+
+
+class TestWarmStartStore:
+    """Test cases for WarmStartStore"""
+
+    def test_params_round_trip_through_json(self, params):
+        loaded = load_params(dump_params(params))
+        assert_same_params(loaded, params)
+        assert loaded["delta"].dtype == np.float64
+        assert isinstance(loaded["k"], float)
+
+    @pytest.mark.asyncio
+    async def test_other_workers_read_shared_params(self, server, params):
+        fitter, other = worker_store(server), worker_store(server)
+        await fitter.put_async("biz-1", params)
+
+        assert other.get("biz-1") is None  # sync path is local only
+        assert_same_params(await other.get_async("biz-1"), params)
+        assert_same_params(other.get("biz-1"), params)
+        assert await other.get_async("biz-2") is None
+
+    @pytest.mark.asyncio
+    async def test_shared_copy_expires_with_the_local_ttl(self, server, params):
+        store = worker_store(server)
+        await store.put_async("biz-1", params)
+        ttl = await store.redis.pttl(store._key("biz-1"))
+        assert 0 < ttl <= 60_000
+
+    @pytest.mark.asyncio
+    async def test_redis_failure_falls_back_to_a_cold_start(self, params):
+        class BrokenRedis:
+            async def get(self, key):
+                raise ConnectionError("down")
+
+            async def set(self, *args, **kwargs):
+                raise ConnectionError("down")
+
+        store = WarmStartStore(ModelCache(max_entries=16, ttl_seconds=60, max_bytes=2**20), redis=BrokenRedis())
+        await store.put_async("biz-1", params)
+        assert store.get("biz-1") is params
+        assert await store.get_async("biz-2") is None
+
+
+class TestSharedWarmStartFit:
+    """A fit on one worker warm-starts the next fit on another"""
+
+    @pytest.mark.asyncio
+    async def test_fit_starts_from_params_of_another_worker(self, server, params):
+        class RecordingPool:
+            def __init__(self):
+                self.calls = []
+
+            async def run(self, fn, ds, y, init):
+                self.calls.append(init)
+                return object()
+
+        await worker_store(server).put_async("biz-1", params)
+        pool = RecordingPool()
+        predictor = CashFlowPredictor(fit_pool=pool, warm_starts=worker_store(server))
+        df = pd.DataFrame({"ds": pd.date_range("2022-01-31", periods=30, freq="ME"), "y": np.arange(30.0)})
+
+        await predictor._get_or_fit_model(df, "biz-1")
+        await predictor._get_or_fit_model(df, "biz-new")
+
+        assert_same_params(pool.calls[0], params)
+        assert pool.calls[1] is None
@@ -0,0 +1,96 @@
+"""
+Tests for lazy imports, background warm-up and readiness
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.core.warmup import Warmup
+
+
+def test_heavy_libraries_are_not_imported_at_startup():
+    code = (
+        "import sys, app.main; "
+        "print([m for m in ('prophet', 'sklearn.ensemble', 'joblib') if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).parent.parent, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
+@pytest.mark.asyncio
+async def test_warmup_reports_steps_and_errors():
+    warmup = Warmup()
+    calls = []
+
+    async def ok():
+        calls.append("ok")
+
+    async def broken():
+        raise RuntimeError("no stan")
+
+    assert not warmup.ready
+    await warmup.run({"ok": ok, "broken": broken})
+
+    assert warmup.ready
+    assert calls == ["ok"]
+    stats = warmup.stats()
+    assert set(stats["steps"]) == {"ok", "broken"}
+    assert stats["errors"] == {"broken": "no stan"}
+    assert stats["seconds"] is not None
+
+
+@pytest.mark.asyncio
+async def test_model_warmups_run_on_every_fit_worker(monkeypatch):
+    class RecordingPool:
+        workers = 3
+
+        def __init__(self):
+            self.calls = []
+
+        async def run(self, fn, *args):
+            self.calls.append(fn)
+
+    pool = RecordingPool()
+    monkeypatch.setattr(main, "fit_pool", pool)
+    steps = main.warmup_steps()
+
+    await steps["prophet"]()
+    await steps["sales"]()
+
+    assert pool.calls == [main.warm_up_forecasting] * 3 + [main.warm_up_sales] * 3
+
+
+def test_ready_endpoint_waits_for_warmup(monkeypatch):
+    warmup = Warmup()
+    monkeypatch.setattr(main, "warmup", warmup)
+    client = TestClient(main.app)
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "warming_up"
+    assert client.get("/health").status_code == 200
+
+    warmup.mark_ready()
+    assert client.get("/ready").json()["status"] == "ready"
+
+
+def test_churn_model_loads_on_first_use():
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return None
+
+    predictor = main.ChurnPredictor(model_loader=loader)
+    assert predictor.model_version == "not loaded"
+    assert predictor.model is None
+    assert predictor.model is None
+    assert loads == [1]
+    assert predictor.model_version == "rules"